@@ -2,4 +2,19 @@
 
 from __future__ import absolute_import
 
-from enlite.classes import DatabaseHandler, Filehandler, DBLConfigLoader, Enliter, RecordNotFoundError, MissingCarbonError
+from enlite import classes
+
+# the classes are imported from enlite.classes on first access, see class_modules there
+__all__ = list(classes.class_modules)
+
+
+def __getattr__(name):
+    if name not in classes.class_modules:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    class_object = getattr(classes, name)
+    globals()[name] = class_object
+    return class_object
+
+
+def __dir__():
+    return sorted(set(globals()) | set(classes.class_modules))
@@ -21,8 +21,7 @@ else
 	echo "Please note:"
 	echo "There can be some falsely placed newlines in the BiGG metabolites file,"
 	echo "due to the download process and the way the server provides the files."
-	echo "Please remove the additional newlines before proceding."
-	echo "the lines have to contain 6 entries, all separated by a tab."
+	echo "The build joins these lines again and reports how many records it repaired."
 	echo ""
 	echo ""
 	echo "all done"
@@ -0,0 +1,188 @@
+import asyncio
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+
+from enlite.classes.Reporters import Enliter
+
+
+class AsyncEnliter:
+    """
+    Awaitable version of the Enliter lookups for asyncio applications.
+    The queries run on a dedicated thread pool, each worker thread checks out its own connection
+    of a PooledDatabaseHandler. Concurrent requests for the same ID share one query,
+    and the IDs of one find_*_alias_multi call are resolved with one batched query.
+    All coroutines of one AsyncEnliter have to run on the same event loop.
+    """
+    def __init__(self, db_handler, filehandler, max_workers=None):
+        """
+        :param db_handler: a PooledDatabaseHandler, or any handler which can be used from several threads
+        :type db_handler: PooledDatabaseHandler
+        :param filehandler: the Filehandler passed on to the Enliter
+        :type filehandler: Filehandler
+        :param max_workers: number of worker threads, by default the pool size of the handler
+        :type max_workers: int
+        """
+        if max_workers is None:
+            max_workers = getattr(db_handler, 'pool_size', 1)
+        self._db_handler = db_handler
+        self._enliter = Enliter(db_handler, filehandler)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='enlite')
+        # lookup key -> future of the query which is currently running for it
+        self._in_flight = {}
+        self.coalesced_requests = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """wait for the running queries and stop the worker threads"""
+        self._executor.shutdown(wait=True)
+
+    def run_on_connection(self, method_name, *args):
+        # runs in a worker thread, so the whole lookup uses the connection of this thread
+        checkout = getattr(self._db_handler, 'checkout', contextlib.nullcontext)
+        with checkout():
+            return getattr(self._db_handler, method_name)(*args)
+
+    async def run_coalesced(self, method_name, *args):
+        """
+        Run a method of the database handler in the executor, or wait for the result
+        of an identical call which is already running
+        :raises RecordNotFoundError: when the method raised it
+        """
+        lookup_key = (method_name, args)
+        in_flight = self._in_flight.get(lookup_key)
+        if in_flight is None:
+            loop = asyncio.get_running_loop()
+            in_flight = loop.run_in_executor(self._executor, self.run_on_connection, method_name, *args)
+            self._in_flight[lookup_key] = in_flight
+            in_flight.add_done_callback(lambda finished: self._in_flight.pop(lookup_key, None))
+        else:
+            self.coalesced_requests += 1
+        # a cancelled caller must not cancel the query for the others waiting on it
+        result = await asyncio.shield(in_flight)
+        if isinstance(result, (dict, list)):
+            return result.copy()
+        return result
+
+    async def fetch_alias_records_many(self, db_type, database_ids, db_name_in, metacyc_id_is_altered=False):
+        """
+        Fetch the alias records of several IDs with one batched query,
+        IDs which are already being looked up join the running query instead.
+        :param db_type: compound or reaction
+        :type db_type: str
+        :return: the alias records of each input ID, None for IDs without a record
+        :rtype: dict
+        """
+        loop = asyncio.get_running_loop()
+        id_futures = {}
+        new_ids = []
+        for database_id in dict.fromkeys(database_ids):
+            lookup_key = (f"fetch_{db_type}_alias", database_id, db_name_in, metacyc_id_is_altered)
+            id_future = self._in_flight.get(lookup_key)
+            if id_future is None:
+                id_future = loop.create_future()
+                self._in_flight[lookup_key] = id_future
+                new_ids.append(database_id)
+            else:
+                self.coalesced_requests += 1
+            id_futures[database_id] = id_future
+
+        if new_ids:
+            batch_future = loop.run_in_executor(self._executor, self.run_on_connection, f"fetch_{db_type}_alias_many",
+                                                new_ids, db_name_in, metacyc_id_is_altered)
+
+            def resolve_id_futures(finished_batch):
+                for database_id in new_ids:
+                    id_future = self._in_flight.pop((f"fetch_{db_type}_alias", database_id, db_name_in, metacyc_id_is_altered))
+                    if finished_batch.cancelled():
+                        id_future.cancel()
+                    elif finished_batch.exception() is not None:
+                        id_future.set_exception(finished_batch.exception())
+                    else:
+                        id_future.set_result(finished_batch.result()[database_id])
+            batch_future.add_done_callback(resolve_id_futures)
+
+        alias_records = await asyncio.gather(*(asyncio.shield(id_future) for id_future in id_futures.values()))
+        return dict(zip(id_futures, alias_records))
+
+    async def select_aliases(self, records_dicts, db_type, db_name_out):
+        """Enliter.select_aliases, the aliases of namespaces other than modelseed, metacyc, bigg and kegg are fetched in the executor"""
+        namespace_aliases = {}
+        if db_name_out not in Enliter.record_db_names:
+            modelseed_ids = tuple(Enliter.collect_modelseed_ids(records_dicts))
+            namespace_aliases = await self.run_coalesced('fetch_namespace_aliases_many', db_type, modelseed_ids, db_name_out)
+        return Enliter.pick_aliases(records_dicts, db_name_out, namespace_aliases)
+
+    async def find_compound_alias_single(self, compound_id, db_name_in, db_name_out, metacyc_id_is_altered=False):
+        alias_records = await self.fetch_alias_records_many('compound', [compound_id], db_name_in, metacyc_id_is_altered)
+        cpd_alias_records = alias_records[compound_id]
+        if cpd_alias_records is None:
+            print(f"record for {compound_id} not found")
+            return
+        records_dict = self._enliter.handle_multiple_occurrences_compounds(cpd_alias_records)
+        if db_name_out == 'all':
+            return records_dict
+        else:
+            aliases_dict = await self.select_aliases({compound_id: records_dict}, 'compound', db_name_out)
+            return aliases_dict[compound_id][0]
+
+    async def find_compound_alias_multi(self, compound_list, db_name_in, db_name_out, metacyc_id_is_altered=False):
+        alias_records = await self.fetch_alias_records_many('compound', compound_list, db_name_in, metacyc_id_is_altered)
+        records_dicts = {}
+        for compound_id, cpd_alias_records in alias_records.items():
+            if cpd_alias_records is None:
+                print(f"record for {compound_id} not found")
+                continue
+            records_dicts[compound_id] = self._enliter.handle_multiple_occurrences_compounds(cpd_alias_records)
+        return await self.select_aliases(records_dicts, 'compound', db_name_out)
+
+    async def find_reaction_alias_single(self, reaction_id, db_name_in, db_name_out, metacyc_id_is_altered=False):
+        alias_records = await self.fetch_alias_records_many('reaction', [reaction_id], db_name_in, metacyc_id_is_altered)
+        rxn_alias_records = alias_records[reaction_id]
+        if rxn_alias_records is None:
+            print(f"record for {reaction_id} not found")
+            return
+        records_dict = self._enliter.handle_multiple_occurrences_reactions(rxn_alias_records)
+        if db_name_out == 'all':
+            return records_dict
+        else:
+            aliases_dict = await self.select_aliases({reaction_id: records_dict}, 'reaction', db_name_out)
+            return aliases_dict[reaction_id][0]
+
+    async def find_reaction_alias_multi(self, reaction_list, db_name_in, db_name_out, metacyc_id_is_altered=False):
+        alias_records = await self.fetch_alias_records_many('reaction', reaction_list, db_name_in, metacyc_id_is_altered)
+        records_dicts = {}
+        for reaction_id, rxn_alias_records in alias_records.items():
+            if rxn_alias_records is None:
+                print(f"record for {reaction_id} not found")
+                continue
+            records_dicts[reaction_id] = self._enliter.handle_multiple_occurrences_reactions(rxn_alias_records)
+        return await self.select_aliases(records_dicts, 'reaction', db_name_out)
+
+    async def fetch_modelseed_cpd_info(self, compound_id):
+        return await self.run_coalesced('fetch_modelseed_cpd_info', compound_id)
+
+    async def fetch_modelseed_rxn_info(self, reaction_id):
+        return await self.run_coalesced('fetch_modelseed_rxn_info', reaction_id)
+
+    async def fetch_metacyc_cpd_info(self, altered_cpd_id):
+        return await self.run_coalesced('fetch_metacyc_cpd_info', altered_cpd_id)
+
+    async def fetch_metacyc_rxn_info(self, altered_rxn_id):
+        return await self.run_coalesced('fetch_metacyc_rxn_info', altered_rxn_id)
+
+    async def fetch_bigg_cpd_info(self, bigg_cpd_id):
+        return await self.run_coalesced('fetch_bigg_cpd_info', bigg_cpd_id)
+
+    async def fetch_bigg_rxn_info(self, bigg_rxn_id):
+        return await self.run_coalesced('fetch_bigg_rxn_info', bigg_rxn_id)
+
+    async def fetch_kegg_cpd_info(self, kegg_cpd_id):
+        return await self.run_coalesced('fetch_kegg_cpd_info', kegg_cpd_id)
+
+    async def fetch_kegg_rxn_info(self, kegg_rxn_id):
+        return await self.run_coalesced('fetch_kegg_rxn_info', kegg_rxn_id)
@@ -0,0 +1,197 @@
+import time
+import threading
+from collections import OrderedDict
+
+from enlite.classes.CustomExceptions import RecordNotFoundError
+
+
+class LookupCache:
+    """
+    Bounded least-recently-used cache with hit, miss and eviction counters.
+    """
+    def __init__(self, maxsize=100000):
+        if maxsize < 1:
+            raise ValueError('the cache needs room for at least one entry', maxsize)
+        self._maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def maxsize(self):
+        return self._maxsize
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """
+        :return: whether the key was found, and the cached value
+        :rtype: tuple
+        """
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        return {
+            'size': len(self._entries),
+            'maxsize': self._maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions
+        }
+
+
+class CachedDatabaseHandler:
+    """
+    Wraps a DatabaseHandler and caches the results of its single-ID lookups,
+    including the RecordNotFoundError of IDs that do not exist.
+    The batched alias lookups share these entries and only query the IDs which are not cached.
+    The cache is cleared when the database file changes, which is checked
+    at most once every stamp_check_interval seconds.
+    All other attributes are taken from the wrapped handler, so it can be used in its place.
+    """
+    cached_methods = frozenset({
+        'fetch_compound_alias',
+        'fetch_reaction_alias',
+        'fetch_linked_modelseed_cpd_id',
+        'fetch_linked_modelseed_rxn_id',
+        'fetch_modelseed_cpd_info',
+        'fetch_modelseed_rxn_info',
+        'fetch_metacyc_cpd_info',
+        'fetch_metacyc_rxn_info',
+        'fetch_bigg_cpd_info',
+        'fetch_bigg_rxn_info',
+        'fetch_kegg_cpd_info',
+        'fetch_kegg_rxn_info'
+    })
+
+    def __init__(self, db_handler, maxsize=100000, stamp_check_interval=1.0):
+        self._db_handler = db_handler
+        self._cache = LookupCache(maxsize)
+        self._stamp_check_interval = stamp_check_interval
+        self._database_stamp = db_handler.get_database_stamp()
+        self._last_stamp_check = time.monotonic()
+        self.invalidations = 0
+
+    @property
+    def db_handler(self):
+        return self._db_handler
+
+    @property
+    def cache(self):
+        return self._cache
+
+    def __getattr__(self, name):
+        # only called for attributes which are not defined on the wrapper itself
+        if name in self.cached_methods:
+            return lambda *args, **kwargs: self.cached_call(name, *args, **kwargs)
+        return getattr(self._db_handler, name)
+
+    def check_database_stamp(self):
+        """clear the cache if the database file changed since the last check"""
+        now = time.monotonic()
+        if now - self._last_stamp_check < self._stamp_check_interval:
+            return
+        self._last_stamp_check = now
+        database_stamp = self._db_handler.get_database_stamp()
+        if database_stamp != self._database_stamp:
+            self._database_stamp = database_stamp
+            # a replaced file must be reopened before the cache is filled again
+            self._db_handler.reopen_if_replaced(check_now=True)
+            self._cache.clear()
+            self.invalidations += 1
+
+    def cached_call(self, method_name, *args, **kwargs):
+        """
+        Run one of the cached lookup methods of the wrapped handler,
+        or return its cached result
+        :raises RecordNotFoundError: when the wrapped method raised it for these arguments
+        """
+        self.check_database_stamp()
+        cache_key = (method_name, args, tuple(sorted(kwargs.items())))
+        found, cached_result = self._cache.get(cache_key)
+        if not found:
+            try:
+                cached_result = (True, getattr(self._db_handler, method_name)(*args, **kwargs))
+            except RecordNotFoundError as no_record_error:
+                cached_result = (False, no_record_error.message)
+            self._cache.put(cache_key, cached_result)
+        record_found, result = cached_result
+        if not record_found:
+            raise RecordNotFoundError(message=result)
+        # hand out copies, so callers cannot change the cached records
+        if isinstance(result, (dict, list)):
+            return result.copy()
+        return result
+
+    def fetch_compound_alias_many(self, database_ids, db_name_in, metacyc_id_is_altered=False):
+        return self.cached_alias_many('compound', database_ids, db_name_in, metacyc_id_is_altered)
+
+    def fetch_reaction_alias_many(self, database_ids, db_name_in, metacyc_id_is_altered=False):
+        return self.cached_alias_many('reaction', database_ids, db_name_in, metacyc_id_is_altered)
+
+    def cached_alias_many(self, db_type, database_ids, db_name_in, metacyc_id_is_altered=False):
+        """
+        fetch_compound_alias_many/fetch_reaction_alias_many of the wrapped handler for the IDs which are not cached.
+        Every ID is cached under the key of the single-ID fetch_compound_alias/fetch_reaction_alias call,
+        IDs without a record as the RecordNotFoundError that call would raise.
+        :param db_type: compound or reaction
+        :type db_type: str
+        :return: the alias records of each input ID, None for IDs which could not be linked to a ModelSEED ID
+        :rtype: dict
+        """
+        self.check_database_stamp()
+        method_name = f"fetch_{db_type}_alias"
+        unique_ids = list(dict.fromkeys(database_ids))
+        cached_results = {}
+        missing_ids = []
+        for database_id in unique_ids:
+            found, cached_result = self._cache.get((method_name, (database_id, db_name_in, metacyc_id_is_altered), ()))
+            if found:
+                cached_results[database_id] = cached_result
+            else:
+                missing_ids.append(database_id)
+        if missing_ids:
+            fetched_records = getattr(self._db_handler, f"{method_name}_many")(missing_ids, db_name_in, metacyc_id_is_altered)
+            for database_id in missing_ids:
+                alias_records = fetched_records[database_id]
+                if alias_records is None:
+                    cached_result = (False, f"record for {database_id} not found")
+                else:
+                    cached_result = (True, alias_records)
+                self._cache.put((method_name, (database_id, db_name_in, metacyc_id_is_altered), ()), cached_result)
+                cached_results[database_id] = cached_result
+        # copies again, like cached_call
+        return {database_id: cached_results[database_id][1].copy() if cached_results[database_id][0] else None
+                for database_id in unique_ids}
+
+    def cache_stats(self):
+        """
+        :return: hit, miss and eviction counters, current size and number of invalidations
+        :rtype: dict
+        """
+        cache_stats = self._cache.stats()
+        cache_stats['invalidations'] = self.invalidations
+        return cache_stats
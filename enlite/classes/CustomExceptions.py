@@ -8,4 +8,16 @@ class MissingCarbonError(ValueError):
     """Exception raised when a chemical formula contains no carbon atoms
     """
     def __init__(self, message="Formula contains no carbon atoms."):
-        self.message = message
\ No newline at end of file
+        self.message = message
+
+class PoolTimeoutError(Exception):
+    """Exception raised when no pooled database connection became free in time
+    """
+    def __init__(self, message="No database connection became available in time."):
+        self.message = message
+
+class LookupServiceError(Exception):
+    """Exception raised when the lookup daemon rejects a request or cannot be reached
+    """
+    def __init__(self, message):
+        self.message = message
@@ -1,27 +1,61 @@
 import os
 import re
+import sys
+import json
 import sqlite3
-import pickle
-from datetime import datetime
-
-from yaml import load
-try:
-    from yaml import CLoader as Loader, CDumper as Dumper
-except ImportError:
-    from yaml import Loader, Dumper
+import time
 
 from . CustomExceptions import RecordNotFoundError
 
 
 class DatabaseHandler:
-    def __init__(self, db_path):
+    # databases with their own alias link tables, the aliases of every other namespace
+    # of the ModelSEED records (e.g. rhea, chebi, aracyc) are looked up in the xref tables
+    linked_db_names = ('metacyc', 'bigg', 'kegg')
+
+    # connection settings used in read-only mode, unless they are passed explicitly
+    read_only_pragmas = {
+        'mmap_size': 268435456,
+        'cache_size': -65536,
+        'temp_store': 'MEMORY'
+    }
+
+    def __init__(self, db_path, read_only=False, in_memory=False, mmap_size=None, cache_size=None, temp_store=None,
+                 reopen_check_interval=1.0):
+        """
+        :param db_path: path to the SQLite database file
+        :type db_path: str
+        :param read_only: open the file as an immutable, read-only database, for processes which only do lookups.
+            The file must not be changed while it is open in this mode.
+        :type read_only: bool
+        :param in_memory: copy the whole database into memory when connecting
+        :type in_memory: bool
+        :param mmap_size: bytes of the database file to memory-map (PRAGMA mmap_size)
+        :type mmap_size: int
+        :param cache_size: page cache size, in pages or in KiB if negative (PRAGMA cache_size)
+        :type cache_size: int
+        :param temp_store: DEFAULT, FILE or MEMORY (PRAGMA temp_store)
+        :type temp_store: str
+        :param reopen_check_interval: seconds between the checks whether the database file was replaced
+            by a new build, None to never reopen the database
+        :type reopen_check_interval: float
+        """
+        self.read_only = read_only
+        self.in_memory = in_memory
+        self.connection_pragmas = dict(self.read_only_pragmas) if read_only else {}
+        for pragma_name, pragma_value in (('mmap_size', mmap_size), ('cache_size', cache_size), ('temp_store', temp_store)):
+            if pragma_value is not None:
+                self.connection_pragmas[pragma_name] = pragma_value
+        self.reopen_check_interval = reopen_check_interval
+        self.database_generation = None
+        self._last_generation_check = time.monotonic()
+        self.reopens = 0
+
         if os.path.isfile(db_path):
             self.db_path = db_path
+            self.database_generation = self.get_database_generation()
             try:
-                self.conn = sqlite3.connect(self.db_path)
-                # enable named access for data returned
-                self.conn.row_factory = sqlite3.Row
-                self.c = self.conn.cursor()
+                self.connect_db()
             except sqlite3.DatabaseError:
                 print("There was an error connecting to the database.")
         else:
@@ -34,13 +68,102 @@ class DatabaseHandler:
             'k': 'kegg'
         }
 
+    def open_connection(self, check_same_thread=True):
+        """
+        Open a new connection to the database with the settings of this handler
+        :param check_same_thread: if False, the connection may be handed between threads
+        :type check_same_thread: bool
+        :return: the connection, returning rows as sqlite3.Row objects
+        :rtype: sqlite3.Connection
+        """
+        if self.read_only:
+            # SQLite only needs %, ? and # escaped in the path of a URI filename
+            db_file = os.path.realpath(self.db_path).replace("%", "%25").replace("?", "%3f").replace("#", "%23")
+            db_uri = "file:" + db_file + "?mode=ro&immutable=1"
+            conn = sqlite3.connect(db_uri, uri=True, check_same_thread=check_same_thread)
+        else:
+            conn = sqlite3.connect(self.db_path, check_same_thread=check_same_thread)
+        if self.in_memory:
+            file_conn = conn
+            conn = sqlite3.connect(":memory:", check_same_thread=check_same_thread)
+            file_conn.backup(conn)
+            file_conn.close()
+        for pragma_name, pragma_value in self.connection_pragmas.items():
+            conn.execute(f"PRAGMA {pragma_name} = {pragma_value}")
+        if self.read_only:
+            conn.execute("PRAGMA query_only = 1")
+        # enable named access for data returned
+        conn.row_factory = sqlite3.Row
+        return conn
+
     def connect_db(self):
-        self.conn = sqlite3.connect(self.db_path)
+        self.conn = self.open_connection()
         self.c = self.conn.cursor()
 
     def close_connection(self):
         self.conn.close()
 
+    def get_database_stamp(self):
+        """
+        Identify the current state of the database file, the stamp changes whenever
+        the file is rewritten or replaced
+        :return: inode, size and modification time of the database file
+        :rtype: tuple
+        """
+        db_stat = os.stat(self.db_path)
+        return db_stat.st_ino, db_stat.st_size, db_stat.st_mtime_ns
+
+    def get_database_generation(self):
+        """
+        Identify the database file behind the path. A new build is renamed into place,
+        so the generation changes with every build but not with changes made in place.
+        :return: device and inode of the database file
+        :rtype: tuple
+        """
+        db_stat = os.stat(self.db_path)
+        return db_stat.st_dev, db_stat.st_ino
+
+    def database_replaced(self, check_now=False):
+        """
+        Check whether the database file was replaced since the last check,
+        at most once every reopen_check_interval seconds
+        :param check_now: check regardless of the interval
+        :type check_now: bool
+        :return: True if the file was replaced
+        :rtype: bool
+        """
+        if self.reopen_check_interval is None or self.database_generation is None:
+            return False
+        now = time.monotonic()
+        if not check_now and now - self._last_generation_check < self.reopen_check_interval:
+            return False
+        self._last_generation_check = now
+        try:
+            database_generation = self.get_database_generation()
+        except FileNotFoundError:
+            # keep using the old file until a new one is in place
+            return False
+        if database_generation == self.database_generation:
+            return False
+        self.database_generation = database_generation
+        self.reopens += 1
+        return True
+
+    def reopen_if_replaced(self, check_now=False):
+        """
+        Connect to the new database file if it was replaced by a new build.
+        Has to be called between lookups, a lookup which is running keeps using the old file.
+        :param check_now: check regardless of the interval
+        :type check_now: bool
+        :return: True if the connection was reopened
+        :rtype: bool
+        """
+        if not self.database_replaced(check_now):
+            return False
+        self.close_connection()
+        self.connect_db()
+        return True
+
     def dictionary_factory(self, row_object):
         """
         Out of a sqlite3.Row object, build a dictionary
@@ -80,6 +203,57 @@ class DatabaseHandler:
             self.conn.commit()
         return query_result
 
+    def query_db_many(self, stmt, id_list, query_args=()):
+        """
+        Run a statement for a whole list of IDs at once.
+        The IDs are bound as a single JSON array and unpacked by json_each into
+        the input_ids table (position, input_id), which the statement joins on.
+        :param stmt: a statement selecting from input_ids
+        :type stmt: str
+        :param id_list: the input IDs
+        :type id_list: list of str
+        :param query_args: values bound to the other placeholders of the statement
+        :type query_args: tuple
+        :return: the query result
+        :rtype: list of sqlite3.Row objects
+        """
+        input_ids_cte = "WITH input_ids AS (SELECT key AS position, value AS input_id FROM json_each(?))"
+        self.c.execute(" ".join((input_ids_cte, stmt)), (json.dumps(list(id_list)), *query_args))
+        return self.c.fetchall()
+
+    def build_records_by_input(self, record_rows, id_list):
+        """
+        Map the rows returned by query_db_many back to the input IDs.
+        Only the first row of each input ID is kept, like fetchone does for a single ID.
+        :param record_rows: rows holding an input_id column
+        :type record_rows: list of sqlite3.Row objects
+        :param id_list: the input IDs
+        :type id_list: list of str
+        :return: a dictionary of the record of each input ID, None if there was no record
+        :rtype: dict
+        """
+        records = dict.fromkeys(id_list)
+        for record_row in record_rows:
+            input_id = record_row['input_id']
+            if records[input_id] is None:
+                record_dict = self.dictionary_factory(record_row)
+                del record_dict['input_id']
+                records[input_id] = record_dict
+        return records
+
+    def explain_query_plan(self, stmt, query_args=()):
+        """
+        Run EXPLAIN QUERY PLAN for a statement
+        :param stmt: any SELECT statement used by the fetch methods
+        :type stmt: str
+        :param query_args: the values bound to the placeholders of the statement
+        :type query_args: tuple
+        :return: the detail column of each step of the query plan
+        :rtype: list of str
+        """
+        self.c.execute(f"EXPLAIN QUERY PLAN {stmt}", query_args)
+        return [plan_row['detail'] for plan_row in self.c.fetchall()]
+
     def fetch_modelseed_cpd_inchikey(self, compound_id):
         """fetch and return an InCHI Key from the modelseed db
         :param compound_id: a ModelSEED compound ID
@@ -148,7 +322,7 @@ class DatabaseHandler:
     def fetch_linked_modelseed_cpd_id(self, db_name_in, compound_id):
         """
 
-        :param db_name_in: one of metacyc, bigg, kegg
+        :param db_name_in: metacyc, bigg, kegg or any other namespace of the ModelSEED aliases, e.g. rhea
         :type db_name_in: str
         :param compound_id:
         :type compound_id:
@@ -156,9 +330,14 @@ class DatabaseHandler:
         :rtype:
         :raises RecordNotFoundError: when None is returned from the query
         """
-        link_table = self.build_alias_table_name(db_name_in, 'compound')
-        stmt = f"SELECT cpd_id FROM {link_table} WHERE linked_id_{db_name_in} == ?"
-        query_result = self.query_db_fetchone(stmt, compound_id)
+        if db_name_in in self.linked_db_names:
+            link_table = self.build_alias_table_name(db_name_in, 'compound')
+            stmt = f"SELECT cpd_id FROM {link_table} WHERE linked_id_{db_name_in} == ?"
+            query_result = self.query_db_fetchone(stmt, compound_id)
+        else:
+            stmt = "SELECT cpd_id FROM modelseed_compound_xrefs WHERE namespace = ? AND alias = ? ORDER BY rowid LIMIT 1"
+            self.c.execute(stmt, (db_name_in.lower(), compound_id))
+            query_result = self.c.fetchone()
         if query_result is None:
             raise RecordNotFoundError(message=f"record for {compound_id} not found")
         modelseed_cpd_id = query_result['cpd_id']
@@ -167,7 +346,7 @@ class DatabaseHandler:
     def fetch_linked_modelseed_rxn_id(self, db_name_in, reaction_id):
         """
 
-        :param db_name_in: one of metacyc, bigg, kegg
+        :param db_name_in: metacyc, bigg, kegg or any other namespace of the ModelSEED aliases, e.g. rhea
         :type db_name_in: str
         :param reaction_id:
         :type reaction_id:
@@ -175,9 +354,14 @@ class DatabaseHandler:
         :rtype:
         :raises RecordNotFoundError: when None is returned from the query
         """
-        link_table = self.build_alias_table_name(db_name_in, 'reaction')
-        stmt = f"SELECT rxn_id FROM {link_table} WHERE linked_id_{db_name_in} == ?"
-        query_result = self.query_db_fetchone(stmt, reaction_id)
+        if db_name_in in self.linked_db_names:
+            link_table = self.build_alias_table_name(db_name_in, 'reaction')
+            stmt = f"SELECT rxn_id FROM {link_table} WHERE linked_id_{db_name_in} == ?"
+            query_result = self.query_db_fetchone(stmt, reaction_id)
+        else:
+            stmt = "SELECT rxn_id FROM modelseed_reaction_xrefs WHERE namespace = ? AND alias = ? ORDER BY rowid LIMIT 1"
+            self.c.execute(stmt, (db_name_in.lower(), reaction_id))
+            query_result = self.c.fetchone()
         if query_result is None:
             raise RecordNotFoundError(message=f"record for {reaction_id} not found")
         modelseed_rxn_id = query_result['rxn_id']
@@ -333,21 +517,26 @@ class DatabaseHandler:
     def fetch_all_compound_aliases(self, modelseed_compound_id):
         """
         Based on a ModelSEED compound ID, get all aliases from the other databases.
-        Results most likely include duplicates, so this function serves as a base for getting the data
+        The aliases are read from the xref table, which holds one row per alias,
+        so each row has exactly one of the linked_id columns set (all of them are None if there are no aliases).
         :param modelseed_compound_id: a modelseed copound id
         :type modelseed_compound_id: str
         :return: a list of database fields: modelseed id, metacyc unique id, bigg id, kegg id, name
         :rtype: list of sqlite3.Row objects
         :raises RecordNotFoundError: when None is returned from the query
         """
-        compound_left_join_stmt = """
-        SELECT modelseed_compounds.cpd_id, metacyc_compound_aliases.linked_id_metacyc, bigg_compound_aliases.linked_id_bigg, kegg_compound_aliases.linked_id_kegg, modelseed_compounds.name FROM modelseed_compounds 
-        	LEFT JOIN metacyc_compound_aliases ON modelseed_compounds.cpd_id = metacyc_compound_aliases.cpd_id
-        	LEFT JOIN bigg_compound_aliases ON modelseed_compounds.cpd_id = bigg_compound_aliases.cpd_id
-        	LEFT JOIN kegg_compound_aliases ON modelseed_compounds.cpd_id = kegg_compound_aliases.cpd_id
-        	WHERE modelseed_compounds.cpd_id == ? AND modelseed_compounds.is_obsolete != "1";
+        compound_xref_stmt = """
+        SELECT modelseed_compounds.cpd_id,
+            CASE modelseed_compound_xrefs.namespace WHEN 'metacyc' THEN modelseed_compound_xrefs.alias END AS linked_id_metacyc,
+            CASE modelseed_compound_xrefs.namespace WHEN 'bigg' THEN modelseed_compound_xrefs.alias END AS linked_id_bigg,
+            CASE modelseed_compound_xrefs.namespace WHEN 'kegg' THEN modelseed_compound_xrefs.alias END AS linked_id_kegg,
+            modelseed_compounds.name FROM modelseed_compounds
+            LEFT JOIN modelseed_compound_xrefs ON modelseed_compound_xrefs.cpd_id = modelseed_compounds.cpd_id
+                AND modelseed_compound_xrefs.namespace IN ('metacyc', 'bigg', 'kegg')
+            WHERE modelseed_compounds.cpd_id == ? AND modelseed_compounds.is_obsolete != "1"
+            ORDER BY modelseed_compound_xrefs.rowid;
         """
-        self.c.execute(compound_left_join_stmt, (modelseed_compound_id,))
+        self.c.execute(compound_xref_stmt, (modelseed_compound_id,))
         data = self.c.fetchall()
         if not data:
             raise RecordNotFoundError(message="no aliases found")
@@ -356,21 +545,26 @@ class DatabaseHandler:
     def fetch_all_reaction_aliases(self, modelseed_reaction_id):
         """
         Based on a ModelSEED reaction ID, get all aliases from the other databases.
-        Results most likely include duplicates, so this function serves as a base for getting the data
+        The aliases are read from the xref table, which holds one row per alias,
+        so each row has exactly one of the linked_id columns set (all of them are None if there are no aliases).
         :param modelseed_reaction_id: a modelseed reaction id
         :type modelseed_reaction_id: str
         :return: a list of database fields: modelseed id, metacyc unique id, bigg id, kegg id, name
         :rtype: list of sqlite3.Row objects
         :raises RecordNotFoundError: when None is returned from the query
         """
-        reaction_left_join_stmt = """
-        SELECT modelseed_reactions.rxn_id, metacyc_reaction_aliases.linked_id_metacyc, bigg_reaction_aliases.linked_id_bigg, kegg_reaction_aliases.linked_id_kegg, modelseed_reactions.name FROM modelseed_reactions 
-        	LEFT JOIN metacyc_reaction_aliases ON modelseed_reactions.rxn_id = metacyc_reaction_aliases.rxn_id
-        	LEFT JOIN bigg_reaction_aliases ON modelseed_reactions.rxn_id = bigg_reaction_aliases.rxn_id
-        	LEFT JOIN kegg_reaction_aliases ON modelseed_reactions.rxn_id = kegg_reaction_aliases.rxn_id
-        	WHERE modelseed_reactions.rxn_id == ? AND modelseed_reactions.is_obsolete != "1";
+        reaction_xref_stmt = """
+        SELECT modelseed_reactions.rxn_id,
+            CASE modelseed_reaction_xrefs.namespace WHEN 'metacyc' THEN modelseed_reaction_xrefs.alias END AS linked_id_metacyc,
+            CASE modelseed_reaction_xrefs.namespace WHEN 'bigg' THEN modelseed_reaction_xrefs.alias END AS linked_id_bigg,
+            CASE modelseed_reaction_xrefs.namespace WHEN 'kegg' THEN modelseed_reaction_xrefs.alias END AS linked_id_kegg,
+            modelseed_reactions.name FROM modelseed_reactions
+            LEFT JOIN modelseed_reaction_xrefs ON modelseed_reaction_xrefs.rxn_id = modelseed_reactions.rxn_id
+                AND modelseed_reaction_xrefs.namespace IN ('metacyc', 'bigg', 'kegg')
+            WHERE modelseed_reactions.rxn_id == ? AND modelseed_reactions.is_obsolete != "1"
+            ORDER BY modelseed_reaction_xrefs.rowid;
         """
-        self.c.execute(reaction_left_join_stmt, (modelseed_reaction_id,))
+        self.c.execute(reaction_xref_stmt, (modelseed_reaction_id,))
         data = self.c.fetchall()
         if not data:
             raise RecordNotFoundError(message="no aliases found")
@@ -468,6 +662,423 @@ class DatabaseHandler:
         reaction_info_dict['linked_id_kegg'] = kegg_rxn_id
         return reaction_info_dict
 
+    def fetch_modelseed_cpd_info_many(self, compound_ids):
+        """
+        fetch compound info for a list of ModelSEED compound IDs with one query
+        :param compound_ids: ModelSEED compound IDs
+        :type compound_ids: list of str
+        :return: the compound info of each input ID, None for IDs which were not found
+        :rtype: dict
+        """
+        select_many_stmt = """
+        SELECT input_ids.input_id, cpd_id, abbreviation, name, formula, inchikey, mass, charge FROM input_ids
+            JOIN modelseed_compounds ON modelseed_compounds.cpd_id = input_ids.input_id
+            ORDER BY input_ids.position, modelseed_compounds.id;
+        """
+        record_rows = self.query_db_many(select_many_stmt, compound_ids)
+        return self.build_records_by_input(record_rows, compound_ids)
+
+    def fetch_modelseed_rxn_info_many(self, reaction_ids):
+        """
+        fetch reaction info for a list of ModelSEED reaction IDs with one query
+        :param reaction_ids: ModelSEED reaction IDs
+        :type reaction_ids: list of str
+        :return: the reaction info of each input ID, None for IDs which were not found
+        :rtype: dict
+        """
+        select_many_stmt = """
+        SELECT input_ids.input_id, rxn_id, name, stoichiometry, equation, deltag FROM input_ids
+            JOIN modelseed_reactions ON modelseed_reactions.rxn_id = input_ids.input_id
+            ORDER BY input_ids.position, modelseed_reactions.id;
+        """
+        record_rows = self.query_db_many(select_many_stmt, reaction_ids)
+        return self.build_records_by_input(record_rows, reaction_ids)
+
+    def fetch_metacyc_cpd_info_many(self, compound_ids, metacyc_id_is_altered=True):
+        """
+        fetch compound info for a list of metacyc IDs with one query
+        :param compound_ids: metacyc compound IDs
+        :type compound_ids: list of str
+        :param metacyc_id_is_altered: whether the IDs are altered or normal metacyc IDs
+        :type metacyc_id_is_altered: bool
+        :return: the compound info of each input ID, None for IDs which were not found
+        :rtype: dict
+        """
+        id_column = "altered_id" if metacyc_id_is_altered else "linked_id_metacyc"
+        select_many_stmt = f"""
+        SELECT input_ids.input_id, modelseed_compounds.cpd_id, abbreviation, name, formula, inchikey, charge, mass,
+            metacyc_compound_ids.altered_id, metacyc_compound_ids.linked_id_metacyc FROM input_ids
+            JOIN metacyc_compound_ids ON metacyc_compound_ids.{id_column} = input_ids.input_id
+            JOIN metacyc_compound_aliases ON metacyc_compound_aliases.linked_id_metacyc = metacyc_compound_ids.linked_id_metacyc
+            JOIN modelseed_compounds ON modelseed_compounds.cpd_id = metacyc_compound_aliases.cpd_id
+            WHERE modelseed_compounds.is_obsolete != "1"
+            ORDER BY input_ids.position, metacyc_compound_ids.id, modelseed_compounds.cpd_id;
+        """
+        record_rows = self.query_db_many(select_many_stmt, compound_ids)
+        return self.build_records_by_input(record_rows, compound_ids)
+
+    def fetch_metacyc_rxn_info_many(self, reaction_ids, metacyc_id_is_altered=True):
+        """
+        fetch reaction info for a list of metacyc IDs with one query
+        :param reaction_ids: metacyc reaction IDs
+        :type reaction_ids: list of str
+        :param metacyc_id_is_altered: whether the IDs are altered or normal metacyc IDs
+        :type metacyc_id_is_altered: bool
+        :return: the reaction info of each input ID, None for IDs which were not found
+        :rtype: dict
+        """
+        id_column = "altered_id" if metacyc_id_is_altered else "linked_id_metacyc"
+        select_many_stmt = f"""
+        SELECT input_ids.input_id, modelseed_reactions.rxn_id, name, deltag, stoichiometry,
+            metacyc_reaction_ids.altered_id, metacyc_reaction_ids.linked_id_metacyc FROM input_ids
+            JOIN metacyc_reaction_ids ON metacyc_reaction_ids.{id_column} = input_ids.input_id
+            JOIN metacyc_reaction_aliases ON metacyc_reaction_aliases.linked_id_metacyc = metacyc_reaction_ids.linked_id_metacyc
+            JOIN modelseed_reactions ON modelseed_reactions.rxn_id = metacyc_reaction_aliases.rxn_id
+            WHERE modelseed_reactions.is_obsolete != "1"
+            ORDER BY input_ids.position, metacyc_reaction_ids.id, modelseed_reactions.rxn_id;
+        """
+        record_rows = self.query_db_many(select_many_stmt, reaction_ids)
+        return self.build_records_by_input(record_rows, reaction_ids)
+
+    def fetch_cpd_info_by_alias_many(self, db_name_in, compound_ids):
+        """
+        fetch compound info for a list of bigg or kegg compound IDs with one query
+        :param db_name_in: one of bigg, kegg
+        :type db_name_in: str
+        :param compound_ids: compound IDs of the input database
+        :type compound_ids: list of str
+        :return: the compound info of each input ID, None for IDs which were not found
+        :rtype: dict
+        """
+        link_table = self.build_alias_table_name(db_name_in, 'compound')
+        select_many_stmt = f"""
+        SELECT input_ids.input_id, modelseed_compounds.cpd_id, abbreviation, name, formula, inchikey, charge, mass,
+            {link_table}.linked_id_{db_name_in} FROM input_ids
+            JOIN {link_table} ON {link_table}.linked_id_{db_name_in} = input_ids.input_id
+            JOIN modelseed_compounds ON modelseed_compounds.cpd_id = {link_table}.cpd_id
+            WHERE modelseed_compounds.is_obsolete != "1"
+            ORDER BY input_ids.position, modelseed_compounds.cpd_id;
+        """
+        record_rows = self.query_db_many(select_many_stmt, compound_ids)
+        return self.build_records_by_input(record_rows, compound_ids)
+
+    def fetch_rxn_info_by_alias_many(self, db_name_in, reaction_ids):
+        """
+        fetch reaction info for a list of bigg or kegg reaction IDs with one query
+        :param db_name_in: one of bigg, kegg
+        :type db_name_in: str
+        :param reaction_ids: reaction IDs of the input database
+        :type reaction_ids: list of str
+        :return: the reaction info of each input ID, None for IDs which were not found
+        :rtype: dict
+        """
+        link_table = self.build_alias_table_name(db_name_in, 'reaction')
+        select_many_stmt = f"""
+        SELECT input_ids.input_id, modelseed_reactions.rxn_id, name, deltag, stoichiometry,
+            {link_table}.linked_id_{db_name_in} FROM input_ids
+            JOIN {link_table} ON {link_table}.linked_id_{db_name_in} = input_ids.input_id
+            JOIN modelseed_reactions ON modelseed_reactions.rxn_id = {link_table}.rxn_id
+            WHERE modelseed_reactions.is_obsolete != "1"
+            ORDER BY input_ids.position, modelseed_reactions.rxn_id;
+        """
+        record_rows = self.query_db_many(select_many_stmt, reaction_ids)
+        return self.build_records_by_input(record_rows, reaction_ids)
+
+    def fetch_bigg_cpd_info_many(self, bigg_cpd_ids):
+        return self.fetch_cpd_info_by_alias_many('bigg', bigg_cpd_ids)
+
+    def fetch_bigg_rxn_info_many(self, bigg_rxn_ids):
+        return self.fetch_rxn_info_by_alias_many('bigg', bigg_rxn_ids)
+
+    def fetch_kegg_cpd_info_many(self, kegg_cpd_ids):
+        return self.fetch_cpd_info_by_alias_many('kegg', kegg_cpd_ids)
+
+    def fetch_kegg_rxn_info_many(self, kegg_rxn_ids):
+        return self.fetch_rxn_info_by_alias_many('kegg', kegg_rxn_ids)
+
+    def fetch_linked_modelseed_cpd_id_many(self, db_name_in, compound_ids, metacyc_id_is_altered=False):
+        """
+        resolve a list of compound IDs of another database to ModelSEED compound IDs with one query
+        :param db_name_in: metacyc, bigg, kegg or any other namespace of the ModelSEED aliases, e.g. rhea
+        :type db_name_in: str
+        :param compound_ids: compound IDs of the input database
+        :type compound_ids: list of str
+        :param metacyc_id_is_altered: whether metacyc input IDs are altered IDs
+        :type metacyc_id_is_altered: bool
+        :return: the ModelSEED compound ID of each input ID, None for IDs which were not found
+        :rtype: dict
+        """
+        query_args = ()
+        if db_name_in not in self.linked_db_names:
+            select_many_stmt = """
+            SELECT input_ids.input_id, modelseed_compound_xrefs.cpd_id FROM input_ids
+                JOIN modelseed_compound_xrefs ON modelseed_compound_xrefs.namespace = ? AND modelseed_compound_xrefs.alias = input_ids.input_id
+                ORDER BY input_ids.position, modelseed_compound_xrefs.rowid;
+            """
+            query_args = (db_name_in.lower(),)
+        elif db_name_in == "metacyc" and metacyc_id_is_altered:
+            link_table = self.build_alias_table_name(db_name_in, 'compound')
+            select_many_stmt = f"""
+            SELECT input_ids.input_id, {link_table}.cpd_id FROM input_ids
+                JOIN metacyc_compound_ids ON metacyc_compound_ids.altered_id = input_ids.input_id
+                JOIN {link_table} ON {link_table}.linked_id_metacyc = metacyc_compound_ids.linked_id_metacyc
+                ORDER BY input_ids.position, metacyc_compound_ids.id, {link_table}.rowid;
+            """
+        else:
+            link_table = self.build_alias_table_name(db_name_in, 'compound')
+            select_many_stmt = f"""
+            SELECT input_ids.input_id, {link_table}.cpd_id FROM input_ids
+                JOIN {link_table} ON {link_table}.linked_id_{db_name_in} = input_ids.input_id
+                ORDER BY input_ids.position, {link_table}.rowid;
+            """
+        linked_ids = dict.fromkeys(compound_ids)
+        for query_row in self.query_db_many(select_many_stmt, compound_ids, query_args):
+            if linked_ids[query_row['input_id']] is None:
+                linked_ids[query_row['input_id']] = query_row['cpd_id']
+        return linked_ids
+
+    def fetch_linked_modelseed_rxn_id_many(self, db_name_in, reaction_ids, metacyc_id_is_altered=False):
+        """
+        resolve a list of reaction IDs of another database to ModelSEED reaction IDs with one query
+        :param db_name_in: metacyc, bigg, kegg or any other namespace of the ModelSEED aliases, e.g. rhea
+        :type db_name_in: str
+        :param reaction_ids: reaction IDs of the input database
+        :type reaction_ids: list of str
+        :param metacyc_id_is_altered: whether metacyc input IDs are altered IDs
+        :type metacyc_id_is_altered: bool
+        :return: the ModelSEED reaction ID of each input ID, None for IDs which were not found
+        :rtype: dict
+        """
+        query_args = ()
+        if db_name_in not in self.linked_db_names:
+            select_many_stmt = """
+            SELECT input_ids.input_id, modelseed_reaction_xrefs.rxn_id FROM input_ids
+                JOIN modelseed_reaction_xrefs ON modelseed_reaction_xrefs.namespace = ? AND modelseed_reaction_xrefs.alias = input_ids.input_id
+                ORDER BY input_ids.position, modelseed_reaction_xrefs.rowid;
+            """
+            query_args = (db_name_in.lower(),)
+        elif db_name_in == "metacyc" and metacyc_id_is_altered:
+            link_table = self.build_alias_table_name(db_name_in, 'reaction')
+            select_many_stmt = f"""
+            SELECT input_ids.input_id, {link_table}.rxn_id FROM input_ids
+                JOIN metacyc_reaction_ids ON metacyc_reaction_ids.altered_id = input_ids.input_id
+                JOIN {link_table} ON {link_table}.linked_id_metacyc = metacyc_reaction_ids.linked_id_metacyc
+                ORDER BY input_ids.position, metacyc_reaction_ids.id, {link_table}.rowid;
+            """
+        else:
+            link_table = self.build_alias_table_name(db_name_in, 'reaction')
+            select_many_stmt = f"""
+            SELECT input_ids.input_id, {link_table}.rxn_id FROM input_ids
+                JOIN {link_table} ON {link_table}.linked_id_{db_name_in} = input_ids.input_id
+                ORDER BY input_ids.position, {link_table}.rowid;
+            """
+        linked_ids = dict.fromkeys(reaction_ids)
+        for query_row in self.query_db_many(select_many_stmt, reaction_ids, query_args):
+            if linked_ids[query_row['input_id']] is None:
+                linked_ids[query_row['input_id']] = query_row['rxn_id']
+        return linked_ids
+
+    def fetch_all_compound_aliases_many(self, modelseed_compound_ids):
+        """
+        fetch_all_compound_aliases for a list of ModelSEED compound IDs with one query
+        :param modelseed_compound_ids: modelseed compound ids
+        :type modelseed_compound_ids: list of str
+        :return: the alias records of each ModelSEED ID, IDs without a record are left out
+        :rtype: dict of lists of sqlite3.Row objects
+        """
+        compound_xref_stmt = """
+        SELECT modelseed_compounds.cpd_id,
+            CASE modelseed_compound_xrefs.namespace WHEN 'metacyc' THEN modelseed_compound_xrefs.alias END AS linked_id_metacyc,
+            CASE modelseed_compound_xrefs.namespace WHEN 'bigg' THEN modelseed_compound_xrefs.alias END AS linked_id_bigg,
+            CASE modelseed_compound_xrefs.namespace WHEN 'kegg' THEN modelseed_compound_xrefs.alias END AS linked_id_kegg,
+            modelseed_compounds.name FROM input_ids
+            JOIN modelseed_compounds ON modelseed_compounds.cpd_id = input_ids.input_id
+            LEFT JOIN modelseed_compound_xrefs ON modelseed_compound_xrefs.cpd_id = modelseed_compounds.cpd_id
+                AND modelseed_compound_xrefs.namespace IN ('metacyc', 'bigg', 'kegg')
+            WHERE modelseed_compounds.is_obsolete != "1"
+            ORDER BY input_ids.position, modelseed_compound_xrefs.rowid;
+        """
+        all_aliases = {}
+        for alias_row in self.query_db_many(compound_xref_stmt, dict.fromkeys(modelseed_compound_ids)):
+            all_aliases.setdefault(alias_row['cpd_id'], []).append(alias_row)
+        return all_aliases
+
+    def fetch_all_reaction_aliases_many(self, modelseed_reaction_ids):
+        """
+        fetch_all_reaction_aliases for a list of ModelSEED reaction IDs with one query
+        :param modelseed_reaction_ids: modelseed reaction ids
+        :type modelseed_reaction_ids: list of str
+        :return: the alias records of each ModelSEED ID, IDs without a record are left out
+        :rtype: dict of lists of sqlite3.Row objects
+        """
+        reaction_xref_stmt = """
+        SELECT modelseed_reactions.rxn_id,
+            CASE modelseed_reaction_xrefs.namespace WHEN 'metacyc' THEN modelseed_reaction_xrefs.alias END AS linked_id_metacyc,
+            CASE modelseed_reaction_xrefs.namespace WHEN 'bigg' THEN modelseed_reaction_xrefs.alias END AS linked_id_bigg,
+            CASE modelseed_reaction_xrefs.namespace WHEN 'kegg' THEN modelseed_reaction_xrefs.alias END AS linked_id_kegg,
+            modelseed_reactions.name FROM input_ids
+            JOIN modelseed_reactions ON modelseed_reactions.rxn_id = input_ids.input_id
+            LEFT JOIN modelseed_reaction_xrefs ON modelseed_reaction_xrefs.rxn_id = modelseed_reactions.rxn_id
+                AND modelseed_reaction_xrefs.namespace IN ('metacyc', 'bigg', 'kegg')
+            WHERE modelseed_reactions.is_obsolete != "1"
+            ORDER BY input_ids.position, modelseed_reaction_xrefs.rowid;
+        """
+        all_aliases = {}
+        for alias_row in self.query_db_many(reaction_xref_stmt, dict.fromkeys(modelseed_reaction_ids)):
+            all_aliases.setdefault(alias_row['rxn_id'], []).append(alias_row)
+        return all_aliases
+
+    def fetch_compound_alias_many(self, database_ids, db_name_in, metacyc_id_is_altered=False):
+        """
+        fetch_compound_alias for a list of IDs, using two queries in total
+        :param database_ids: compound IDs of the input database
+        :type database_ids: list of str
+        :param db_name_in: modelseed, metacyc, bigg, kegg or any other namespace of the ModelSEED aliases
+        :type db_name_in: str
+        :param metacyc_id_is_altered: whether metacyc input IDs are altered IDs
+        :type metacyc_id_is_altered: bool
+        :return: the alias records of each input ID as returned by fetch_compound_alias,
+            None for IDs which could not be linked to a ModelSEED ID
+        :rtype: dict
+        """
+        if db_name_in == "modelseed":
+            linked_modelseed_ids = {database_id: database_id for database_id in database_ids}
+        else:
+            linked_modelseed_ids = self.fetch_linked_modelseed_cpd_id_many(db_name_in, database_ids, metacyc_id_is_altered)
+        all_aliases = self.fetch_all_compound_aliases_many(
+            [modelseed_id for modelseed_id in linked_modelseed_ids.values() if modelseed_id is not None])
+        alias_records = {}
+        for database_id, modelseed_id in linked_modelseed_ids.items():
+            if modelseed_id is None:
+                alias_records[database_id] = None
+            elif modelseed_id in all_aliases:
+                alias_records[database_id] = all_aliases[modelseed_id]
+            else:
+                alias_records[database_id] = [{'cpd_id': None, 'linked_id_metacyc': None, 'linked_id_bigg': None, 'linked_id_kegg': None}]
+        return alias_records
+
+    def fetch_reaction_alias_many(self, database_ids, db_name_in, metacyc_id_is_altered=False):
+        """
+        fetch_reaction_alias for a list of IDs, using two queries in total
+        :param database_ids: reaction IDs of the input database
+        :type database_ids: list of str
+        :param db_name_in: modelseed, metacyc, bigg, kegg or any other namespace of the ModelSEED aliases
+        :type db_name_in: str
+        :param metacyc_id_is_altered: whether metacyc input IDs are altered IDs
+        :type metacyc_id_is_altered: bool
+        :return: the alias records of each input ID as returned by fetch_reaction_alias,
+            None for IDs which could not be linked to a ModelSEED ID
+        :rtype: dict
+        """
+        if db_name_in == "modelseed":
+            linked_modelseed_ids = {database_id: database_id for database_id in database_ids}
+        else:
+            linked_modelseed_ids = self.fetch_linked_modelseed_rxn_id_many(db_name_in, database_ids, metacyc_id_is_altered)
+        all_aliases = self.fetch_all_reaction_aliases_many(
+            [modelseed_id for modelseed_id in linked_modelseed_ids.values() if modelseed_id is not None])
+        alias_records = {}
+        for database_id, modelseed_id in linked_modelseed_ids.items():
+            if modelseed_id is None:
+                alias_records[database_id] = None
+            elif modelseed_id in all_aliases:
+                alias_records[database_id] = all_aliases[modelseed_id]
+            else:
+                alias_records[database_id] = [{'rxn_id': None, 'linked_id_metacyc': None, 'linked_id_bigg': None, 'linked_id_kegg': None}]
+        return alias_records
+
+    def fetch_namespace_aliases_many(self, db_type, modelseed_ids, namespace):
+        """
+        Get the aliases of one namespace of the ModelSEED aliases for a list of ModelSEED IDs with one query,
+        for any namespace, e.g. rhea, chebi or aracyc
+        :param db_type: one of compound, reaction
+        :type db_type: str
+        :param modelseed_ids: ModelSEED compound or reaction IDs
+        :type modelseed_ids: list of str
+        :param namespace: the namespace as written in the aliases, case does not matter
+        :type namespace: str
+        :return: the aliases of each ModelSEED ID in the order of the record, IDs without an alias are left out
+        :rtype: dict of lists of str
+        """
+        if db_type not in {'reaction', 'compound'}:
+            raise ValueError('db type needs to be specific!', db_type)
+        modelseed_key = 'cpd_id' if db_type == 'compound' else 'rxn_id'
+        xref_table = f"modelseed_{db_type}_xrefs"
+        select_many_stmt = f"""
+        SELECT {xref_table}.{modelseed_key}, {xref_table}.alias FROM input_ids
+            JOIN {xref_table} ON {xref_table}.{modelseed_key} = input_ids.input_id AND {xref_table}.namespace = ?
+            ORDER BY input_ids.position, {xref_table}.rowid;
+        """
+        namespace_aliases = {}
+        for alias_row in self.query_db_many(select_many_stmt, dict.fromkeys(modelseed_ids), (namespace.lower(),)):
+            namespace_aliases.setdefault(alias_row[modelseed_key], []).append(alias_row['alias'])
+        return namespace_aliases
+
+    @staticmethod
+    def build_attribute_table_columns(db_type):
+        if db_type not in {'reaction', 'compound'}:
+            raise ValueError('db type needs to be specific!', db_type)
+        if db_type == 'compound':
+            return 'modelseed_compound_attributes', 'cpd_id', 'id_compound'
+        return 'modelseed_reaction_attributes', 'rxn_id', 'id_reaction'
+
+    def fetch_attributes(self, db_type, modelseed_id, attribute=None):
+        """
+        Get the values of the multi-value fields of a ModelSEED record (notes, ontology,
+        and for reactions pathways, compound_ids and stoichiometry) from its attribute table,
+        instead of splitting the |#| joined columns.
+        Dictionary fields are stored with one attribute per key, e.g. ontology.class
+        :param db_type: one of compound, reaction
+        :type db_type: str
+        :param modelseed_id: a ModelSEED compound or reaction ID
+        :type modelseed_id: str
+        :param attribute: only return the values of this attribute
+        :type attribute: str
+        :return: the values of each attribute in the order of the record, empty if the record has none
+        :rtype: dict of lists of str
+        """
+        attribute_table, id_column, key_column = self.build_attribute_table_columns(db_type)
+        stmt = f"SELECT attribute, value FROM {attribute_table} WHERE {id_column} = ?"
+        query_args = [modelseed_id]
+        if attribute is not None:
+            stmt += " AND attribute = ?"
+            query_args.append(attribute)
+        self.c.execute(f"{stmt} ORDER BY {key_column}, attribute, position", query_args)
+        attribute_values = {}
+        for attribute_row in self.c.fetchall():
+            attribute_values.setdefault(attribute_row['attribute'], []).append(attribute_row['value'])
+        return attribute_values
+
+    def fetch_by_attribute(self, db_type, attribute, value):
+        """
+        Find the ModelSEED records having a value in one of their multi-value fields with an index lookup,
+        e.g. all reactions of a pathway or all reactions using a compound
+        :param db_type: one of compound, reaction
+        :type db_type: str
+        :param attribute: the field, e.g. pathways, notes, compound_ids or ontology.class
+        :type attribute: str
+        :param value: a single value of the field
+        :type value: str
+        :return: the ModelSEED IDs in the order of the database
+        :rtype: list of str
+        """
+        attribute_table, id_column, key_column = self.build_attribute_table_columns(db_type)
+        stmt = f"SELECT {id_column} FROM {attribute_table} WHERE attribute = ? AND value = ? ORDER BY {key_column}"
+        self.c.execute(stmt, (attribute, value))
+        # a record can have the same value more than once, e.g. a compound on both sides of a reaction
+        return list(dict.fromkeys(record_row[id_column] for record_row in self.c.fetchall()))
+
+    def fetch_compound_attributes(self, modelseed_compound_id, attribute=None):
+        return self.fetch_attributes('compound', modelseed_compound_id, attribute)
+
+    def fetch_reaction_attributes(self, modelseed_reaction_id, attribute=None):
+        return self.fetch_attributes('reaction', modelseed_reaction_id, attribute)
+
+    def fetch_compounds_by_attribute(self, attribute, value):
+        return self.fetch_by_attribute('compound', attribute, value)
+
+    def fetch_reactions_by_attribute(self, attribute, value):
+        return self.fetch_by_attribute('reaction', attribute, value)
+
     @staticmethod
     def get_number_of_carbons(formula):
         carbon_pattern = "C[0-9]*"
@@ -487,6 +1098,9 @@ class DatabaseHandler:
 
 
 class DBLConfigLoader:
+    config_file_name = "dbl_config.yaml"
+    # the parsed config is kept as json next to the yaml file, loading it does not need PyYAML
+    cache_file_name = "dbl_config.cache.json"
 
     def __init__(self, config_root, project_root):
         if not os.path.isabs(config_root) or not os.path.isabs(project_root):
@@ -501,8 +1115,44 @@ class DBLConfigLoader:
         if not self._project_root.endswith("/"):
             self._project_root = self._project_root + "/"
 
-        with open("".join((self._config_root, "dbl_config.yaml")), 'r') as self._config_file:
-            self._configdata = load(self._config_file, Loader=Loader)
+        self._configdata = self.load_config()
+
+    def load_config(self):
+        """
+        Read the config from the json cache, or parse the yaml file if it changed since the cache was written.
+        A config directory which is not writable is parsed every time.
+        :return: the config data
+        :rtype: dict
+        """
+        config_path = "".join((self._config_root, self.config_file_name))
+        cache_path = "".join((self._config_root, self.cache_file_name))
+        config_stat = os.stat(config_path)
+        config_stamp = [config_stat.st_size, config_stat.st_mtime_ns]
+        try:
+            with open(cache_path, 'r') as cache_file:
+                config_cache = json.load(cache_file)
+            if config_cache['config_stamp'] == config_stamp:
+                return config_cache['config']
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+        from yaml import load
+        try:
+            from yaml import CLoader as Loader
+        except ImportError:
+            from yaml import Loader
+        with open(config_path, 'r') as config_file:
+            configdata = load(config_file, Loader=Loader)
+        # written under another name first, so readers never see half of the file
+        partial_cache_path = f"{cache_path}.{os.getpid()}"
+        try:
+            with open(partial_cache_path, 'w') as cache_file:
+                json.dump({'config_stamp': config_stamp, 'config': configdata}, cache_file)
+            os.replace(partial_cache_path, cache_path)
+        except (OSError, TypeError):
+            if os.path.exists(partial_cache_path):
+                os.remove(partial_cache_path)
+        return configdata
 
     @property
     def config_root(self):
@@ -565,6 +1215,29 @@ class Filehandler:
                 self.return_list.append(line)
         return self.return_list
 
+    def iter_chunks(self, file_path, chunk_size):
+        """reads an input file lazily and yields its entries in lists of up to chunk_size entries
+        input file should contain one entry per line, empty lines are skipped
+        :param file_path: path to file, "-" reads from stdin
+        :param chunk_size: maximum number of entries per list
+        """
+        file_object = sys.stdin if file_path == "-" else open(file_path, 'r')
+        try:
+            id_chunk = []
+            for line in file_object:
+                line = line.strip()
+                if not line:
+                    continue
+                id_chunk.append(line)
+                if len(id_chunk) == chunk_size:
+                    yield id_chunk
+                    id_chunk = []
+            if id_chunk:
+                yield id_chunk
+        finally:
+            if file_object is not sys.stdin:
+                file_object.close()
+
     def build_nested_list(self, file_path, sep="\t"):
         """converts an input file to a list of lists, with each line represented by a list
         :param file_path: path to file
@@ -593,18 +1266,22 @@ class Filehandler:
             print(f"dir {str(target_dir)} already exists.")
 
     def save_serialized_to_file(self, data, filename):
+        import pickle
         file_path = "".join((self._root_directory, filename))
         with open(file_path, 'ab') as binary_file:
             pickle.dump(data, binary_file, protocol=pickle.HIGHEST_PROTOCOL)
 
     def load_serialzed_from_file(self, filename):
+        import pickle
         with open(filename, 'rb') as file_source:
             return pickle.load(file_source)
 
     def create_serialized_object(self, data_object):
+        import pickle
         return pickle.dumps(data_object, protocol=pickle.HIGHEST_PROTOCOL)
 
     def load_serialized_object(self, serialized_object):
+        import pickle
         return pickle.loads(serialized_object)
 
     @property
@@ -613,6 +1290,7 @@ class Filehandler:
         :return: full path to directory
         :rtype: str
         """
+        from datetime import datetime
         current_date = str(datetime.now()).split('.')[0]
         current_date.replace(' ', '_')
         working_dir = os.getcwd()
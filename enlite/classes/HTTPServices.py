@@ -0,0 +1,225 @@
+import json
+import time
+import threading
+from collections import deque
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+from concurrent.futures import ThreadPoolExecutor
+
+from enlite.classes.Services import LookupService
+
+
+class RequestMetrics:
+    """
+    Request counters and the latencies of the most recent requests of the LookupHTTPServer.
+    """
+    def __init__(self, window_size=10000):
+        """
+        :param window_size: number of recent requests the latency percentiles are computed from
+        :type window_size: int
+        """
+        self._latencies = deque(maxlen=window_size)
+        # finish times of the recent requests, for the throughput of the last minute
+        self._finish_times = deque(maxlen=window_size)
+        self._lock = threading.Lock()
+        self._start_time = time.monotonic()
+        self.requests = 0
+        self.errors = 0
+        self.requests_by_endpoint = {}
+
+    def record(self, endpoint, latency, failed=False):
+        """
+        :param endpoint: path of the request without slashes, e.g. cpd_multi
+        :type endpoint: str
+        :param latency: seconds it took to answer the request
+        :type latency: float
+        :param failed: whether the request was answered with an error
+        :type failed: bool
+        """
+        with self._lock:
+            self.requests += 1
+            if failed:
+                self.errors += 1
+            self.requests_by_endpoint[endpoint] = self.requests_by_endpoint.get(endpoint, 0) + 1
+            self._latencies.append(latency)
+            self._finish_times.append(time.monotonic())
+
+    @staticmethod
+    def percentile(sorted_values, fraction):
+        """nearest-rank percentile of a sorted list"""
+        if not sorted_values:
+            return None
+        rank = max(int(round(fraction * len(sorted_values) + 0.5)) - 1, 0)
+        return sorted_values[min(rank, len(sorted_values) - 1)]
+
+    def snapshot(self):
+        """
+        :return: request counters, latency percentiles in milliseconds and requests per second,
+            over the whole uptime and over the last minute
+        :rtype: dict
+        """
+        with self._lock:
+            latencies = sorted(self._latencies)
+            finish_times = list(self._finish_times)
+            requests = self.requests
+            errors = self.errors
+            requests_by_endpoint = dict(self.requests_by_endpoint)
+        now = time.monotonic()
+        uptime = now - self._start_time
+        recent_requests = sum(1 for finish_time in finish_times if now - finish_time <= 60.0)
+        latency_ms = {}
+        for label, fraction in (('p50', 0.5), ('p90', 0.9), ('p99', 0.99), ('max', 1.0)):
+            latency = self.percentile(latencies, fraction)
+            latency_ms[label] = None if latency is None else latency * 1000
+        return {
+            'requests': requests,
+            'errors': errors,
+            'requests_by_endpoint': requests_by_endpoint,
+            'uptime_seconds': uptime,
+            'requests_per_second': requests / uptime if uptime > 0 else 0.0,
+            'requests_per_second_last_minute': recent_requests / min(uptime, 60.0) if uptime > 0 else 0.0,
+            'latency_ms': latency_ms,
+            'latency_window': len(latencies)
+        }
+
+
+class LookupHTTPRequestHandler(BaseHTTPRequestHandler):
+    """
+    Endpoints of the LookupHTTPServer:
+        GET  /cpd_info?ids=cpd00001,cpd00002&in=modelseed     and the other subcommands of db_lookup.py
+        POST /cpd_multi  {"ids": [...], "in": "kegg", "out": "bigg"} or a list of such requests
+        POST /batch      a list of requests which each name their command, like the daemon
+        GET  /metrics    latency percentiles and throughput
+        GET  /health
+    """
+    # keep-alive needs HTTP/1.1 and a Content-Length on every response
+    protocol_version = "HTTP/1.1"
+    server_version = "enlite"
+    # headers and body are sent without waiting for the ACK of the previous packet
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        # an idle keep-alive connection gives its worker thread back after this many seconds
+        self.timeout = self.server.keepalive_timeout
+        super().setup()
+
+    def log_request(self, code='-', size='-'):
+        # /metrics replaces the access log
+        pass
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def respond(self, endpoint, build_payload):
+        """send the payload built for the request and record its latency
+        :param build_payload: returns the status code and the payload
+        :type build_payload: function
+        """
+        start_time = time.perf_counter()
+        status, payload = build_payload()
+        self.send_json(status, payload)
+        self.server.metrics.record(endpoint, time.perf_counter() - start_time, failed=status != 200)
+
+    def answer_lookup(self, request):
+        response = self.server.lookup_service.handle_request(request)
+        responses = response if isinstance(response, list) else [response]
+        status = 200 if all(single_response['ok'] for single_response in responses) else 400
+        return status, response
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        endpoint = url.path.strip('/')
+        if endpoint == 'metrics':
+            self.respond(endpoint, lambda: (200, {'http': self.server.metrics.snapshot(),
+                                                  'service': self.server.lookup_service.stats()}))
+        elif endpoint == 'health':
+            self.respond(endpoint, lambda: (200, {'ok': True}))
+        elif endpoint in LookupService.commands:
+            query = parse_qs(url.query)
+            request = {
+                'command': endpoint,
+                'ids': [database_id for ids_value in query.get('ids', []) for database_id in ids_value.split(',') if database_id],
+                'in': query.get('in', [None])[0],
+                'out': query.get('out', [None])[0],
+                'altered': query.get('altered', ['false'])[0].lower() in ('1', 'true', 'yes')
+            }
+            self.respond(endpoint, lambda: self.answer_lookup(request))
+        else:
+            self.respond('unknown', lambda: (404, {'ok': False, 'error': f"unknown endpoint {url.path}"}))
+
+    def do_POST(self):
+        endpoint = urlsplit(self.path).path.strip('/')
+        content_length = self.headers.get('Content-Length')
+        if content_length is None:
+            self.close_connection = True
+            self.respond(endpoint, lambda: (411, {'ok': False, 'error': "the request needs a Content-Length"}))
+            return
+        try:
+            content_length = int(content_length)
+        except ValueError:
+            content_length = -1
+        if content_length < 0:
+            # the body cannot be skipped without its length, so the connection is not reused
+            self.close_connection = True
+            self.respond(endpoint, lambda: (400, {'ok': False, 'error': "the Content-Length has to be a non-negative integer"}))
+            return
+        request_body = self.rfile.read(content_length)
+        if endpoint != 'batch' and endpoint not in LookupService.commands:
+            self.respond('unknown', lambda: (404, {'ok': False, 'error': f"unknown endpoint /{endpoint}"}))
+            return
+        try:
+            request = json.loads(request_body)
+        except ValueError as json_error:
+            self.respond(endpoint, lambda: (400, {'ok': False, 'error': f"invalid JSON: {json_error}"}))
+            return
+        if endpoint != 'batch':
+            # the requests sent to a command endpoint are all for that command
+            single_requests = request if isinstance(request, list) else [request]
+            for single_request in single_requests:
+                if isinstance(single_request, dict):
+                    single_request['command'] = endpoint
+        self.respond(endpoint, lambda: self.answer_lookup(request))
+
+
+class LookupHTTPServer(HTTPServer):
+    """
+    Serves a LookupService over HTTP. The connections are answered by a fixed pool of worker threads,
+    each using a read-only connection of the PooledDatabaseHandler of the service, and are kept alive between requests.
+    """
+    def __init__(self, server_address, lookup_service, workers=8, keepalive_timeout=5.0):
+        """
+        :param server_address: host and port to listen on
+        :type server_address: tuple
+        :param lookup_service: the service answering the lookups, its handler should have a pool of at least workers connections
+        :type lookup_service: LookupService
+        :param workers: number of worker threads
+        :type workers: int
+        :param keepalive_timeout: seconds an idle connection is kept open
+        :type keepalive_timeout: float
+        """
+        self.lookup_service = lookup_service
+        self.keepalive_timeout = keepalive_timeout
+        self.metrics = RequestMetrics()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='enlite-http')
+        super().__init__(server_address, LookupHTTPRequestHandler)
+
+    def process_request(self, request, client_address):
+        # the connection waits for a free worker instead of starting a thread of its own
+        self._executor.submit(self.process_request_thread, request, client_address)
+
+    def process_request_thread(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self._executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,252 @@
+import sys
+import json
+import time
+
+from enlite.classes.CustomExceptions import RecordNotFoundError
+
+
+class AliasIndex:
+    """
+    In-memory alias index, loaded once from the xref and metacyc ID tables of the database.
+    ModelSEED IDs are stored as integer codes, aliases as interned strings, so translations
+    in both directions are dictionary lookups.
+    It implements fetch_compound_alias and fetch_reaction_alias like the DatabaseHandler,
+    so it can be passed to an Enliter in place of one.
+    Other namespaces of the ModelSEED aliases, e.g. rhea or chebi, are only available if they are loaded.
+    """
+    db_names = ('metacyc', 'bigg', 'kegg')
+    modelseed_keys = {'compound': 'cpd_id', 'reaction': 'rxn_id'}
+
+    def __init__(self, db_handler, namespaces=()):
+        """
+        :param db_handler: the DatabaseHandler the index is loaded from
+        :type db_handler: DatabaseHandler
+        :param namespaces: namespaces to load besides metacyc, bigg and kegg, e.g. ('rhea', 'chebi')
+        :type namespaces: tuple of str
+        """
+        load_start = time.perf_counter()
+        self._namespaces = tuple(dict.fromkeys(self.db_names + tuple(namespace.lower() for namespace in namespaces)))
+        # code -> ModelSEED ID and ModelSEED ID -> code
+        self._modelseed_ids = []
+        self._modelseed_codes = {}
+        # codes of the ModelSEED IDs which are not obsolete
+        self._active_codes = {'compound': set(), 'reaction': set()}
+        # (db_type, db_name) -> {code: tuple of aliases}
+        self._aliases_by_code = {}
+        # (db_type, db_name) -> {alias: code}
+        self._code_by_alias = {}
+        # db_type -> {altered metacyc ID: metacyc ID}
+        self._normal_metacyc_ids = {}
+        for db_type in ('compound', 'reaction'):
+            self.load_modelseed_ids(db_handler, db_type)
+            self.load_xrefs(db_handler, db_type)
+            self.load_altered_metacyc_ids(db_handler, db_type)
+        self._load_time = time.perf_counter() - load_start
+
+    def get_code(self, modelseed_id):
+        code = self._modelseed_codes.get(modelseed_id)
+        if code is None:
+            code = len(self._modelseed_ids)
+            modelseed_id = sys.intern(modelseed_id)
+            self._modelseed_ids.append(modelseed_id)
+            self._modelseed_codes[modelseed_id] = code
+        return code
+
+    def load_modelseed_ids(self, db_handler, db_type):
+        modelseed_key = self.modelseed_keys[db_type]
+        stmt = f'SELECT {modelseed_key} FROM modelseed_{db_type}s WHERE is_obsolete != "1"'
+        db_handler.c.execute(stmt)
+        active_codes = self._active_codes[db_type]
+        for id_row in db_handler.c.fetchall():
+            active_codes.add(self.get_code(id_row[0]))
+
+    def load_xrefs(self, db_handler, db_type):
+        modelseed_key = self.modelseed_keys[db_type]
+        aliases_by_code = {db_name: {} for db_name in self._namespaces}
+        code_by_alias = {db_name: {} for db_name in self._namespaces}
+        stmt = f"""SELECT {modelseed_key}, namespace, alias FROM modelseed_{db_type}_xrefs
+        WHERE namespace IN (SELECT value FROM json_each(?)) ORDER BY rowid"""
+        db_handler.c.execute(stmt, (json.dumps(self._namespaces),))
+        for modelseed_id, db_name, alias in db_handler.c.fetchall():
+            code = self.get_code(modelseed_id)
+            alias = sys.intern(alias)
+            aliases_by_code[db_name].setdefault(code, []).append(alias)
+            # like the link table query, the first linked ModelSEED ID wins
+            code_by_alias[db_name].setdefault(alias, code)
+        for db_name in self._namespaces:
+            self._aliases_by_code[(db_type, db_name)] = {
+                code: tuple(alias_list) for code, alias_list in aliases_by_code[db_name].items()
+            }
+            self._code_by_alias[(db_type, db_name)] = code_by_alias[db_name]
+
+    def load_altered_metacyc_ids(self, db_handler, db_type):
+        normal_metacyc_ids = {}
+        db_handler.c.execute(f"SELECT altered_id, linked_id_metacyc FROM metacyc_{db_type}_ids ORDER BY id")
+        for altered_id, linked_id_metacyc in db_handler.c.fetchall():
+            if altered_id not in normal_metacyc_ids:
+                normal_metacyc_ids[sys.intern(altered_id)] = sys.intern(linked_id_metacyc)
+        self._normal_metacyc_ids[db_type] = normal_metacyc_ids
+
+    def get_namespace_key(self, db_type, db_name):
+        """
+        :return: the key of the alias dictionaries of a namespace
+        :rtype: tuple
+        :raises ValueError: if the namespace was not loaded
+        """
+        namespace_key = (db_type, db_name.lower())
+        if namespace_key not in self._aliases_by_code:
+            raise ValueError(f"namespace {db_name} is not loaded into the alias index", db_name)
+        return namespace_key
+
+    def reopen_if_replaced(self, check_now=False):
+        """the index does not follow new builds of the database, a new index has to be loaded for them
+        :return: always False
+        :rtype: bool
+        """
+        return False
+
+    @property
+    def load_time(self):
+        """seconds it took to load the index from the database"""
+        return self._load_time
+
+    def memory_footprint(self):
+        """
+        Approximate the memory held by the index, counting every object once.
+        :return: size in bytes
+        :rtype: int
+        """
+        seen_ids = set()
+        total_size = 0
+        pending = [self._modelseed_ids, self._modelseed_codes, self._active_codes,
+                   self._aliases_by_code, self._code_by_alias, self._normal_metacyc_ids]
+        while pending:
+            data_object = pending.pop()
+            if id(data_object) in seen_ids:
+                continue
+            seen_ids.add(id(data_object))
+            total_size += sys.getsizeof(data_object)
+            if isinstance(data_object, dict):
+                pending.extend(data_object.keys())
+                pending.extend(data_object.values())
+            elif isinstance(data_object, (list, tuple, set)):
+                pending.extend(data_object)
+        return total_size
+
+    def resolve_modelseed_id(self, database_id, db_name_in, db_type, metacyc_id_is_altered=False):
+        """
+        Find the ModelSEED ID linked to an ID of another database.
+        :param database_id: ID of the input database
+        :type database_id: str
+        :param db_name_in: modelseed, metacyc, bigg, kegg or a loaded namespace
+        :type db_name_in: str
+        :param db_type: compound or reaction
+        :type db_type: str
+        :param metacyc_id_is_altered: whether a metacyc input ID is an altered ID
+        :type metacyc_id_is_altered: bool
+        :return: the ModelSEED ID
+        :rtype: str
+        :raises RecordNotFoundError: when the ID is not linked to a ModelSEED ID
+        :raises ValueError: if the namespace was not loaded
+        """
+        if db_name_in == "modelseed":
+            return database_id
+        if db_name_in == "metacyc" and metacyc_id_is_altered:
+            altered_id = database_id
+            database_id = self._normal_metacyc_ids[db_type].get(altered_id)
+            if database_id is None:
+                raise RecordNotFoundError(message=f"record for {altered_id} not found")
+        code = self._code_by_alias[self.get_namespace_key(db_type, db_name_in)].get(database_id)
+        if code is None:
+            raise RecordNotFoundError(message=f"record for {database_id} not found")
+        return self._modelseed_ids[code]
+
+    def fetch_aliases(self, modelseed_id, db_name_out, db_type):
+        """
+        All aliases of a ModelSEED ID in one of the databases.
+        Obsolete ModelSEED IDs have no aliases, like in fetch_all_compound_aliases.
+        :return: the aliases, an empty tuple if there are none
+        :rtype: tuple of str
+        """
+        code = self._modelseed_codes.get(modelseed_id)
+        if code not in self._active_codes[db_type]:
+            return ()
+        if db_name_out == "modelseed":
+            return (modelseed_id,)
+        return self._aliases_by_code[self.get_namespace_key(db_type, db_name_out)].get(code, ())
+
+    def translate(self, database_id, db_name_in, db_name_out, db_type, metacyc_id_is_altered=False):
+        """
+        Translate an ID from one database to all of its aliases in another one.
+        :param database_id: ID of the input database
+        :type database_id: str
+        :param db_name_in: modelseed, metacyc, bigg, kegg or a loaded namespace
+        :type db_name_in: str
+        :param db_name_out: modelseed, metacyc, bigg, kegg or a loaded namespace
+        :type db_name_out: str
+        :param db_type: compound or reaction
+        :type db_type: str
+        :return: the aliases, an empty tuple if there are none
+        :rtype: tuple of str
+        :raises RecordNotFoundError: when the ID is not linked to a ModelSEED ID
+        """
+        modelseed_id = self.resolve_modelseed_id(database_id, db_name_in, db_type, metacyc_id_is_altered)
+        return self.fetch_aliases(modelseed_id, db_name_out, db_type)
+
+    def build_alias_records(self, modelseed_id, db_type):
+        """
+        Build the records fetch_all_compound_aliases/fetch_all_reaction_aliases would return,
+        one record per alias.
+        """
+        modelseed_key = self.modelseed_keys[db_type]
+        code = self._modelseed_codes.get(modelseed_id)
+        if code not in self._active_codes[db_type]:
+            return [{modelseed_key: None, 'linked_id_metacyc': None, 'linked_id_bigg': None, 'linked_id_kegg': None}]
+        alias_records = []
+        for db_name in self.db_names:
+            for alias in self._aliases_by_code[(db_type, db_name)].get(code, ()):
+                alias_record = {modelseed_key: modelseed_id, 'linked_id_metacyc': None, 'linked_id_bigg': None, 'linked_id_kegg': None}
+                alias_record[f"linked_id_{db_name}"] = alias
+                alias_records.append(alias_record)
+        if not alias_records:
+            alias_records.append({modelseed_key: modelseed_id, 'linked_id_metacyc': None, 'linked_id_bigg': None, 'linked_id_kegg': None})
+        return alias_records
+
+    def fetch_namespace_aliases_many(self, db_type, modelseed_ids, namespace):
+        """
+        The aliases of a loaded namespace for a list of ModelSEED IDs, like the DatabaseHandler
+        :return: the aliases of each ModelSEED ID, IDs without an alias are left out
+        :rtype: dict of lists of str
+        """
+        namespace_aliases = {}
+        for modelseed_id in modelseed_ids:
+            aliases = self.fetch_aliases(modelseed_id, namespace, db_type)
+            if aliases:
+                namespace_aliases[modelseed_id] = list(aliases)
+        return namespace_aliases
+
+    def fetch_compound_alias(self, database_id, db_name_in, metacyc_id_is_altered=False):
+        modelseed_id = self.resolve_modelseed_id(database_id, db_name_in, 'compound', metacyc_id_is_altered)
+        return self.build_alias_records(modelseed_id, 'compound')
+
+    def fetch_reaction_alias(self, database_id, db_name_in, metacyc_id_is_altered=False):
+        modelseed_id = self.resolve_modelseed_id(database_id, db_name_in, 'reaction', metacyc_id_is_altered)
+        return self.build_alias_records(modelseed_id, 'reaction')
+
+    def fetch_compound_alias_many(self, database_ids, db_name_in, metacyc_id_is_altered=False):
+        alias_records = {}
+        for database_id in database_ids:
+            try:
+                alias_records[database_id] = self.fetch_compound_alias(database_id, db_name_in, metacyc_id_is_altered)
+            except RecordNotFoundError:
+                alias_records[database_id] = None
+        return alias_records
+
+    def fetch_reaction_alias_many(self, database_ids, db_name_in, metacyc_id_is_altered=False):
+        alias_records = {}
+        for database_id in database_ids:
+            try:
+                alias_records[database_id] = self.fetch_reaction_alias(database_id, db_name_in, metacyc_id_is_altered)
+            except RecordNotFoundError:
+                alias_records[database_id] = None
+        return alias_records
@@ -0,0 +1,184 @@
+import queue
+import weakref
+import threading
+from contextlib import contextmanager
+
+from enlite.classes.DataHandlers import DatabaseHandler
+from enlite.classes.CustomExceptions import PoolTimeoutError
+
+
+class ConnectionLease:
+    """
+    A pooled connection handed to one thread. If the thread ends without returning it,
+    the connection goes back to the pool when the lease is garbage collected.
+    """
+    def __init__(self, pooled_connection, return_connection, pinned=False):
+        self.connection = pooled_connection
+        # pinned leases are taken outside of checkout() and kept until the thread ends
+        self.pinned = pinned
+        self.finalizer = weakref.finalize(self, return_connection, pooled_connection)
+
+    def release(self):
+        # run the return callback now and only once
+        self.finalizer()
+
+
+class PooledDatabaseHandler(DatabaseHandler):
+    """
+    DatabaseHandler which gives every thread its own connection and cursor,
+    taken from a bounded pool of connections.
+    Wrap a group of lookups in checkout() to return the connection to the pool afterwards.
+    A thread using the handler outside of checkout() keeps its connection until it ends or calls
+    release_connection(), so a ThreadPoolExecutor should not have more workers than the pool has connections.
+    When the database file is replaced by a new build, connections taken from the pool afterwards open the new file.
+    """
+    def __init__(self, db_path, pool_size=4, checkout_timeout=30.0, **connection_options):
+        """
+        :param db_path: path to the SQLite database file
+        :type db_path: str
+        :param pool_size: maximum number of open connections
+        :type pool_size: int
+        :param checkout_timeout: seconds to wait for a free connection
+        :type checkout_timeout: float
+        :param connection_options: read_only, in_memory, mmap_size, cache_size, temp_store of the DatabaseHandler
+        """
+        if pool_size < 1:
+            raise ValueError('the pool needs at least one connection', pool_size)
+        self.pool_size = pool_size
+        self.checkout_timeout = checkout_timeout
+        self._idle_connections = queue.LifoQueue(maxsize=pool_size)
+        self._open_connections = []
+        # reentrant, a lease may be garbage collected while the lock is held
+        self._pool_lock = threading.RLock()
+        self._local = threading.local()
+        super().__init__(db_path, **connection_options)
+
+    def connect_db(self):
+        # connections are opened on demand, check that the database can be opened at all
+        with self.checkout():
+            pass
+
+    def acquire_connection(self):
+        """
+        Take an idle connection from the pool, or open a new one while the pool is not full
+        :return: a connection and its cursor
+        :rtype: tuple
+        :raises PoolTimeoutError: when all connections stay in use for checkout_timeout seconds
+        """
+        try:
+            return self._idle_connections.get_nowait()
+        except queue.Empty:
+            pass
+        with self._pool_lock:
+            if len(self._open_connections) < self.pool_size:
+                conn = self.open_connection(check_same_thread=False)
+                pooled_connection = (conn, conn.cursor())
+                self._open_connections.append(pooled_connection)
+                return pooled_connection
+        try:
+            return self._idle_connections.get(timeout=self.checkout_timeout)
+        except queue.Empty:
+            raise PoolTimeoutError(message=f"all {self.pool_size} database connections are in use")
+
+    def return_connection(self, pooled_connection):
+        """put a connection back into the pool, or close it if the pool was closed or reopened in the meantime"""
+        with self._pool_lock:
+            if pooled_connection in self._open_connections:
+                self._idle_connections.put(pooled_connection)
+                return
+        pooled_connection[0].close()
+
+    def reopen_if_replaced(self, check_now=False):
+        """
+        Retire the connections to a replaced database file. Idle connections are closed right away,
+        connections in use are closed when they are returned, new ones open the new file.
+        :param check_now: check regardless of the interval
+        :type check_now: bool
+        :return: True if the connections were retired
+        :rtype: bool
+        """
+        with self._pool_lock:
+            replaced = self.database_replaced(check_now)
+            if replaced:
+                idle_connections = self._idle_connections
+                self._open_connections = []
+                self._idle_connections = queue.LifoQueue(maxsize=self.pool_size)
+        if replaced:
+            while True:
+                try:
+                    conn, cursor = idle_connections.get_nowait()
+                except queue.Empty:
+                    break
+                conn.close()
+        # a retired connection pinned to this thread is given up here, between two lookups
+        lease = getattr(self._local, 'lease', None)
+        if lease is not None and lease.pinned and lease.connection not in self._open_connections:
+            self.release_connection()
+        return replaced
+
+    @contextmanager
+    def checkout(self):
+        """
+        Use one connection of the pool for all lookups of the current thread within the block.
+        Nested checkouts and connections pinned to the thread reuse the same connection.
+        """
+        lease = getattr(self._local, 'lease', None)
+        if lease is None or lease.pinned:
+            # not inside another checkout, so a replaced database can be reopened now
+            self.reopen_if_replaced()
+            lease = getattr(self._local, 'lease', None)
+        if lease is not None:
+            yield lease.connection
+            return
+        lease = ConnectionLease(self.acquire_connection(), self.return_connection)
+        self._local.lease = lease
+        try:
+            yield lease.connection
+        finally:
+            self._local.lease = None
+            lease.release()
+
+    def release_connection(self):
+        """return the connection pinned to the current thread to the pool"""
+        lease = getattr(self._local, 'lease', None)
+        if lease is not None:
+            self._local.lease = None
+            lease.release()
+
+    @property
+    def thread_connection(self):
+        # used outside of checkout(), the connection stays pinned to the thread until it ends
+        lease = getattr(self._local, 'lease', None)
+        if lease is None:
+            self.reopen_if_replaced()
+            lease = ConnectionLease(self.acquire_connection(), self.return_connection, pinned=True)
+            self._local.lease = lease
+        return lease.connection
+
+    @property
+    def conn(self):
+        return self.thread_connection[0]
+
+    @property
+    def c(self):
+        return self.thread_connection[1]
+
+    def close_connection(self):
+        """close all connections of the pool, the handler opens new ones when it is used again"""
+        with self._pool_lock:
+            for conn, cursor in self._open_connections:
+                conn.close()
+            self._open_connections = []
+            self._idle_connections = queue.LifoQueue(maxsize=self.pool_size)
+        self._local = threading.local()
+
+    def pool_stats(self):
+        """
+        :return: number of open and idle connections and the pool size
+        :rtype: dict
+        """
+        return {
+            'pool_size': self.pool_size,
+            'open': len(self._open_connections),
+            'idle': self._idle_connections.qsize()
+        }
@@ -4,6 +4,9 @@ from enlite.classes.CustomExceptions import MissingCarbonError, RecordNotFoundEr
 
 
 class Enliter:
+    # databases which are part of the alias records, the aliases of every other namespace are fetched separately
+    record_db_names = ('modelseed', 'metacyc', 'bigg', 'kegg')
+
     def __init__(self, db_handler, filehandler):
         self._db_handler = db_handler
         self._filehandler = filehandler
@@ -47,6 +50,7 @@ class Enliter:
                 return int(carbons_found.lstrip('C'))
 
     def find_compound_alias_single(self, compound_id, db_name_in, db_name_out, metacyc_id_is_altered=False):
+        self._db_handler.reopen_if_replaced()
         try:
             cpd_alias_records = self._db_handler.fetch_compound_alias(compound_id, db_name_in, metacyc_id_is_altered)
         except RecordNotFoundError as no_record_error:
@@ -56,25 +60,24 @@ class Enliter:
         if db_name_out == 'all':
             return records_dict
         else:
-            alias_key = f"{db_name_out}_aliases"
-            alias_list = records_dict[alias_key]
+            alias_list = self.select_aliases({compound_id: records_dict}, 'compound', db_name_out)[compound_id]
             return alias_list[0]
 
     def find_compound_alias_multi(self, compound_list, db_name_in, db_name_out, metacyc_id_is_altered=False):
-        aliases_dict = {}
+        self._db_handler.reopen_if_replaced()
+        # all IDs are linked to their ModelSEED IDs with one query and their aliases are fetched with one more
+        alias_records = self._db_handler.fetch_compound_alias_many(compound_list, db_name_in, metacyc_id_is_altered)
+        records_dicts = {}
         for compound_id in compound_list:
-            try:
-                cpd_alias_records = self._db_handler.fetch_compound_alias(compound_id, db_name_in, metacyc_id_is_altered)
-            except RecordNotFoundError as no_record_error:
-                print(no_record_error.message)
-                continue
-            records_dict = self.handle_multiple_occurrences_compounds(cpd_alias_records)
-            alias_key = f"{db_name_out}_aliases"
-            alias_list = records_dict[alias_key]
-            aliases_dict[compound_id] = alias_list
-        return aliases_dict
+            cpd_alias_records = alias_records[compound_id]
+            if cpd_alias_records is None:
+                print(f"record for {compound_id} not found")
+            elif compound_id not in records_dicts:
+                records_dicts[compound_id] = self.handle_multiple_occurrences_compounds(cpd_alias_records)
+        return self.select_aliases(records_dicts, 'compound', db_name_out)
 
     def find_reaction_alias_single(self, reaction_id, db_name_in, db_name_out, metacyc_id_is_altered=False):
+        self._db_handler.reopen_if_replaced()
         try:
             rxn_alias_records = self._db_handler.fetch_reaction_alias(reaction_id, db_name_in, metacyc_id_is_altered)
         except RecordNotFoundError as no_record_error:
@@ -84,89 +87,121 @@ class Enliter:
         if db_name_out == 'all':
             return records_dict
         else:
-            alias_key = f"{db_name_out}_aliases"
-            alias_list = records_dict[alias_key]
+            alias_list = self.select_aliases({reaction_id: records_dict}, 'reaction', db_name_out)[reaction_id]
             return alias_list[0]
 
     def find_reaction_alias_multi(self, reaction_list, db_name_in, db_name_out, metacyc_id_is_altered=False):
-        aliases_dict = {}
+        self._db_handler.reopen_if_replaced()
+        # all IDs are linked to their ModelSEED IDs with one query and their aliases are fetched with one more
+        alias_records = self._db_handler.fetch_reaction_alias_many(reaction_list, db_name_in, metacyc_id_is_altered)
+        records_dicts = {}
         for reaction_id in reaction_list:
-            try:
-                cpd_alias_records = self._db_handler.fetch_reaction_alias(reaction_id, db_name_in,
-                                                                          metacyc_id_is_altered)
-            except RecordNotFoundError as no_record_error:
-                print(no_record_error.message)
-                continue
-            records_dict = self.handle_multiple_occurrences_reactions(cpd_alias_records)
-            alias_key = f"{db_name_out}_aliases"
-            alias_list = records_dict[alias_key]
-            aliases_dict[reaction_id] = alias_list
+            rxn_alias_records = alias_records[reaction_id]
+            if rxn_alias_records is None:
+                print(f"record for {reaction_id} not found")
+            elif reaction_id not in records_dicts:
+                records_dicts[reaction_id] = self.handle_multiple_occurrences_reactions(rxn_alias_records)
+        return self.select_aliases(records_dicts, 'reaction', db_name_out)
+
+    def select_aliases(self, records_dicts, db_type, db_name_out):
+        """
+        Pick the aliases of one database for several input IDs.
+        modelseed, metacyc, bigg and kegg are part of the alias records, the aliases of any other
+        namespace of the ModelSEED aliases (e.g. rhea, chebi) are fetched for all IDs with one query.
+        :param records_dicts: the dictionary built by collect_unique_aliases for each input ID
+        :type records_dicts: dict
+        :param db_type: compound or reaction
+        :type db_type: str
+        :param db_name_out: the database or namespace of the aliases
+        :type db_name_out: str
+        :return: the aliases of each input ID, [None] if there are none
+        :rtype: dict
+        """
+        namespace_aliases = {}
+        if db_name_out not in self.record_db_names:
+            namespace_aliases = self._db_handler.fetch_namespace_aliases_many(
+                db_type, self.collect_modelseed_ids(records_dicts), db_name_out)
+        return self.pick_aliases(records_dicts, db_name_out, namespace_aliases)
+
+    @staticmethod
+    def collect_modelseed_ids(records_dicts):
+        """the ModelSEED IDs the input IDs were linked to, without duplicates"""
+        modelseed_ids = (records_dict['modelseed_aliases'][0] for records_dict in records_dicts.values())
+        return [modelseed_id for modelseed_id in dict.fromkeys(modelseed_ids) if modelseed_id is not None]
+
+    @staticmethod
+    def pick_aliases(records_dicts, db_name_out, namespace_aliases):
+        """
+        :param namespace_aliases: the aliases of db_name_out by ModelSEED ID, if it is not part of the alias records
+        :type namespace_aliases: dict
+        :return: the aliases of each input ID, [None] if there are none
+        :rtype: dict
+        """
+        alias_key = f"{db_name_out}_aliases"
+        aliases_dict = {}
+        for input_id, records_dict in records_dicts.items():
+            if alias_key in records_dict:
+                aliases_dict[input_id] = records_dict[alias_key]
+            else:
+                aliases_dict[input_id] = namespace_aliases.get(records_dict['modelseed_aliases'][0]) or [None]
         return aliases_dict
 
     @staticmethod
-    def handle_multiple_occurrences_compounds(records):
+    def collect_unique_aliases(records, modelseed_key):
         """
-        Pass in a query result from the left_outer_join statement
+        Collect the distinct aliases of each database from alias records, keeping their order.
+        Empty fields are skipped, a database without any alias is represented by [None].
         :param records: a list of sqlite3.Row objects from one of the fetch_all_aliases methods
         :type records: list of sqlite3.Row objects
+        :param modelseed_key: the column holding the ModelSEED ID, cpd_id or rxn_id
+        :type modelseed_key: str
         :return: dictionary of lists holding the respective aliases for each database
         :rtype: dict
         """
-        modelseed_alias_list = []
-        metacyc_alias_list = []
-        bigg_alias_list = []
-        kegg_alias_list = []
+        # dictionaries keep the insertion order, so their keys serve as ordered sets
+        modelseed_aliases = {}
+        metacyc_aliases = {}
+        bigg_aliases = {}
+        kegg_aliases = {}
         for subrecord in records:
             # due to the row_factory option, columns can be accessed by name
-            mod_al = subrecord['cpd_id']
+            mod_al = subrecord[modelseed_key]
             met_al = subrecord['linked_id_metacyc']
             big_al = subrecord['linked_id_bigg']
             keg_al = subrecord['linked_id_kegg']
-            if mod_al not in modelseed_alias_list:
-                modelseed_alias_list.append(mod_al)
-            if met_al not in metacyc_alias_list:
-                metacyc_alias_list.append(met_al)
-            if big_al not in bigg_alias_list:
-                bigg_alias_list.append(big_al)
-            if keg_al not in kegg_alias_list:
-                kegg_alias_list.append(keg_al)
+            if mod_al is not None:
+                modelseed_aliases[mod_al] = None
+            if met_al is not None:
+                metacyc_aliases[met_al] = None
+            if big_al is not None:
+                bigg_aliases[big_al] = None
+            if keg_al is not None:
+                kegg_aliases[keg_al] = None
         return {
-            'modelseed_aliases': modelseed_alias_list,
-            'metacyc_aliases': metacyc_alias_list,
-            'bigg_aliases': bigg_alias_list,
-            'kegg_aliases': kegg_alias_list
+            'modelseed_aliases': list(modelseed_aliases) or [None],
+            'metacyc_aliases': list(metacyc_aliases) or [None],
+            'bigg_aliases': list(bigg_aliases) or [None],
+            'kegg_aliases': list(kegg_aliases) or [None]
         }
 
+    @staticmethod
+    def handle_multiple_occurrences_compounds(records):
+        """
+        Pass in a query result from fetch_all_compound_aliases
+        :param records: a list of sqlite3.Row objects from one of the fetch_all_aliases methods
+        :type records: list of sqlite3.Row objects
+        :return: dictionary of lists holding the respective aliases for each database
+        :rtype: dict
+        """
+        return Enliter.collect_unique_aliases(records, 'cpd_id')
+
     @staticmethod
     def handle_multiple_occurrences_reactions(records):
         """
-        Pass in a query result from the left_outer_join statement
+        Pass in a query result from fetch_all_reaction_aliases
         :param records: a list of sqlite3.Row objects from one of the fetch_all_aliases methods
         :type records: list of sqlite3.Row objects
         :return: dictionary of lists holding the respective aliases for each database
         :rtype: dict
         """
-        modelseed_alias_list = []
-        metacyc_alias_list = []
-        bigg_alias_list = []
-        kegg_alias_list = []
-        for subrecord in records:
-            # due to the row_factory option, columns can be accessed by name
-            mod_al = subrecord['rxn_id']
-            met_al = subrecord['linked_id_metacyc']
-            big_al = subrecord['linked_id_bigg']
-            keg_al = subrecord['linked_id_kegg']
-            if mod_al not in modelseed_alias_list:
-                modelseed_alias_list.append(mod_al)
-            if met_al not in metacyc_alias_list:
-                metacyc_alias_list.append(met_al)
-            if big_al not in bigg_alias_list:
-                bigg_alias_list.append(big_al)
-            if keg_al not in kegg_alias_list:
-                kegg_alias_list.append(keg_al)
-        return {
-            'modelseed_aliases': modelseed_alias_list,
-            'metacyc_aliases': metacyc_alias_list,
-            'bigg_aliases': bigg_alias_list,
-            'kegg_aliases': kegg_alias_list
-        }
\ No newline at end of file
+        return Enliter.collect_unique_aliases(records, 'rxn_id')
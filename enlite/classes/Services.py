@@ -0,0 +1,346 @@
+import os
+import json
+import time
+import socket
+import threading
+import contextlib
+import socketserver
+
+from enlite.classes.Caches import LookupCache
+from enlite.classes.CustomExceptions import LookupServiceError
+from enlite.classes.Translators import fetch_info_ids, translate_ids
+
+
+class LookupService:
+    """
+    Answers the lookups of the db_lookup.py subcommands for a resident database handler,
+    with a cache of the result of every ID. Requests and responses are dictionaries which
+    can be sent as JSON, e.g. by the LookupDaemon:
+        request:  {"command": "cpd_multi", "ids": ["C00001"], "in": "kegg", "out": "bigg", "altered": false}
+        response: {"ok": true, "results": {"C00001": ["h2o", ...]}}
+    A list of requests is answered with a list of responses. The results of IDs without a record are None.
+    The cache is cleared when the database file is replaced by a new build.
+    """
+    # command: (db type, kind of lookup)
+    commands = {
+        'cpd_info': ('compound', 'info'),
+        'rxn_info': ('reaction', 'info'),
+        'cpd_single': ('compound', 'single'),
+        'rxn_single': ('reaction', 'single'),
+        'cpd_multi': ('compound', 'multi'),
+        'rxn_multi': ('reaction', 'multi')
+    }
+    info_db_names = ('modelseed', 'metacyc', 'bigg', 'kegg')
+    db_letters = {'m': 'modelseed', 'c': 'metacyc', 'b': 'bigg', 'k': 'kegg'}
+
+    def __init__(self, db_handler, cache_size=100000):
+        """
+        :param db_handler: a PooledDatabaseHandler if requests are answered by several threads
+        :type db_handler: PooledDatabaseHandler
+        :param cache_size: maximum number of cached ID results
+        :type cache_size: int
+        """
+        self._db_handler = db_handler
+        self._cache = LookupCache(cache_size)
+        self._seen_reopens = getattr(db_handler, 'reopens', 0)
+        self._stats_lock = threading.Lock()
+        self._start_time = time.monotonic()
+        self.requests = 0
+        self.ids_looked_up = 0
+        self.invalidations = 0
+
+    @property
+    def db_handler(self):
+        return self._db_handler
+
+    def check_database_replaced(self):
+        """reopen a replaced database file and drop the results cached for the old one"""
+        self._db_handler.reopen_if_replaced()
+        reopens = getattr(self._db_handler, 'reopens', 0)
+        if reopens != self._seen_reopens:
+            self._seen_reopens = reopens
+            self._cache.clear()
+            self.invalidations += 1
+
+    def lookup(self, command, ids, db_name_in, db_name_out=None, metacyc_id_is_altered=False):
+        """
+        Look up a list of IDs like the subcommand of the same name, the IDs missing from the cache
+        are resolved with one batched query.
+        :param command: one of the db_lookup.py subcommands, e.g. cpd_info or rxn_multi
+        :type command: str
+        :param ids: IDs of the input database
+        :type ids: list of str
+        :param db_name_in: database or namespace of the input IDs
+        :type db_name_in: str
+        :param db_name_out: database or namespace of the aliases, not used by cpd_info and rxn_info
+        :type db_name_out: str
+        :param metacyc_id_is_altered: whether metacyc input IDs are altered IDs
+        :type metacyc_id_is_altered: bool
+        :return: the info record or the list of aliases of each distinct ID in input order, None if there is no record.
+            The single commands return a list holding the first alias.
+        :rtype: dict
+        """
+        db_type, lookup_kind = self.commands[command]
+        self.check_database_replaced()
+        results = {}
+        missing_ids = []
+        for database_id in dict.fromkeys(ids):
+            found, cached_result = self._cache.get((command, db_name_in, db_name_out, metacyc_id_is_altered, database_id))
+            if found:
+                results[database_id] = cached_result
+            else:
+                missing_ids.append(database_id)
+        if missing_ids:
+            checkout = getattr(self._db_handler, 'checkout', contextlib.nullcontext)
+            with checkout():
+                if lookup_kind == 'info':
+                    fetched_results = fetch_info_ids(self._db_handler, missing_ids, db_type, db_name_in, metacyc_id_is_altered)
+                else:
+                    fetched_results = dict(translate_ids(self._db_handler, missing_ids, db_type, db_name_in, db_name_out, metacyc_id_is_altered))
+            for database_id in missing_ids:
+                result = fetched_results[database_id]
+                if lookup_kind == 'single' and result is not None:
+                    result = result[:1]
+                self._cache.put((command, db_name_in, db_name_out, metacyc_id_is_altered, database_id), result)
+                results[database_id] = result
+        with self._stats_lock:
+            self.ids_looked_up += len(results)
+        return {database_id: results[database_id] for database_id in dict.fromkeys(ids)}
+
+    def handle_request(self, request):
+        """
+        :param request: one request, or a list of them
+        :type request: dict or list
+        :return: the response, or a list of responses in the order of the requests
+        :rtype: dict or list
+        """
+        if isinstance(request, list):
+            return self.handle_batch(request)
+        with self._stats_lock:
+            self.requests += 1
+        try:
+            if not isinstance(request, dict):
+                raise LookupServiceError("a request has to be a JSON object or a list of them")
+            command = request.get('command')
+            if command == 'ping':
+                return {'ok': True}
+            if command == 'stats':
+                return {'ok': True, 'stats': self.stats()}
+            return {'ok': True, 'results': self.lookup(*self.parse_request(request))}
+        except Exception as lookup_error:
+            return self.build_error_response(lookup_error)
+
+    def handle_batch(self, requests):
+        """
+        Answer a list of requests. The IDs of all requests for the same lookup are resolved together,
+        other requests are answered one by one.
+        :return: the responses in the order of the requests
+        :rtype: list
+        """
+        responses = [None] * len(requests)
+        # arguments of lookup without the IDs -> positions and IDs of the requests
+        batched_lookups = {}
+        for position, request in enumerate(requests):
+            if not isinstance(request, dict) or request.get('command') not in self.commands:
+                responses[position] = self.handle_request(request)
+                continue
+            try:
+                command, ids, db_name_in, db_name_out, metacyc_id_is_altered = self.parse_request(request)
+            except LookupServiceError:
+                responses[position] = self.handle_request(request)
+                continue
+            batched_lookups.setdefault((command, db_name_in, db_name_out, metacyc_id_is_altered), []).append((position, ids))
+        for (command, db_name_in, db_name_out, metacyc_id_is_altered), batched_requests in batched_lookups.items():
+            with self._stats_lock:
+                self.requests += len(batched_requests)
+            all_ids = [database_id for position, ids in batched_requests for database_id in ids]
+            try:
+                results = self.lookup(command, all_ids, db_name_in, db_name_out, metacyc_id_is_altered)
+            except Exception as lookup_error:
+                for position, ids in batched_requests:
+                    responses[position] = self.build_error_response(lookup_error)
+                continue
+            for position, ids in batched_requests:
+                responses[position] = {'ok': True, 'results': {database_id: results[database_id] for database_id in dict.fromkeys(ids)}}
+        return responses
+
+    @staticmethod
+    def build_error_response(lookup_error):
+        if isinstance(lookup_error, LookupServiceError):
+            return {'ok': False, 'error': lookup_error.message}
+        # the service keeps answering the other requests
+        return {'ok': False, 'error': f"{type(lookup_error).__name__}: {lookup_error}"}
+
+    def parse_request(self, request):
+        """
+        :return: the arguments of lookup
+        :rtype: tuple
+        :raises LookupServiceError: if the request is incomplete
+        """
+        command = request.get('command')
+        if command not in self.commands:
+            raise LookupServiceError(f"unknown command {command}")
+        ids = request.get('ids')
+        if not isinstance(ids, list) or not all(isinstance(database_id, str) for database_id in ids):
+            raise LookupServiceError("ids has to be a list of strings")
+        db_name_in = request.get('in')
+        db_name_out = request.get('out')
+        if not isinstance(db_name_in, str):
+            raise LookupServiceError("in has to name the database of the input IDs")
+        # the letters of the db_lookup.py options are accepted as well
+        db_name_in = self.db_letters.get(db_name_in, db_name_in)
+        if isinstance(db_name_out, str):
+            db_name_out = self.db_letters.get(db_name_out, db_name_out)
+        if self.commands[command][1] == 'info':
+            if db_name_in not in self.info_db_names:
+                raise LookupServiceError(f"{command} takes IDs of {', '.join(self.info_db_names)}")
+        elif not isinstance(db_name_out, str):
+            raise LookupServiceError("out has to name the database of the aliases")
+        return command, ids, db_name_in, db_name_out, bool(request.get('altered', False))
+
+    def handle_line(self, request_line):
+        """
+        :param request_line: one JSON encoded request or list of requests
+        :type request_line: bytes
+        :return: the JSON encoded response, without line break
+        :rtype: bytes
+        """
+        try:
+            request = json.loads(request_line)
+        except ValueError as json_error:
+            response = {'ok': False, 'error': f"invalid JSON: {json_error}"}
+        else:
+            response = self.handle_request(request)
+        return json.dumps(response).encode()
+
+    def stats(self):
+        """
+        :return: request and ID counters, uptime and the cache counters
+        :rtype: dict
+        """
+        return {
+            'requests': self.requests,
+            'ids_looked_up': self.ids_looked_up,
+            'uptime_seconds': time.monotonic() - self._start_time,
+            'cache': self._cache.stats(),
+            'invalidations': self.invalidations
+        }
+
+
+class LookupRequestHandler(socketserver.StreamRequestHandler):
+    """answers every line sent over one connection with one line"""
+
+    def handle(self):
+        for request_line in self.rfile:
+            if not request_line.strip():
+                continue
+            self.wfile.write(self.server.lookup_service.handle_line(request_line) + b"\n")
+
+
+class LookupDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Serves a LookupService on a Unix domain socket, with line-delimited JSON requests and responses.
+    Every client connection is answered by its own thread and may send any number of requests.
+    """
+    daemon_threads = True
+
+    def __init__(self, socket_path, lookup_service):
+        """
+        :param socket_path: path of the socket file, a stale socket file of a stopped daemon is replaced
+        :type socket_path: str
+        :param lookup_service: the service answering the requests
+        :type lookup_service: LookupService
+        :raises LookupServiceError: if another daemon is listening on the socket
+        """
+        self.socket_path = socket_path
+        self.lookup_service = lookup_service
+        if os.path.exists(socket_path):
+            try:
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe_socket:
+                    probe_socket.connect(socket_path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                os.remove(socket_path)
+            else:
+                raise LookupServiceError(f"a lookup daemon is already listening on {socket_path}")
+        super().__init__(socket_path, LookupRequestHandler)
+        # only the user running the daemon may connect
+        os.chmod(socket_path, 0o600)
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+
+class LookupClient:
+    """
+    Sends requests to a LookupDaemon over one connection, which is opened on the first request.
+    """
+    def __init__(self, socket_path, timeout=30.0):
+        """
+        :param socket_path: path of the socket file of the daemon
+        :type socket_path: str
+        :param timeout: seconds to wait for a response
+        :type timeout: float
+        """
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._socket = None
+        self._responses = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def connect(self):
+        """
+        :raises LookupServiceError: if no daemon is listening on the socket
+        """
+        client_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        client_socket.settimeout(self.timeout)
+        try:
+            client_socket.connect(self.socket_path)
+        except (ConnectionRefusedError, FileNotFoundError):
+            client_socket.close()
+            raise LookupServiceError(f"no lookup daemon is listening on {self.socket_path}, start one with 'python db_lookup.py serve'")
+        self._socket = client_socket
+        self._responses = client_socket.makefile('rb')
+
+    def close(self):
+        if self._socket is not None:
+            self._responses.close()
+            self._socket.close()
+            self._socket = None
+
+    def request(self, request):
+        """
+        :param request: one request, or a list of them
+        :type request: dict or list
+        :return: the response of the daemon
+        :rtype: dict or list
+        :raises LookupServiceError: if the daemon closed the connection
+        """
+        if self._socket is None:
+            self.connect()
+        self._socket.sendall(json.dumps(request).encode() + b"\n")
+        response_line = self._responses.readline()
+        if not response_line:
+            self.close()
+            raise LookupServiceError("the lookup daemon closed the connection")
+        return json.loads(response_line)
+
+    def lookup(self, command, ids, db_name_in, db_name_out=None, metacyc_id_is_altered=False):
+        """
+        Run LookupService.lookup in the daemon
+        :return: the result of each distinct ID in input order, None if there is no record
+        :rtype: dict
+        :raises LookupServiceError: if the daemon rejected the request
+        """
+        response = self.request({'command': command, 'ids': list(ids), 'in': db_name_in,
+                                 'out': db_name_out, 'altered': metacyc_id_is_altered})
+        if not response['ok']:
+            raise LookupServiceError(response['error'])
+        return response['results']
+
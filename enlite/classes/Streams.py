@@ -0,0 +1,154 @@
+import sys
+import csv
+import json
+import time
+
+from enlite.classes.Translators import fetch_info_ids, translate_ids
+
+
+class RecordWriter:
+    """
+    Writes lookup results row by row as TSV, CSV or JSON Lines.
+    The columns of TSV and CSV output are taken from the first row, which also writes the header line.
+    """
+    output_formats = ('tsv', 'csv', 'jsonl')
+    # line: after every row, chunk: after every chunk of IDs, end: only when the output is closed
+    flush_policies = ('line', 'chunk', 'end')
+
+    def __init__(self, out_file, output_format='tsv', flush_policy='chunk'):
+        """
+        :param out_file: text stream the rows are written to, e.g. sys.stdout
+        :type out_file: file object
+        :param output_format: tsv, csv or jsonl
+        :type output_format: str
+        :param flush_policy: line, chunk or end
+        :type flush_policy: str
+        """
+        if output_format not in self.output_formats:
+            raise ValueError('unknown output format', output_format)
+        if flush_policy not in self.flush_policies:
+            raise ValueError('unknown flush policy', flush_policy)
+        self._out_file = out_file
+        self.output_format = output_format
+        self.flush_policy = flush_policy
+        self._csv_writer = None
+        self.rows_written = 0
+
+    def write_row(self, row):
+        """
+        :param row: column name -> value, None is written as an empty field (TSV, CSV) or null (JSON Lines)
+        :type row: dict
+        """
+        if self.output_format == 'jsonl':
+            self._out_file.write(json.dumps(row) + "\n")
+        else:
+            if self._csv_writer is None:
+                delimiter = "\t" if self.output_format == 'tsv' else ","
+                self._csv_writer = csv.DictWriter(self._out_file, fieldnames=list(row), delimiter=delimiter,
+                                                  lineterminator="\n", restval="", extrasaction='ignore')
+                self._csv_writer.writeheader()
+            self._csv_writer.writerow(row)
+        self.rows_written += 1
+        if self.flush_policy == 'line':
+            self._out_file.flush()
+
+    def write_rows(self, rows):
+        """write the rows of one chunk of IDs"""
+        for row in rows:
+            self.write_row(row)
+        if self.flush_policy == 'chunk':
+            self._out_file.flush()
+
+    def flush(self):
+        self._out_file.flush()
+
+
+class StreamingLookup:
+    """
+    Resolves chunks of IDs with the batched queries of the DatabaseHandler and hands the results
+    of every chunk to a RecordWriter, so only one chunk is held in memory at a time.
+    Every row starts with the input_id it belongs to, IDs without a record are reported on stderr.
+    """
+    def __init__(self, db_handler, writer):
+        """
+        :param db_handler: any handler with the _many fetch methods of the DatabaseHandler
+        :type db_handler: DatabaseHandler
+        :param writer: the writer receiving the rows
+        :type writer: RecordWriter
+        """
+        self._db_handler = db_handler
+        self._writer = writer
+        self.ids_read = 0
+        self.ids_not_found = 0
+        self.elapsed_time = 0.0
+
+    @property
+    def throughput(self):
+        """IDs per second of the last lookup"""
+        if self.elapsed_time == 0:
+            return 0.0
+        return self.ids_read / self.elapsed_time
+
+    def report_not_found(self, database_id):
+        self.ids_not_found += 1
+        print(f"record for {database_id} not found", file=sys.stderr)
+
+    def stream_info(self, id_chunks, db_type, db_name_in, metacyc_id_is_altered=False):
+        """
+        Write one row per input ID holding its info record.
+        :param id_chunks: lists of input IDs, e.g. from Filehandler.iter_chunks
+        :type id_chunks: iterable of lists of str
+        :param db_type: compound or reaction
+        :type db_type: str
+        :param db_name_in: modelseed, metacyc, bigg or kegg
+        :type db_name_in: str
+        :param metacyc_id_is_altered: whether metacyc input IDs are altered IDs
+        :type metacyc_id_is_altered: bool
+        """
+        start_time = time.perf_counter()
+        for id_chunk in id_chunks:
+            records_by_id = fetch_info_ids(self._db_handler, id_chunk, db_type, db_name_in, metacyc_id_is_altered)
+            chunk_rows = []
+            for database_id in id_chunk:
+                info_record = records_by_id[database_id]
+                if info_record is None:
+                    self.report_not_found(database_id)
+                    continue
+                chunk_rows.append({'input_id': database_id, **info_record})
+            self._writer.write_rows(chunk_rows)
+            self.ids_read += len(id_chunk)
+        self.elapsed_time = time.perf_counter() - start_time
+
+    def stream_aliases(self, id_chunks, db_type, db_name_in, db_name_out, metacyc_id_is_altered=False, first_only=False):
+        """
+        Write one row per alias of each input ID, with columns input_id, database and alias.
+        IDs with a record but without an alias in db_name_out get one row with an empty alias.
+        :param id_chunks: lists of input IDs, e.g. from Filehandler.iter_chunks
+        :type id_chunks: iterable of lists of str
+        :param db_type: compound or reaction
+        :type db_type: str
+        :param db_name_in: modelseed, metacyc, bigg, kegg or any other namespace of the ModelSEED aliases
+        :type db_name_in: str
+        :param db_name_out: modelseed, metacyc, bigg, kegg or any other namespace of the ModelSEED aliases
+        :type db_name_out: str
+        :param metacyc_id_is_altered: whether metacyc input IDs are altered IDs
+        :type metacyc_id_is_altered: bool
+        :param first_only: write only the first alias of each ID, like find_compound_alias_single
+        :type first_only: bool
+        """
+        start_time = time.perf_counter()
+        for id_chunk in id_chunks:
+            aliases_by_id = dict(translate_ids(self._db_handler, id_chunk, db_type, db_name_in, db_name_out, metacyc_id_is_altered))
+            chunk_rows = []
+            for database_id in id_chunk:
+                alias_list = aliases_by_id[database_id]
+                if alias_list is None:
+                    self.report_not_found(database_id)
+                    continue
+                if first_only:
+                    alias_list = alias_list[:1]
+                for alias in alias_list:
+                    chunk_rows.append({'input_id': database_id, 'database': db_name_out, 'alias': alias})
+            self._writer.write_rows(chunk_rows)
+            self.ids_read += len(id_chunk)
+        self.elapsed_time = time.perf_counter() - start_time
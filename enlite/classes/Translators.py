@@ -0,0 +1,133 @@
+import os
+import time
+from functools import partial
+
+from enlite.classes.DataHandlers import DatabaseHandler
+from enlite.classes.Reporters import Enliter
+
+# the read-only handler of a worker process, opened once by init_worker
+worker_db_handler = None
+
+
+def init_worker(db_path, connection_options):
+    global worker_db_handler
+    worker_db_handler = DatabaseHandler(db_path, read_only=True, **connection_options)
+
+
+def translate_ids(db_handler, id_chunk, db_type, db_name_in, db_name_out, metacyc_id_is_altered):
+    """
+    Translate one chunk of IDs with the batched alias queries of a handler
+    :return: the aliases of each distinct ID in the chunk, None for IDs without a record
+    :rtype: list of tuples
+    """
+    if db_type == 'compound':
+        alias_records = db_handler.fetch_compound_alias_many(id_chunk, db_name_in, metacyc_id_is_altered)
+        modelseed_key = 'cpd_id'
+    else:
+        alias_records = db_handler.fetch_reaction_alias_many(id_chunk, db_name_in, metacyc_id_is_altered)
+        modelseed_key = 'rxn_id'
+    records_dicts = {database_id: Enliter.collect_unique_aliases(records, modelseed_key)
+                     for database_id, records in alias_records.items() if records is not None}
+    aliases_dict = Enliter(db_handler, None).select_aliases(records_dicts, db_type, db_name_out)
+    return [(database_id, aliases_dict.get(database_id)) for database_id in alias_records]
+
+
+def fetch_info_ids(db_handler, id_chunk, db_type, db_name_in, metacyc_id_is_altered=False):
+    """
+    Fetch the info records of one chunk of IDs with the batched info queries of a handler
+    :param db_name_in: modelseed, metacyc, bigg or kegg
+    :type db_name_in: str
+    :return: the info record of each input ID, None for IDs which were not found
+    :rtype: dict
+    """
+    if db_name_in == 'modelseed':
+        if db_type == 'compound':
+            return db_handler.fetch_modelseed_cpd_info_many(id_chunk)
+        return db_handler.fetch_modelseed_rxn_info_many(id_chunk)
+    if db_name_in == 'metacyc':
+        if db_type == 'compound':
+            return db_handler.fetch_metacyc_cpd_info_many(id_chunk, metacyc_id_is_altered)
+        return db_handler.fetch_metacyc_rxn_info_many(id_chunk, metacyc_id_is_altered)
+    if db_type == 'compound':
+        return db_handler.fetch_cpd_info_by_alias_many(db_name_in, id_chunk)
+    return db_handler.fetch_rxn_info_by_alias_many(db_name_in, id_chunk)
+
+
+def translate_chunk(id_chunk, db_type, db_name_in, db_name_out, metacyc_id_is_altered):
+    """translate one chunk of IDs in a worker process"""
+    return translate_ids(worker_db_handler, id_chunk, db_type, db_name_in, db_name_out, metacyc_id_is_altered)
+
+
+class BulkTranslator:
+    """
+    Translates very large ID lists by splitting them into chunks, which are translated
+    by a pool of worker processes, each with its own read-only connection to the database.
+    The results are merged back in input order, like find_compound_alias_multi/find_reaction_alias_multi of the Enliter.
+    """
+    def __init__(self, db_path, jobs=None, chunk_size=5000, **connection_options):
+        """
+        :param db_path: path to the SQLite database file
+        :type db_path: str
+        :param jobs: number of worker processes, by default the number of CPUs
+        :type jobs: int
+        :param chunk_size: number of IDs sent to a worker at once
+        :type chunk_size: int
+        :param connection_options: mmap_size, cache_size, temp_store, in_memory of the DatabaseHandler
+        """
+        self.db_path = db_path
+        self.jobs = jobs or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.connection_options = connection_options
+        self.ids_translated = 0
+        self.elapsed_time = 0.0
+
+    @property
+    def throughput(self):
+        """IDs per second of the last translation"""
+        if self.elapsed_time == 0:
+            return 0.0
+        return self.ids_translated / self.elapsed_time
+
+    def translate(self, id_list, db_type, db_name_in, db_name_out, metacyc_id_is_altered=False):
+        """
+        :param id_list: IDs of the input database
+        :type id_list: list of str
+        :param db_type: compound or reaction
+        :type db_type: str
+        :param db_name_in: modelseed, metacyc, bigg, kegg or any other namespace of the ModelSEED aliases
+        :type db_name_in: str
+        :param db_name_out: modelseed, metacyc, bigg, kegg or any other namespace of the ModelSEED aliases
+        :type db_name_out: str
+        :return: the aliases of each ID found, and each occurrence of the IDs without a record, both in input order
+        :rtype: tuple
+        """
+        start_time = time.perf_counter()
+        # duplicates are translated once, as in find_compound_alias_multi
+        unique_ids = list(dict.fromkeys(id_list))
+        id_chunks = [unique_ids[i:i + self.chunk_size] for i in range(0, len(unique_ids), self.chunk_size)]
+        translate_id_chunk = partial(translate_chunk, db_type=db_type, db_name_in=db_name_in,
+                                     db_name_out=db_name_out, metacyc_id_is_altered=metacyc_id_is_altered)
+
+        if self.jobs == 1 or len(id_chunks) <= 1:
+            # not worth starting processes for
+            init_worker(self.db_path, self.connection_options)
+            translated_chunks = [translate_id_chunk(id_chunk) for id_chunk in id_chunks]
+            worker_db_handler.close_connection()
+        else:
+            # imported here, it pulls in multiprocessing which the single lookups do not need
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=min(self.jobs, len(id_chunks)), initializer=init_worker,
+                                     initargs=(self.db_path, self.connection_options)) as executor:
+                # map returns the results in the order of the chunks
+                translated_chunks = list(executor.map(translate_id_chunk, id_chunks))
+
+        aliases_dict = {}
+        for translated_chunk in translated_chunks:
+            for database_id, alias_list in translated_chunk:
+                if alias_list is not None:
+                    aliases_dict[database_id] = alias_list
+        # every occurrence of a missing ID is reported, as find_compound_alias_multi prints them
+        ids_not_found = [database_id for database_id in id_list if database_id not in aliases_dict]
+        self.ids_translated = len(unique_ids)
+        self.elapsed_time = time.perf_counter() - start_time
+        return aliases_dict, ids_not_found
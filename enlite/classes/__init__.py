@@ -2,6 +2,43 @@
 
 from __future__ import absolute_import
 
-from enlite.classes.CustomExceptions import RecordNotFoundError, MissingCarbonError
-from enlite.classes.DataHandlers import DatabaseHandler, Filehandler, DBLConfigLoader
-from enlite.classes.Reporters import Enliter
\ No newline at end of file
+import importlib
+
+# class name -> module of the package defining it
+# the modules are imported on first access, so using one class does not import asyncio, http.server etc. for the others
+class_modules = {
+    'RecordNotFoundError': 'CustomExceptions',
+    'MissingCarbonError': 'CustomExceptions',
+    'PoolTimeoutError': 'CustomExceptions',
+    'LookupServiceError': 'CustomExceptions',
+    'DatabaseHandler': 'DataHandlers',
+    'Filehandler': 'DataHandlers',
+    'DBLConfigLoader': 'DataHandlers',
+    'Enliter': 'Reporters',
+    'AsyncEnliter': 'AsyncReporters',
+    'AliasIndex': 'Indexes',
+    'LookupCache': 'Caches',
+    'CachedDatabaseHandler': 'Caches',
+    'PooledDatabaseHandler': 'Pools',
+    'BulkTranslator': 'Translators',
+    'RecordWriter': 'Streams',
+    'StreamingLookup': 'Streams',
+    'LookupService': 'Services',
+    'LookupDaemon': 'Services',
+    'LookupClient': 'Services',
+    'LookupHTTPServer': 'HTTPServices'
+}
+
+__all__ = list(class_modules)
+
+
+def __getattr__(name):
+    if name not in class_modules:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    class_object = getattr(importlib.import_module(f"enlite.classes.{class_modules[name]}"), name)
+    globals()[name] = class_object
+    return class_object
+
+
+def __dir__():
+    return sorted(set(globals()) | set(class_modules))
@@ -0,0 +1,63 @@
+import os
+import sys
+import argparse
+
+from enlite.classes.DataHandlers import DBLConfigLoader
+from enlite.database_scripts.build_pipeline import build_stages, run_build
+from enlite.database_scripts.build_database import rebuild_database
+from enlite.database_scripts.create_indexes import add_indexes
+from enlite.database_scripts.compact_alias_tables import compact_database
+from enlite.database_scripts.delta_update import run_delta_update
+from enlite.database_scripts.xref_create_insert import add_xref_tables
+
+# the config and data directories live next to the package modules
+package_root = os.path.dirname(os.path.abspath(__file__))
+
+
+def options():
+    main_parser = argparse.ArgumentParser(prog='enlite')
+    main_parser.add_argument('--config-root', help="directory holding dbl_config.yaml", dest='config_root', default=os.path.join(package_root, 'config'))
+    main_parser.add_argument('--project-root', help="directory the data path of the config is relative to", dest='project_root', default=package_root)
+    subcommands = main_parser.add_subparsers(title='subcommands', dest='command', required=True)
+
+    build_parser = subcommands.add_parser('build', help='build or refresh the database from the flatfiles')
+    build_parser.add_argument('--stages', help="stages to check, by default all of them", nargs='+', choices=list(build_stages), default=None)
+    build_parser.add_argument('-f', '--force', help="build the stages even if their flatfiles did not change", action='store_true')
+    build_parser.add_argument('-j', '--jobs', help="number of worker processes preparing the ModelSEED and MetaCyc records", type=int, default=1)
+
+    rebuild_parser = subcommands.add_parser('rebuild', help='build the ModelSEED tables into a new database file and swap it in, without checking the flatfiles')
+    rebuild_parser.add_argument('--no-extra-tables', help="do not copy the MetaCyc and BiGG tables of the live database", dest='keep_extra_tables', action='store_false')
+    rebuild_parser.add_argument('-j', '--jobs', help="number of worker processes preparing the ModelSEED records", type=int, default=1)
+
+    subcommands.add_parser('xrefs', help='build the xref tables of a database built with an older version')
+
+    indexes_parser = subcommands.add_parser('indexes', help='add the lookup indexes to an existing database and check the query plans')
+    indexes_parser.add_argument('--check-only', help="only check the query plans, do not create indexes", dest='check_only', action='store_true')
+
+    subcommands.add_parser('compact', help='store each alias once in the *_ids tables of a database built with an older version')
+
+    subcommands.add_parser('delta-update', help='apply only the added, changed and removed records of a new ModelSEED release')
+    return main_parser.parse_args()
+
+
+def main():
+    args = options()
+    conf = DBLConfigLoader(config_root=args.config_root, project_root=args.project_root)
+    if args.command == 'build':
+        run_build(conf, args.stages, args.force, args.jobs)
+    elif args.command == 'rebuild':
+        rebuild_database(conf, args.keep_extra_tables, args.jobs)
+    elif args.command == 'xrefs':
+        add_xref_tables(conf)
+    elif args.command == 'indexes':
+        if add_indexes(conf, args.check_only):
+            sys.exit(1)
+    elif args.command == 'compact':
+        size_before, size_after = compact_database(conf)
+        print(f"database size: {size_before} -> {size_after} bytes")
+    elif args.command == 'delta-update':
+        run_delta_update(conf)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,33 +1,100 @@
-import traceback
-
 import sqlite3
 
-from classes.DataHandlers import DBLConfigLoader, Filehandler
+from enlite.classes.DataHandlers import DBLConfigLoader
+from . build_utils import apply_build_pragmas, BulkLoader
 from . sqlite_statements import biggcompounds_db_creation, biggreactions_db_creation, insert_biggcompounds, insert_biggreactions
 
 
-filehandler = Filehandler()
-
-dbl_config = DBLConfigLoader(config_root="../config", project_root="..")
-db_path = dbl_config.get_database_path()
-conn = sqlite3.connect(db_path)
-c = conn.cursor()
-c.execute("PRAGMA foreign_keys = 1")
-
-list_bigg_reactions = filehandler.build_nested_list(dbl_config.get_bigg_reactions())
-list_bigg_compounds = filehandler.build_nested_list(dbl_config.get_bigg_compounds())
-
-try:
-	c.execute(biggreactions_db_creation)
-	c.execute(biggcompounds_db_creation)
-	c.executemany(insert_biggreactions, list_bigg_reactions)
-	# might have to manually fix the newlines in the records on lines 6378 and 12959
-	# the newlines inserted vary!
-	c.executemany(insert_biggcompounds, list_bigg_compounds)
-except Exception:
-	print("an error occurred:")
-	traceback.print_exc()
-finally:
-	conn.commit()
-	
-conn.close()
+# every record of the BiGG flatfiles has six tab separated fields
+bigg_field_count = 6
+
+# line numbers of the rejected lines printed per file
+rejected_lines_shown = 10
+
+
+def iter_bigg_rows(lines, line_stats, field_count=bigg_field_count):
+	"""yield the records of a BiGG flatfile as lists of fields, skipping the header line
+	the server sometimes breaks a record over several lines, such lines are joined again until
+	the record has all its fields, lines which cannot be joined into a record are rejected
+	:param lines: the lines of the file
+	:type lines: iterable
+	:param line_stats: counts of the rows, repaired records and rejected lines, and the rejected line numbers, updated while reading
+	:type line_stats: dict
+	"""
+	# the pending record and the line numbers it was joined from
+	pending_text = None
+	pending_lines = []
+
+	def reject(line_numbers):
+		line_stats['rejected'] += len(line_numbers)
+		line_stats['rejected_lines'].extend(line_numbers)
+
+	for line_number, line in enumerate(lines, 1):
+		line = line.rstrip("\r\n")
+		if line_number == 1 and line.startswith("bigg_id\t"):
+			continue
+		if not line and pending_text is None:
+			continue
+		if pending_text is not None and pending_text.count("\t") + line.count("\t") + 1 <= field_count:
+			text = pending_text + line
+			text_lines = pending_lines + [line_number]
+		else:
+			# the line does not continue the pending record, so it is a record of its own
+			if pending_text is not None:
+				reject(pending_lines)
+			text = line
+			text_lines = [line_number]
+		pending_text = None
+		pending_lines = []
+
+		text_field_count = text.count("\t") + 1
+		if text_field_count == field_count:
+			if len(text_lines) > 1:
+				line_stats['repaired'] += 1
+			line_stats['rows'] += 1
+			yield text.split("\t")
+		elif text_field_count < field_count:
+			pending_text = text
+			pending_lines = text_lines
+		else:
+			reject(text_lines)
+	if pending_text is not None:
+		reject(pending_lines)
+
+
+def load_bigg_file(loader, table_name, insert_stmt, file_path):
+	"""write the records of one BiGG flatfile in batches and report the repaired and rejected lines
+	:return: the counts of the rows, repaired records and rejected lines
+	:rtype: dict
+	"""
+	line_stats = {'rows': 0, 'repaired': 0, 'rejected': 0, 'rejected_lines': []}
+	loader.add_table(table_name, insert_stmt)
+	with open(file_path, 'r', encoding='utf-8') as infile:
+		for row in iter_bigg_rows(infile, line_stats):
+			loader.add_row(table_name, row)
+	print(f"{file_path}: {line_stats['rows']} records, {line_stats['repaired']} repaired, {line_stats['rejected']} lines rejected")
+	if line_stats['rejected']:
+		shown_lines = ", ".join(str(line_number) for line_number in line_stats['rejected_lines'][:rejected_lines_shown])
+		print(f"\trejected lines: {shown_lines}{' ...' if line_stats['rejected'] > rejected_lines_shown else ''}")
+	return line_stats
+
+
+def build_bigg_tables(conn, bigg_reactions, bigg_compounds):
+	"""create and fill the BiGG tables from the two BiGG flatfiles, reading them line by line"""
+	loader = BulkLoader(conn)
+	with loader.stage("create bigg tables"):
+		loader.c.execute(biggreactions_db_creation)
+		loader.c.execute(biggcompounds_db_creation)
+	with loader.stage("load bigg reactions"):
+		load_bigg_file(loader, 'biggreactions', insert_biggreactions, bigg_reactions)
+	with loader.stage("load bigg compounds"):
+		load_bigg_file(loader, 'biggcompounds', insert_biggcompounds, bigg_compounds)
+
+
+if __name__ == '__main__':
+	dbl_config = DBLConfigLoader(config_root="../config", project_root="..")
+	db_path = dbl_config.get_database_path()
+	conn = sqlite3.connect(db_path)
+	apply_build_pragmas(conn)
+	build_bigg_tables(conn, dbl_config.get_bigg_reactions(), dbl_config.get_bigg_compounds())
+	conn.close()
@@ -0,0 +1,117 @@
+import os
+import time
+import sqlite3
+
+from . build_utils import apply_build_pragmas, iter_json_array, BulkLoader
+from . compound_db_create_insert import compounds_creation_stmts, load_compounds
+from . reaction_db_create_insert import reactions_creation_stmts, load_reactions
+from . create_indexes import create_indexes
+
+
+def get_build_path(db_path):
+	"""the new database is built next to the live one, so it can be renamed into place on the same file system"""
+	return f"{db_path}.building-{os.getpid()}"
+
+
+def build_modelseed_tables(conn, compounds_json, reactions_json, jobs=1):
+	"""create and fill the ModelSEED tables, their alias, xref and attribute tables"""
+	loader = BulkLoader(conn)
+	with loader.stage("create reaction tables"):
+		for stmt in reactions_creation_stmts:
+			loader.c.execute(stmt)
+	with loader.stage("load reactions"):
+		load_reactions(loader, iter_json_array(reactions_json), jobs)
+	with loader.stage("create compound tables"):
+		for stmt in compounds_creation_stmts:
+			loader.c.execute(stmt)
+	with loader.stage("load compounds"):
+		load_compounds(loader, iter_json_array(compounds_json), jobs)
+
+
+def copy_extra_tables(conn, live_db_path):
+	"""copy the tables of another database which do not exist in this one, together with their indexes,
+	e.g. the MetaCyc and BiGG tables of the live database which the build does not create
+	:return: names of the copied tables
+	:rtype: list
+	"""
+	c = conn.cursor()
+	c.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+	built_tables = {table_row[0] for table_row in c.fetchall()}
+	# the copied tables may reference each other, so their rows are inserted in any order
+	c.execute("PRAGMA foreign_keys = 0")
+	c.execute("ATTACH DATABASE ? AS live", (live_db_path,))
+	c.execute("SELECT name, sql FROM live.sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'")
+	extra_tables = [(table_name, table_sql) for table_name, table_sql in c.fetchall() if table_name not in built_tables]
+	for table_name, table_sql in extra_tables:
+		c.execute(table_sql)
+		c.execute(f'INSERT INTO main."{table_name}" SELECT * FROM live."{table_name}"')
+		c.execute("SELECT sql FROM live.sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL", (table_name,))
+		for index_row in c.fetchall():
+			c.execute(index_row[0])
+	conn.commit()
+	c.execute("DETACH DATABASE live")
+	c.execute("PRAGMA foreign_keys = 1")
+	return [table_name for table_name, table_sql in extra_tables]
+
+
+def finalize_database(conn):
+	"""add the lookup indexes, collect the statistics for the query planner and rewrite the file compactly
+	:raises sqlite3.DatabaseError: if the integrity check of the new database fails
+	"""
+	create_indexes(conn)
+	conn.execute("ANALYZE")
+	conn.commit()
+	conn.execute("VACUUM")
+	check_result = conn.execute("PRAGMA quick_check").fetchone()[0]
+	if check_result != "ok":
+		raise sqlite3.DatabaseError(f"integrity check of the new database failed: {check_result}")
+
+
+def swap_database(build_path, db_path):
+	"""rename the new database over the live one in one step,
+	open connections keep reading the old file until they are reopened
+	"""
+	# the build runs without journal and syncs, so the file is written to disk before it is renamed
+	with open(build_path, 'rb') as build_file:
+		os.fsync(build_file.fileno())
+	os.replace(build_path, db_path)
+	directory_fd = os.open(os.path.dirname(os.path.abspath(db_path)), os.O_RDONLY)
+	try:
+		os.fsync(directory_fd)
+	finally:
+		os.close(directory_fd)
+
+
+def build_and_swap(db_path, compounds_json, reactions_json, keep_extra_tables=True, jobs=1):
+	"""build a new database into a temporary file and replace the live database with it,
+	readers never see a half-built database and a failed build leaves the live database untouched
+	:param keep_extra_tables: copy the tables of the live database which are not built here
+	:type keep_extra_tables: bool
+	:param jobs: number of worker processes preparing the records
+	:type jobs: int
+	"""
+	build_path = get_build_path(db_path)
+	conn = sqlite3.connect(build_path)
+	try:
+		apply_build_pragmas(conn)
+		build_modelseed_tables(conn, compounds_json, reactions_json, jobs)
+		if keep_extra_tables and os.path.isfile(db_path):
+			copied_tables = copy_extra_tables(conn, db_path)
+			if copied_tables:
+				print(f"copied from the live database: {', '.join(copied_tables)}")
+		finalize_database(conn)
+		conn.close()
+		swap_database(build_path, db_path)
+	except BaseException:
+		conn.close()
+		if os.path.exists(build_path):
+			os.remove(build_path)
+		raise
+
+
+def rebuild_database(conf, keep_extra_tables=True, jobs=1):
+	"""build the ModelSEED tables of the config into a new database file and swap it in with build_and_swap"""
+	db_path = conf.get_database_path()
+	start_time = time.perf_counter()
+	build_and_swap(db_path, conf.get_modelseed_compounds(), conf.get_modelseed_reactions(), keep_extra_tables, jobs)
+	print(f"{db_path} replaced after {time.perf_counter() - start_time:.2f} s, size {os.path.getsize(db_path)} bytes")
@@ -0,0 +1,215 @@
+import os
+import json
+import time
+import sqlite3
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+from . build_utils import apply_build_pragmas, file_checksum
+from . build_database import get_build_path, build_modelseed_tables, copy_extra_tables, finalize_database, swap_database
+from . bigg_create_insert import build_bigg_tables
+from . metacyc_create_insert import build_metacyc_tables
+from . sqlite_statements import creation_stmt_build_manifest, insert_stmt_build_manifest
+
+
+# stage name: (DBLConfigLoader methods returning the input files, function creating and filling the tables from them,
+# whether that function takes the number of worker processes)
+build_stages = {
+	'modelseed': (['get_modelseed_compounds', 'get_modelseed_reactions'], build_modelseed_tables, True),
+	'bigg': (['get_bigg_reactions', 'get_bigg_compounds'], build_bigg_tables, False),
+	'metacyc': (['get_metacyc_compounds', 'get_metacyc_reactions'], build_metacyc_tables, True)
+}
+
+# stages which are built into their own file by a worker process while the ModelSEED stage is built,
+# their tables are copied into the new database afterwards
+concurrent_stages = {'bigg', 'metacyc'}
+
+
+def get_stage_inputs(conf, stage_name):
+	"""
+	:return: the paths of the input files of a stage
+	:rtype: list
+	"""
+	input_methods, build_function, takes_jobs = build_stages[stage_name]
+	return [getattr(conf, input_method)() for input_method in input_methods]
+
+
+def collect_input_checksums(input_paths):
+	"""
+	:return: json object of the checksum of each input file by file name, None if a file is missing
+	:rtype: str
+	"""
+	if not all(os.path.isfile(input_path) for input_path in input_paths):
+		return None
+	input_checksums = {os.path.basename(input_path): file_checksum(input_path) for input_path in input_paths}
+	return json.dumps(input_checksums, sort_keys=True)
+
+
+def read_manifest(db_path):
+	"""
+	:return: the build_manifest rows of a database by stage, empty if the database or its manifest does not exist
+	:rtype: dict
+	"""
+	if not os.path.isfile(db_path):
+		return {}
+	conn = sqlite3.connect(db_path)
+	try:
+		manifest_rows = conn.execute("SELECT stage, input_checksums, row_count, build_seconds, built_at FROM build_manifest").fetchall()
+	except sqlite3.OperationalError:
+		manifest_rows = []
+	finally:
+		conn.close()
+	return {manifest_row[0]: manifest_row for manifest_row in manifest_rows}
+
+
+def list_tables(conn):
+	return {table_row[0] for table_row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+
+def count_rows(conn, table_names):
+	return sum(conn.execute(f'SELECT COUNT(*) FROM "{table_name}"').fetchone()[0] for table_name in table_names)
+
+
+def build_stage_file(stage_name, stage_path, input_paths, jobs=1):
+	"""build the tables of one stage into their own database file, run in a worker process
+	:param jobs: number of worker processes of the stage, if its build function takes them
+	:type jobs: int
+	:return: the build time in seconds
+	:rtype: float
+	"""
+	start_time = time.perf_counter()
+	conn = sqlite3.connect(stage_path)
+	try:
+		apply_build_pragmas(conn)
+		input_methods, build_function, takes_jobs = build_stages[stage_name]
+		if takes_jobs:
+			build_function(conn, *input_paths, jobs)
+		else:
+			build_function(conn, *input_paths)
+	finally:
+		conn.close()
+	return time.perf_counter() - start_time
+
+
+def plan_build(conf, stage_names, live_manifest, force=False):
+	"""decide for every stage whether it is built, or its tables are kept from the live database
+	:return: list of (stage name, status, input paths, input checksums), status is one of
+		build, unchanged (inputs have the same checksums as at the last build) or missing inputs
+	:rtype: list
+	"""
+	build_plan = []
+	for stage_name in stage_names:
+		input_paths = get_stage_inputs(conf, stage_name)
+		input_checksums = collect_input_checksums(input_paths)
+		if input_checksums is None:
+			status = "missing inputs"
+		elif not force and stage_name in live_manifest and live_manifest[stage_name][1] == input_checksums:
+			status = "unchanged"
+		else:
+			status = "build"
+		build_plan.append((stage_name, status, input_paths, input_checksums))
+	return build_plan
+
+
+def print_report(report_rows):
+	print(f"{'stage':<12}{'status':<16}{'seconds':>10}{'rows':>12}")
+	for stage_name, status, stage_seconds, row_count in report_rows:
+		seconds_text = "-" if stage_seconds is None else f"{stage_seconds:.2f}"
+		rows_text = "-" if row_count is None else str(row_count)
+		print(f"{stage_name:<12}{status:<16}{seconds_text:>10}{rows_text:>12}")
+
+
+def run_build(conf, stage_names=None, force=False, jobs=1):
+	"""build the stages whose input files changed since the last build into a new database file and swap it in
+	the tables of all other stages are copied from the live database, BiGG and MetaCyc are built concurrently
+	with the ModelSEED stage, and the checksums of the input files are recorded in the build_manifest table
+	:param stage_names: stages to check, by default all stages
+	:type stage_names: list
+	:param force: build the stages even if their inputs did not change
+	:type force: bool
+	:param jobs: number of worker processes preparing the ModelSEED and MetaCyc records
+	:type jobs: int
+	:return: (stage, status, seconds, rows) for every stage
+	:rtype: list
+	:raises FileNotFoundError: if the ModelSEED flatfiles are missing and there is no database to keep them from
+	"""
+	db_path = conf.get_database_path()
+	live_manifest = read_manifest(db_path)
+	build_plan = plan_build(conf, stage_names or list(build_stages), live_manifest, force)
+	if any(stage_name == 'modelseed' and status == "missing inputs" for stage_name, status, input_paths, input_checksums in build_plan) \
+			and 'modelseed' not in live_manifest:
+		raise FileNotFoundError("ModelSEED flatfiles not found, please check the files and maybe run 'get_modelseed_flatfiles.sh'")
+
+	# stage name -> (status, seconds, rows) for the report
+	stage_results = {}
+	for stage_name, status, input_paths, input_checksums in build_plan:
+		if status != "build":
+			kept_row_count = live_manifest[stage_name][2] if stage_name in live_manifest else None
+			stage_results[stage_name] = (status, None, kept_row_count)
+	stages_to_build = [(stage_name, input_paths, input_checksums) for stage_name, status, input_paths, input_checksums in build_plan if status == "build"]
+	if not stages_to_build:
+		print("the database is up to date")
+		report_rows = [(stage_name, *stage_results[stage_name]) for stage_name, status, input_paths, input_checksums in build_plan]
+		print_report(report_rows)
+		return report_rows
+
+	build_path = get_build_path(db_path)
+	stage_paths = {stage_name: f"{build_path}.{stage_name}" for stage_name, input_paths, input_checksums in stages_to_build
+				   if stage_name in concurrent_stages}
+	manifest_rows = []
+	conn = sqlite3.connect(build_path)
+	try:
+		apply_build_pragmas(conn)
+		conn.execute(creation_stmt_build_manifest)
+		executor = ProcessPoolExecutor(max_workers=len(stage_paths)) if stage_paths else None
+		try:
+			stage_futures = {}
+			for stage_name, input_paths, input_checksums in stages_to_build:
+				if stage_name in stage_paths:
+					stage_futures[stage_name] = executor.submit(build_stage_file, stage_name, stage_paths[stage_name], input_paths, jobs)
+			# the stages built in this process run while the workers build theirs
+			for stage_name, input_paths, input_checksums in sorted(stages_to_build, key=lambda stage: stage[0] in stage_paths):
+				if stage_name in stage_paths:
+					stage_seconds = stage_futures[stage_name].result()
+					stage_tables = copy_extra_tables(conn, stage_paths[stage_name])
+				else:
+					start_time = time.perf_counter()
+					tables_before = list_tables(conn)
+					build_modelseed_tables(conn, *input_paths, jobs)
+					stage_tables = list_tables(conn) - tables_before
+					stage_seconds = time.perf_counter() - start_time
+				row_count = count_rows(conn, stage_tables)
+				manifest_rows.append((stage_name, input_checksums, row_count, stage_seconds, datetime.now().isoformat(timespec='seconds')))
+				stage_results[stage_name] = ("built", stage_seconds, row_count)
+		finally:
+			if executor is not None:
+				executor.shutdown(wait=True, cancel_futures=True)
+			for stage_path in stage_paths.values():
+				if os.path.exists(stage_path):
+					os.remove(stage_path)
+
+		# the stages which were not built keep their tables and manifest rows from the live database,
+		# also the stages left out of stage_names
+		built_stages = {stage_name for stage_name, input_paths, input_checksums in stages_to_build}
+		for stage_name, manifest_row in live_manifest.items():
+			if stage_name not in built_stages:
+				manifest_rows.append(manifest_row)
+		conn.executemany(insert_stmt_build_manifest, manifest_rows)
+		conn.commit()
+		if os.path.isfile(db_path):
+			copy_extra_tables(conn, db_path)
+
+		start_time = time.perf_counter()
+		finalize_database(conn)
+		conn.close()
+		swap_database(build_path, db_path)
+		finalize_seconds = time.perf_counter() - start_time
+	except BaseException:
+		conn.close()
+		if os.path.exists(build_path):
+			os.remove(build_path)
+		raise
+	report_rows = [(stage_name, *stage_results[stage_name]) for stage_name, status, input_paths, input_checksums in build_plan]
+	report_rows.append(("finalize", "done", finalize_seconds, None))
+	print_report(report_rows)
+	return report_rows
@@ -0,0 +1,339 @@
+import re
+import json
+import time
+import hashlib
+import itertools
+import collections
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+
+# incremental json parser, the stdlib decoder is used if it is not installed
+try:
+	import ijson
+except ImportError:
+	ijson = None
+
+
+# settings for the bulk load of a fresh database,
+# a crash during the build leaves a broken file, which is simply built again
+build_pragmas = [
+	"PRAGMA journal_mode = OFF",
+	"PRAGMA synchronous = OFF",
+	"PRAGMA cache_size = -262144",
+	"PRAGMA temp_store = MEMORY",
+	"PRAGMA foreign_keys = 1"
+]
+
+
+def apply_build_pragmas(conn):
+	for stmt in build_pragmas:
+		conn.execute(stmt)
+
+
+def parse_aliases(alias_list):
+	"""split the aliases of a ModelSEED record by namespace, in one pass over the list
+	every namespace is kept, not only KEGG, BiGG and MetaCyc,
+	and each alias is listed once per namespace in the order of the record
+	example data:
+	"aliases": [
+            "AraCyc: CATAL-RXN",
+            "BiGG: CAT; CATp; CTA1; CTT1",
+            "BrachyCyc: CATAL-RXN",
+            "KEGG: R00009",
+            "MetaCyc: CATAL-RXN; RXN-12121",
+
+	:return: the aliases of each namespace, keyed by the namespace as written in the record
+	:rtype: dict
+	"""
+	db_alias_dict = {}
+	for entry in alias_list:
+		namespace, separator, aliases = entry.partition(":")
+		if not separator:
+			continue
+		# dictionaries keep the insertion order, so their keys serve as ordered sets
+		namespace_aliases = db_alias_dict.setdefault(namespace.strip(), {})
+		for alias in aliases.split(";"):
+			alias = alias.strip()
+			if alias:
+				namespace_aliases[alias] = None
+	return {namespace: list(namespace_aliases) for namespace, namespace_aliases in db_alias_dict.items()}
+
+
+def change_identifier(identifier, db_type):
+	if db_type == "compound":
+		prefix = "c_"
+	elif db_type == "reaction":
+		prefix = "v_"
+	id_new = identifier
+	if id_new[0].isdigit():
+		id_new = ''.join((prefix, id_new))
+	id_new = id_new.replace('.', '_').replace('-', '__').replace('+', '')
+	return id_new
+
+
+def flatten_record(record, fields_list, joined_fields):
+	"""turn one ModelSEED json record into the column values of its table
+	lists are joined with |#|, dictionaries are joined as key+value strings
+	:param joined_fields: list fields which are always joined, e.g. aliases and notes
+	"""
+	record_list = []
+	for field in fields_list:
+		value = record[field]
+		if value is None:
+			data = "null"
+		elif field in joined_fields:
+			# an empty list is stored like a missing value
+			if value == []:
+				data = "null"
+			elif len(value) == 1:
+				data = value[0]
+			else:
+				data = "|#|".join(value)
+		# some other fields could be lists or dictionaries
+		# such as "ontology"
+		elif isinstance(value, list):
+			if len(value) == 1:
+				data = value[0]
+			else:
+				data = "|#|".join(value)
+		elif isinstance(value, dict):
+			# turn the dictionary into a list and join it
+			tmp = [str(key) + str(value[key]) for key in value]
+			data = "|#|".join(tmp)
+		else:
+			data = value
+		record_list.append(data)
+	return record_list
+
+
+def split_quoted(text, separator):
+	"""split a string at a separator which is not inside double quotes, e.g. the compound names in a stoichiometry"""
+	return re.findall(f'(?:[^{re.escape(separator)}"]|"[^"]*")+', text)
+
+
+def split_record_attributes(record, attribute_fields):
+	"""split the multi-value fields of one ModelSEED json record into one (attribute, position, value) per value
+	lists give one value per element, dictionaries one attribute per key (e.g. ontology.class)
+	and string fields are split at their separator
+	:param attribute_fields: field name -> separator of the values if the field is a string, None otherwise
+	:type attribute_fields: dict
+	:rtype: list
+	"""
+	attribute_values = []
+	for field, separator in attribute_fields.items():
+		value = record.get(field)
+		if value is None:
+			continue
+		if isinstance(value, dict):
+			attribute_items = [(f"{field}.{key}", key_value) for key, key_value in value.items()]
+		elif isinstance(value, str) and separator is not None:
+			attribute_items = [(field, split_quoted(value, separator))]
+		else:
+			attribute_items = [(field, value)]
+		for attribute, values in attribute_items:
+			if not isinstance(values, list):
+				values = [values]
+			for position, single_value in enumerate(values):
+				if single_value is not None and single_value != "":
+					attribute_values.append((attribute, position, str(single_value).strip()))
+	return attribute_values
+
+
+def iter_json_array(json_path, chunk_size=1048576):
+	"""yield the elements of the top-level array of a json file one at a time,
+	so a whole flatfile never has to be held in memory
+	uses ijson if it is installed, otherwise the file is decoded chunk by chunk with the stdlib decoder
+	numbers are returned as float, like json.load does
+	"""
+	if ijson is not None:
+		with open(json_path, 'rb') as json_file:
+			yield from ijson.items(json_file, 'item', use_float=True)
+	else:
+		with open(json_path, 'r', encoding='utf-8') as json_file:
+			yield from iter_json_array_stdlib(json_file, chunk_size)
+
+
+def iter_json_array_stdlib(json_file, chunk_size=1048576):
+	"""decode the elements of a top-level json array from a text file with json.JSONDecoder.raw_decode,
+	reading more of the file whenever an element is not complete yet
+	"""
+	decoder = json.JSONDecoder()
+	buffer = ""
+	position = 0
+	end_of_file = False
+	array_started = False
+
+	while True:
+		# skip whitespace and the separators between the elements
+		while position < len(buffer) and buffer[position] in " \t\r\n,":
+			if buffer[position] == "," and not array_started:
+				raise ValueError("expected a json array")
+			position += 1
+		if position < len(buffer):
+			if not array_started:
+				if buffer[position] != "[":
+					raise ValueError("expected a json array")
+				array_started = True
+				position += 1
+				continue
+			if buffer[position] == "]":
+				return
+			try:
+				element, element_end = decoder.raw_decode(buffer, position)
+			except json.JSONDecodeError:
+				if end_of_file:
+					raise
+				element_end = None
+			# an element is complete once a delimiter follows it,
+			# a number like 1.5 at the end of the buffer might continue as 1.5e3 in the next chunk
+			if element_end is not None and (end_of_file or (element_end < len(buffer) and buffer[element_end] in " \t\r\n,]")):
+				yield element
+				position = element_end
+				continue
+		elif end_of_file:
+			raise ValueError("unexpected end of json array")
+		# drop what has been decoded already and read the next chunk
+		buffer = buffer[position:]
+		position = 0
+		chunk = json_file.read(chunk_size)
+		if chunk:
+			buffer += chunk
+		else:
+			end_of_file = True
+
+
+def iter_chunks(items, chunk_size):
+	"""yield lists of up to chunk_size items, reading the items lazily"""
+	items = iter(items)
+	while True:
+		chunk = list(itertools.islice(items, chunk_size))
+		if not chunk:
+			return
+		yield chunk
+
+
+def map_chunks_in_order(function, items, jobs=1, chunk_size=2000):
+	"""apply a function to lists of chunk_size items and yield its results in the order of the items
+	with more than one job the chunks are processed in a process pool, while the caller stays the only writer
+	at most two chunks per worker are pending, so the items are still streamed
+	:param function: a module-level function taking a list of items, so it can be sent to the workers
+	"""
+	if jobs == 1:
+		for chunk in iter_chunks(items, chunk_size):
+			yield function(chunk)
+		return
+	with ProcessPoolExecutor(max_workers=jobs) as executor:
+		pending_results = collections.deque()
+		for chunk in iter_chunks(items, chunk_size):
+			pending_results.append(executor.submit(function, chunk))
+			if len(pending_results) >= 2 * jobs:
+				yield pending_results.popleft().result()
+		while pending_results:
+			yield pending_results.popleft().result()
+
+
+def next_row_id(c, table_name):
+	"""the first free primary key of a table, so rows can be numbered before they are inserted"""
+	c.execute(f"SELECT COALESCE(MAX(id), 0) + 1 FROM {table_name}")
+	return c.fetchone()[0]
+
+
+def load_row_ids(c, table_name, value_column):
+	"""map the values already stored in a *_ids table to their primary key"""
+	c.execute(f"SELECT {value_column}, id FROM {table_name}")
+	return dict(c.fetchall())
+
+
+def file_checksum(file_path, block_size=1048576):
+	"""sha256 of the contents of a file, read in blocks"""
+	file_hash = hashlib.sha256()
+	with open(file_path, 'rb') as infile:
+		for block in iter(lambda: infile.read(block_size), b""):
+			file_hash.update(block)
+	return file_hash.hexdigest()
+
+
+def record_hash(record):
+	"""fingerprint of a json record, independent of the order of its keys"""
+	record_json = json.dumps(record, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+	return hashlib.sha256(record_json.encode('utf-8')).hexdigest()
+
+
+class RowIdAssigner:
+	"""hands out the primary keys of a *_ids table, so every value is stored once
+	values which are already in the table keep their primary key
+	"""
+	def __init__(self, c, table_name, value_column):
+		self.row_ids = load_row_ids(c, table_name, value_column)
+		self.next_id = next_row_id(c, table_name)
+
+	def get_row_id(self, value):
+		"""
+		:return: the primary key of the value, and whether the value is new and has to be inserted
+		:rtype: tuple
+		"""
+		row_id = self.row_ids.get(value)
+		if row_id is not None:
+			return row_id, False
+		row_id = self.next_id
+		self.next_id += 1
+		self.row_ids[value] = row_id
+		return row_id, True
+
+
+class BulkLoader:
+	"""buffers the rows of several tables and writes them with executemany
+	tables are flushed in the order they were added, so rows referenced by
+	a foreign key are always written before the rows referencing them
+	"""
+	def __init__(self, conn, batch_size=10000):
+		self.conn = conn
+		self.c = conn.cursor()
+		self.batch_size = batch_size
+		self.insert_stmts = {}
+		self.pending_rows = {}
+		self.row_counts = {}
+		self.pending_count = 0
+
+	def add_table(self, table_name, insert_stmt):
+		self.insert_stmts[table_name] = insert_stmt
+		# a table can be added again by a later stage, its pending rows and row count are kept
+		self.pending_rows.setdefault(table_name, [])
+		self.row_counts.setdefault(table_name, 0)
+
+	def add_row(self, table_name, row):
+		self.pending_rows[table_name].append(row)
+		self.pending_count += 1
+		if self.pending_count >= self.batch_size:
+			self.flush()
+
+	def flush(self):
+		for table_name, rows in self.pending_rows.items():
+			if rows:
+				self.c.executemany(self.insert_stmts[table_name], rows)
+				self.row_counts[table_name] += len(rows)
+				rows.clear()
+		self.pending_count = 0
+
+	@contextmanager
+	def stage(self, stage_name):
+		"""run one build stage in a single transaction,
+		then report its wall time and the rows per second written to each table
+		"""
+		counts_before = dict(self.row_counts)
+		start_time = time.perf_counter()
+		self.c.execute("BEGIN")
+		try:
+			yield self
+			self.flush()
+			self.conn.commit()
+		except BaseException:
+			self.conn.rollback()
+			raise
+		elapsed_time = time.perf_counter() - start_time
+		stage_counts = {table_name: row_count - counts_before.get(table_name, 0) for table_name, row_count in self.row_counts.items()}
+		total_rows = sum(stage_counts.values())
+		print(f"{stage_name}: {elapsed_time:.2f} s, {total_rows} rows ({total_rows / max(elapsed_time, 1e-9):.0f} rows/s)")
+		for table_name, row_count in stage_counts.items():
+			if row_count:
+				print(f"\t{table_name}: {row_count} rows")
@@ -0,0 +1,79 @@
+import os
+
+from enlite.classes.DataHandlers import DatabaseHandler
+
+# (*_ids table, alias column, link table, column of the link table referencing the *_ids table)
+alias_tables = [
+	('metacyc_compound_ids', 'linked_id_metacyc', 'metacyc_compound_aliases', 'id_metacyc'),
+	('kegg_compound_ids', 'linked_id_kegg', 'kegg_compound_aliases', 'id_kegg'),
+	('bigg_compound_ids', 'linked_id_bigg', 'bigg_compound_aliases', 'id_bigg'),
+	('metacyc_reaction_ids', 'linked_id_metacyc', 'metacyc_reaction_aliases', 'id_metacyc'),
+	('kegg_reaction_ids', 'linked_id_kegg', 'kegg_reaction_aliases', 'id_kegg'),
+	('bigg_reaction_ids', 'linked_id_bigg', 'bigg_reaction_aliases', 'id_bigg'),
+	('ec_numbers', 'ec_number', 'ec_numbers_linked_reactions', 'id_ecnumber')
+]
+
+
+def has_unique_index(c, table_name, column_name):
+	"""check whether a column already has a UNIQUE constraint or unique index"""
+	c.execute("""
+	SELECT 1 FROM pragma_index_list(?) AS index_list
+		JOIN pragma_index_info(index_list.name) AS index_info
+	WHERE index_list."unique" = 1 AND index_info.name = ?
+	""", (table_name, column_name))
+	return c.fetchone() is not None
+
+
+def compact_alias_table(c, ids_table, alias_column, links_table, link_id_column):
+	"""keep one row per alias in the *_ids table, the one inserted first,
+	point the link table to it and delete the other rows
+	a unique index on the alias column then backs the duplicate check of the build scripts
+	:return: number of rows deleted
+	"""
+	c.execute("DROP TABLE IF EXISTS temp.canonical_ids")
+	c.execute(f"""
+	CREATE TEMP TABLE canonical_ids AS
+	SELECT id AS old_id, MIN(id) OVER (PARTITION BY {alias_column}) AS new_id FROM {ids_table}
+	""")
+	c.execute("DELETE FROM temp.canonical_ids WHERE old_id = new_id")
+	c.execute("CREATE INDEX temp.idx_canonical_ids ON canonical_ids (old_id)")
+	c.execute(f"""
+	UPDATE {links_table} SET {link_id_column} =
+		(SELECT new_id FROM temp.canonical_ids WHERE old_id = {links_table}.{link_id_column})
+	WHERE {link_id_column} IN (SELECT old_id FROM temp.canonical_ids)
+	""")
+	c.execute(f"DELETE FROM {ids_table} WHERE id IN (SELECT old_id FROM temp.canonical_ids)")
+	rows_deleted = c.rowcount
+	if not has_unique_index(c, ids_table, alias_column):
+		c.execute(f"CREATE UNIQUE INDEX idx_unique_{ids_table}_{alias_column} ON {ids_table} ({alias_column})")
+	c.execute("DROP TABLE temp.canonical_ids")
+	return rows_deleted
+
+
+def compact_alias_tables(conn):
+	"""compact all *_ids tables of a database built with duplicate alias rows
+	tables which do not exist in the database are skipped
+	"""
+	c = conn.cursor()
+	c.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+	existing_tables = {table_row[0] for table_row in c.fetchall()}
+	for ids_table, alias_column, links_table, link_id_column in alias_tables:
+		if ids_table not in existing_tables or links_table not in existing_tables:
+			continue
+		rows_deleted = compact_alias_table(c, ids_table, alias_column, links_table, link_id_column)
+		print(f"{ids_table}: removed {rows_deleted} duplicate rows")
+	conn.commit()
+
+
+def compact_database(conf):
+	"""compact the alias tables of the database of the config and give the freed pages back to the file system
+	:return: the file size before and after
+	:rtype: tuple
+	"""
+	db_path = conf.get_database_path()
+	db_handler = DatabaseHandler(db_path)
+	size_before = os.path.getsize(db_path)
+	compact_alias_tables(db_handler.conn)
+	db_handler.conn.execute("VACUUM")
+	db_handler.close_connection()
+	return size_before, os.path.getsize(db_path)
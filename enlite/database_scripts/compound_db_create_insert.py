@@ -1,7 +1,8 @@
-import json
 import sqlite3
+import argparse
 
 from enlite.classes.DataHandlers import DBLConfigLoader
+from . build_utils import apply_build_pragmas, iter_json_array, parse_aliases, change_identifier, flatten_record, split_record_attributes, next_row_id, record_hash, map_chunks_in_order, RowIdAssigner, BulkLoader
 from . sqlite_statements import (
 compound_db_creation,
 creation_stmt_metacyc_compound_aliases,
@@ -10,64 +11,22 @@ creation_stmt_kegg_compound_aliases,
 creation_stmt_kegg_compound_links,
 creation_stmt_bigg_compound_aliases,
 creation_stmt_bigg_compound_links,
-insert_stmt_compounds,
-insert_stmt_metacyc_compound_aliases,
+bulk_insert_stmt_compounds,
+bulk_insert_stmt_metacyc_compound_aliases,
 insert_stmt_metacyc_compound_links,
-insert_stmt_kegg_compound_aliases,
+bulk_insert_stmt_kegg_compound_aliases,
 insert_stmt_kegg_compound_links,
-insert_stmt_bigg_compound_aliases,
-insert_stmt_bigg_compound_links
+bulk_insert_stmt_bigg_compound_aliases,
+insert_stmt_bigg_compound_links,
+creation_stmt_record_hashes,
+insert_stmt_record_hashes,
+creation_stmt_compound_attributes,
+insert_stmt_compound_attributes,
+creation_stmt_compound_xrefs,
+insert_stmt_compound_xrefs
 )
 
 
-def parse_aliases(alias_list):
-	"""
-	example data:
-	"aliases": [
-            "AraCyc: CATAL-RXN",
-            "BiGG: CAT; CATp; CTA1; CTT1",
-            "BrachyCyc: CATAL-RXN",
-            "KEGG: R00009",
-            "MetaCyc: CATAL-RXN; RXN-12121",
-
-	"""
-	db_names = ['KEGG', 'BiGG', 'MetaCyc']
-	db_alias_dict = {}
-	for db in db_names:
-		tmp_list = []
-		for entry in alias_list:
-			if db in entry:
-				if ";" not in entry:
-					# we can assume that there is only
-					# one alias if no semicolon is present
-					db_record = entry.split(" ")[1].strip()
-					tmp_list.append(db_record)
-				else:
-					# remove the db name and colon from the string
-					entry = entry.replace(db, "").replace(":", "")
-					# split at the semicolon separator
-					db_record = entry.split(";")
-					# remove any leftover whitespace
-					# and build tmp_list
-					tmp_list = [alias.strip() for alias in db_record]
-					
-		db_alias_dict[db] = tmp_list
-	
-	return db_alias_dict
-
-
-def change_identifier(identifier, db_type):
-	if db_type == "compound":
-		prefix = "c_"
-	elif db_type == "reaction":
-		prefix = "v_"
-	id_new = identifier
-	if id_new[0].isdigit():
-		id_new = ''.join((prefix, id_new))
-	id_new = id_new.replace('.', '_').replace('-', '__').replace('+', '')
-	return id_new
-
-
 compound_fields_list = [
 'id',
 'abbreviation',
@@ -93,15 +52,6 @@ compound_fields_list = [
 'ontology'
 ]
 
-
-conf = DBLConfigLoader(config_root="../config", project_root="..")
-
-db_path = conf.get_database_path()
-conn = sqlite3.connect(db_path)
-c = conn.cursor()
-c.execute("PRAGMA foreign_keys = 1")
-
-
 compounds_creation_stmts = [
 	compound_db_creation,
 	creation_stmt_metacyc_compound_aliases,
@@ -110,75 +60,124 @@ compounds_creation_stmts = [
 	creation_stmt_kegg_compound_links,
 	creation_stmt_bigg_compound_aliases,
 	creation_stmt_bigg_compound_links,
+	creation_stmt_record_hashes,
+	creation_stmt_compound_attributes,
+	creation_stmt_compound_xrefs
 ]
 
-for stmt in compounds_creation_stmts:
-	c.execute(stmt)
-
-conn.commit()
+# fields stored one value per row in modelseed_compound_attributes: separator of the values if the field is a string
+compound_attribute_fields = {
+	'notes': None,
+	'ontology': None
+}
 
-alias_stmt_dict = {
-	'MetaCyc': [insert_stmt_metacyc_compound_aliases, insert_stmt_metacyc_compound_links],
-	'KEGG': [insert_stmt_kegg_compound_aliases, insert_stmt_kegg_compound_links],
-	'BiGG': [insert_stmt_bigg_compound_aliases, insert_stmt_bigg_compound_links]
+# db name in the aliases: (*_ids table, alias column, insert for the *_ids table, link table, insert for the link table)
+alias_tables_dict = {
+	'MetaCyc': ('metacyc_compound_ids', 'linked_id_metacyc', bulk_insert_stmt_metacyc_compound_aliases, 'metacyc_compound_aliases', insert_stmt_metacyc_compound_links),
+	'KEGG': ('kegg_compound_ids', 'linked_id_kegg', bulk_insert_stmt_kegg_compound_aliases, 'kegg_compound_aliases', insert_stmt_kegg_compound_links),
+	'BiGG': ('bigg_compound_ids', 'linked_id_bigg', bulk_insert_stmt_bigg_compound_aliases, 'bigg_compound_aliases', insert_stmt_bigg_compound_links)
 }
 
 
-comp_json = conf.get_modelseed_compounds()
-
-with open(comp_json, 'r') as comp_data:
-	compound_list = json.load(comp_data)
-	
-	compound_data_list = []
-	for record in compound_list:
-		record_list = []
-		for field in compound_fields_list:
-			if field in {'aliases', 'notes'}:
-				if record[field] is None:
-					data = "null"
-				elif record[field] == []:
-					data = record[field][0]
-				elif len(record[field]) == 1:
-					data = record[field][0]
-				else:
-					data = "|#|".join(record[field])
-			else:
-				if record[field] is None:
-					data = "null"
+def register_compound_tables(loader):
+	"""add the compound tables to the loader, the *_ids tables before the tables linking to them
+	:return: a RowIdAssigner for each *_ids table
+	:rtype: dict
+	"""
+	alias_assigners = {}
+	for db, (ids_table, alias_column, ids_stmt, links_table, links_stmt) in alias_tables_dict.items():
+		loader.add_table(ids_table, ids_stmt)
+		alias_assigners[db] = RowIdAssigner(loader.c, ids_table, alias_column)
+	loader.add_table('modelseed_compounds', bulk_insert_stmt_compounds)
+	for db, (ids_table, alias_column, ids_stmt, links_table, links_stmt) in alias_tables_dict.items():
+		loader.add_table(links_table, links_stmt)
+	loader.add_table('modelseed_compound_attributes', insert_stmt_compound_attributes)
+	loader.add_table('modelseed_compound_xrefs', insert_stmt_compound_xrefs)
+	loader.add_table('modelseed_record_hashes', insert_stmt_record_hashes)
+	return alias_assigners
+
+
+def prepare_compound_record(record):
+	"""the parts of one compound record which do not depend on the rows written before,
+	so they can be computed in the worker processes of a parallel build
+	:return: column values, aliases by database, values of the multi-value fields and hash of the record
+	:rtype: tuple
+	"""
+	record_list = flatten_record(record, compound_fields_list, {'aliases', 'notes'})
+	alias_dict = parse_aliases(record['aliases']) if record['aliases'] is not None else {}
+	attribute_values = split_record_attributes(record, compound_attribute_fields)
+	return record_list, alias_dict, attribute_values, record_hash(record)
+
+
+def prepare_compound_records(records):
+	return [prepare_compound_record(record) for record in records]
+
+
+def add_compound_rows(loader, record, compound_record_rowid, alias_assigners):
+	"""queue the rows of one compound record, its new aliases, its alias links and xrefs, its attribute values and its hash"""
+	add_prepared_compound_rows(loader, prepare_compound_record(record), compound_record_rowid, alias_assigners)
+
+
+def add_prepared_compound_rows(loader, prepared_record, compound_record_rowid, alias_assigners):
+	record_list, alias_dict, attribute_values, compound_hash = prepared_record
+	loader.add_row('modelseed_compounds', [compound_record_rowid] + record_list)
+
+	for db, (ids_table, alias_column, ids_stmt, links_table, links_stmt) in alias_tables_dict.items():
+		for alias in alias_dict.get(db, []):
+			# every alias is stored once, later links reuse its primary key
+			alias_primary_key_rowid, is_new_alias = alias_assigners[db].get_row_id(alias)
+			if is_new_alias:
+				if db == "MetaCyc":
+					# add the altered id:
+					loader.add_row(ids_table, [alias_primary_key_rowid, alias, change_identifier(alias, "compound")])
 				else:
-					if isinstance(record[field], list):
-						if len(record[field]) == 1:
-							data = record[field][0]
-						else:
-							data = "|#|".join(record[field])
-					elif isinstance(record[field], dict):
-						entry_dict = record[field]
-						tmp = [str(key) + str(entry_dict[key]) for key in entry_dict]
-						data = "|#|".join(tmp)
-					else:
-						data = record[field]
-			record_list.append(data)
-		compound_data_list.append(record_list)
-		
-		c.execute(insert_stmt_compounds, record_list)
-		
-		# get the rowid of the last insert in the main table
-		compound_record_rowid = c.lastrowid
-		
-		if record['aliases'] is not None:
-			alias_dict = parse_aliases(record['aliases'])
-			for db in alias_dict:
-				for alias in alias_dict[db]:
-					if db == "MetaCyc":
-						# add the altered id:
-						alias_list = [alias, change_identifier(alias, "compound")]
-					else:
-						alias_list = [alias]
-					c.execute(alias_stmt_dict[db][0], alias_list)
-					# have to get the primary key from the last insert
-					# for usage in the many-to-many table
-					alias_primary_key_rowid = c.lastrowid
-					c.execute(alias_stmt_dict[db][1], [compound_record_rowid, alias_primary_key_rowid, record_list[0], alias])
-
-	conn.commit()
+					loader.add_row(ids_table, [alias_primary_key_rowid, alias])
+			loader.add_row(links_table, [compound_record_rowid, alias_primary_key_rowid, record_list[0], alias])
+
+	# the xrefs hold the aliases of every namespace
+	for namespace, aliases in alias_dict.items():
+		for alias in aliases:
+			loader.add_row('modelseed_compound_xrefs', [record_list[0], namespace.lower(), alias])
+
+	for attribute, position, value in attribute_values:
+		loader.add_row('modelseed_compound_attributes', [compound_record_rowid, record_list[0], attribute, position, value])
+
+	loader.add_row('modelseed_record_hashes', ['compound', record_list[0], compound_hash])
+
+
+def load_compounds(loader, compound_records, jobs=1):
+	"""write the compounds, their aliases, the links between them, the xrefs and the attribute values
+	the primary keys are assigned here instead of being read back after every insert,
+	so all rows can be written in batches
+	with more than one job the records are prepared in worker processes, the rows are still written in input order
+	"""
+	alias_assigners = register_compound_tables(loader)
+	next_compound_id = next_row_id(loader.c, 'modelseed_compounds')
+	for prepared_records in map_chunks_in_order(prepare_compound_records, compound_records, jobs):
+		for prepared_record in prepared_records:
+			add_prepared_compound_rows(loader, prepared_record, next_compound_id, alias_assigners)
+			next_compound_id += 1
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description="create and fill the ModelSEED compound tables")
+	parser.add_argument('-j', '--jobs', help="number of worker processes preparing the records", type=int, default=1)
+	args = parser.parse_args()
+
+	conf = DBLConfigLoader(config_root="../config", project_root="..")
+
+	db_path = conf.get_database_path()
+	conn = sqlite3.connect(db_path)
+	apply_build_pragmas(conn)
+	loader = BulkLoader(conn)
+
+	with loader.stage("create compound tables"):
+		for stmt in compounds_creation_stmts:
+			loader.c.execute(stmt)
+
+	comp_json = conf.get_modelseed_compounds()
+	# the records are read one at a time and go straight into the batched inserts
+	with loader.stage("load compounds"):
+		load_compounds(loader, iter_json_array(comp_json), args.jobs)
 
+	conn.close()
@@ -0,0 +1,202 @@
+import sqlite3
+
+from enlite.classes.DataHandlers import DatabaseHandler
+from enlite.classes.CustomExceptions import RecordNotFoundError
+from . sqlite_statements import index_creation_stmts, xref_index_creation_stmts
+
+
+def create_indexes(conn):
+	"""create all secondary indexes on the ModelSEED, alias and xref tables
+	can be run on a freshly built or an existing database,
+	indexes which are already present are left untouched, tables the database does not have yet,
+	e.g. the attribute tables of a database built with an older version, are skipped
+	"""
+	c = conn.cursor()
+	c.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+	table_names = {table_row[0] for table_row in c.fetchall()}
+	for stmt in index_creation_stmts + xref_index_creation_stmts:
+		table_name = stmt.split(" ON ")[1].split("(")[0].strip()
+		if table_name not in table_names:
+			print(f"skipped\t{stmt}: no table {table_name}")
+			continue
+		c.execute(stmt)
+	conn.commit()
+
+
+def fetch_sample_id(db_handler, stmt):
+	"""get one existing value from the database to use as a probe,
+	so the fetch methods run all of their statements
+	"""
+	try:
+		db_handler.c.execute(stmt)
+		sample_row = db_handler.c.fetchone()
+	except Exception:
+		sample_row = None
+	if sample_row is None:
+		return "probe"
+	return sample_row[0]
+
+
+def build_probes(db_handler):
+	"""list of (method name, arguments) for every fetch method of the DatabaseHandler
+	"""
+	cpd_id = fetch_sample_id(db_handler, "SELECT cpd_id FROM metacyc_compound_aliases LIMIT 1")
+	rxn_id = fetch_sample_id(db_handler, "SELECT rxn_id FROM metacyc_reaction_aliases LIMIT 1")
+	metacyc_cpd = fetch_sample_id(db_handler, "SELECT linked_id_metacyc FROM metacyc_compound_ids LIMIT 1")
+	metacyc_rxn = fetch_sample_id(db_handler, "SELECT linked_id_metacyc FROM metacyc_reaction_ids LIMIT 1")
+	altered_cpd = fetch_sample_id(db_handler, "SELECT altered_id FROM metacyc_compound_ids LIMIT 1")
+	altered_rxn = fetch_sample_id(db_handler, "SELECT altered_id FROM metacyc_reaction_ids LIMIT 1")
+	bigg_cpd = fetch_sample_id(db_handler, "SELECT linked_id_bigg FROM bigg_compound_aliases LIMIT 1")
+	bigg_rxn = fetch_sample_id(db_handler, "SELECT linked_id_bigg FROM bigg_reaction_aliases LIMIT 1")
+	kegg_cpd = fetch_sample_id(db_handler, "SELECT linked_id_kegg FROM kegg_compound_aliases LIMIT 1")
+	kegg_rxn = fetch_sample_id(db_handler, "SELECT linked_id_kegg FROM kegg_reaction_aliases LIMIT 1")
+	cpd_note = fetch_sample_id(db_handler, "SELECT value FROM modelseed_compound_attributes WHERE attribute = 'notes' LIMIT 1")
+	cpd_namespace = fetch_sample_id(db_handler, "SELECT namespace FROM modelseed_compound_xrefs WHERE namespace NOT IN ('metacyc', 'bigg', 'kegg') LIMIT 1")
+	rxn_namespace = fetch_sample_id(db_handler, "SELECT namespace FROM modelseed_reaction_xrefs WHERE namespace NOT IN ('metacyc', 'bigg', 'kegg') LIMIT 1")
+	rxn_pathway = fetch_sample_id(db_handler, "SELECT value FROM modelseed_reaction_attributes WHERE attribute = 'pathways' LIMIT 1")
+
+	return [
+		('fetch_modelseed_cpd_inchikey', (cpd_id,)),
+		('fetch_modelseed_cpd_info', (cpd_id,)),
+		('fetch_modelseed_rxn_info', (rxn_id,)),
+		('fetch_compound_alias', (cpd_id, 'modelseed')),
+		('fetch_compound_alias', (metacyc_cpd, 'metacyc')),
+		('fetch_compound_alias', (altered_cpd, 'metacyc', True)),
+		('fetch_compound_alias', (bigg_cpd, 'bigg')),
+		('fetch_compound_alias', (kegg_cpd, 'kegg')),
+		('fetch_reaction_alias', (rxn_id, 'modelseed')),
+		('fetch_reaction_alias', (metacyc_rxn, 'metacyc')),
+		('fetch_reaction_alias', (altered_rxn, 'metacyc', True)),
+		('fetch_reaction_alias', (bigg_rxn, 'bigg')),
+		('fetch_reaction_alias', (kegg_rxn, 'kegg')),
+		('fetch_linked_modelseed_cpd_id', ('metacyc', metacyc_cpd)),
+		('fetch_linked_modelseed_cpd_id', ('bigg', bigg_cpd)),
+		('fetch_linked_modelseed_cpd_id', ('kegg', kegg_cpd)),
+		('fetch_linked_modelseed_rxn_id', ('metacyc', metacyc_rxn)),
+		('fetch_linked_modelseed_rxn_id', ('bigg', bigg_rxn)),
+		('fetch_linked_modelseed_rxn_id', ('kegg', kegg_rxn)),
+		('get_normal_metacyc_cpd_id', (altered_cpd,)),
+		('get_normal_metacyc_rxn_id', (altered_rxn,)),
+		('get_altered_metacyc_cpd_id', (metacyc_cpd,)),
+		('get_altered_metacyc_rxn_id', (metacyc_rxn,)),
+		('fetch_metacyc_inchikey', (altered_cpd,)),
+		('fetch_metacyc_cpd_info', (altered_cpd,)),
+		('fetch_metacyc_rxn_info', (altered_rxn,)),
+		('fetch_all_compound_aliases', (cpd_id,)),
+		('fetch_all_reaction_aliases', (rxn_id,)),
+		('fetch_bigg_cpd_info', (bigg_cpd,)),
+		('fetch_bigg_rxn_info', (bigg_rxn,)),
+		('fetch_kegg_cpd_info', (kegg_cpd,)),
+		('fetch_kegg_rxn_info', (kegg_rxn,)),
+		('fetch_modelseed_cpd_info_many', ([cpd_id],)),
+		('fetch_modelseed_rxn_info_many', ([rxn_id],)),
+		('fetch_metacyc_cpd_info_many', ([altered_cpd],)),
+		('fetch_metacyc_cpd_info_many', ([metacyc_cpd], False)),
+		('fetch_metacyc_rxn_info_many', ([altered_rxn],)),
+		('fetch_metacyc_rxn_info_many', ([metacyc_rxn], False)),
+		('fetch_bigg_cpd_info_many', ([bigg_cpd],)),
+		('fetch_bigg_rxn_info_many', ([bigg_rxn],)),
+		('fetch_kegg_cpd_info_many', ([kegg_cpd],)),
+		('fetch_kegg_rxn_info_many', ([kegg_rxn],)),
+		('fetch_cpd_info_by_alias_many', ('bigg', [bigg_cpd])),
+		('fetch_rxn_info_by_alias_many', ('kegg', [kegg_rxn])),
+		('fetch_linked_modelseed_cpd_id_many', ('metacyc', [altered_cpd], True)),
+		('fetch_linked_modelseed_cpd_id_many', ('bigg', [bigg_cpd])),
+		('fetch_linked_modelseed_rxn_id_many', ('metacyc', [altered_rxn], True)),
+		('fetch_linked_modelseed_rxn_id_many', ('kegg', [kegg_rxn])),
+		('fetch_all_compound_aliases_many', ([cpd_id],)),
+		('fetch_all_reaction_aliases_many', ([rxn_id],)),
+		('fetch_compound_alias_many', ([cpd_id], 'modelseed')),
+		('fetch_compound_alias_many', ([altered_cpd], 'metacyc', True)),
+		('fetch_reaction_alias_many', ([rxn_id], 'modelseed')),
+		('fetch_reaction_alias_many', ([bigg_rxn], 'bigg')),
+		('fetch_linked_modelseed_cpd_id', (cpd_namespace, 'probe')),
+		('fetch_linked_modelseed_rxn_id', (rxn_namespace, 'probe')),
+		('fetch_linked_modelseed_cpd_id_many', (cpd_namespace, ['probe'])),
+		('fetch_linked_modelseed_rxn_id_many', (rxn_namespace, ['probe'])),
+		('fetch_namespace_aliases_many', ('compound', [cpd_id], cpd_namespace)),
+		('fetch_namespace_aliases_many', ('reaction', [rxn_id], rxn_namespace)),
+		('fetch_attributes', ('compound', cpd_id)),
+		('fetch_attributes', ('reaction', rxn_id, 'pathways')),
+		('fetch_by_attribute', ('compound', 'notes', cpd_note)),
+		('fetch_by_attribute', ('reaction', 'pathways', rxn_pathway)),
+		('fetch_compound_attributes', (cpd_id,)),
+		('fetch_reaction_attributes', (rxn_id,)),
+		('fetch_compounds_by_attribute', ('notes', cpd_note)),
+		('fetch_reactions_by_attribute', ('pathways', rxn_pathway))
+	]
+
+
+def is_full_scan(plan_detail):
+	"""a plan step is a full table scan if it walks a whole table or index
+	SEARCH steps, virtual tables and constant rows are fine
+	"""
+	if not plan_detail.startswith("SCAN"):
+		return False
+	if "VIRTUAL TABLE" in plan_detail or "CONSTANT ROW" in plan_detail:
+		return False
+	return True
+
+
+def check_index_usage(db_handler):
+	"""run every fetch method of the DatabaseHandler once and check the query plan
+	of each SELECT statement it executes
+	:return: a list of (method name, statement, plan detail) for all full table scans
+	"""
+	captured_stmts = []
+
+	def trace_select(stmt):
+		if stmt.lstrip().upper().startswith(("SELECT", "WITH")):
+			captured_stmts.append(stmt)
+
+	probes = build_probes(db_handler)
+	probed_methods = {method_name for method_name, args in probes}
+	full_scans = []
+	for method_name, args in probes:
+		captured_stmts.clear()
+		db_handler.conn.set_trace_callback(trace_select)
+		try:
+			getattr(db_handler, method_name)(*args)
+		except (RecordNotFoundError, TypeError):
+			# a miss still runs the statements up to the failing one
+			pass
+		except sqlite3.OperationalError as missing_table_error:
+			print(f"skipped\t{method_name}\t{missing_table_error}")
+			continue
+		finally:
+			db_handler.conn.set_trace_callback(None)
+		for stmt in list(captured_stmts):
+			# the trace callback may or may not expand the bound values
+			query_args = (None,) * stmt.count("?")
+			plan = db_handler.explain_query_plan(stmt, query_args)
+			for plan_detail in plan:
+				status = "FULL SCAN" if is_full_scan(plan_detail) else "ok"
+				print(f"{status}\t{method_name}\t{plan_detail}")
+				if status != "ok":
+					full_scans.append((method_name, " ".join(stmt.split()), plan_detail))
+
+	for method_name in dir(db_handler):
+		if method_name.startswith("fetch_") and method_name not in probed_methods:
+			print(f"unchecked\t{method_name}\tno probe defined")
+	return full_scans
+
+
+def add_indexes(conf, check_only=False):
+	"""create the indexes on the database of the config and print the query plan of every fetch method
+	:param check_only: only check the query plans, do not create indexes
+	:type check_only: bool
+	:return: a list of (method name, statement, plan detail) for all full table scans
+	"""
+	db_handler = DatabaseHandler(conf.get_database_path())
+	if not check_only:
+		create_indexes(db_handler.conn)
+
+	full_scans = check_index_usage(db_handler)
+	db_handler.close_connection()
+	if full_scans:
+		print(f"{len(full_scans)} statements do not use an index:")
+		for method_name, stmt, plan_detail in full_scans:
+			print(f"\t{method_name}: {plan_detail}\n\t\t{stmt}")
+	else:
+		print("all fetch methods use an index")
+	return full_scans
@@ -0,0 +1,171 @@
+import os
+import json
+import time
+import sqlite3
+
+from . build_utils import apply_build_pragmas, iter_json_array, record_hash, next_row_id, BulkLoader
+from . build_database import get_build_path, finalize_database, swap_database
+from . compound_db_create_insert import register_compound_tables, add_compound_rows
+from . reaction_db_create_insert import register_reaction_tables, add_reaction_rows
+from . sqlite_statements import (
+creation_stmt_record_hashes,
+creation_stmt_compound_xrefs,
+creation_stmt_reaction_xrefs,
+creation_stmt_compound_attributes,
+creation_stmt_reaction_attributes
+)
+
+
+# how the records of each type are stored:
+# main table, column of the ModelSEED ID, function registering the tables, function adding the rows of one record,
+# (link table, column referencing the main table, column referencing the *_ids table, *_ids table) for all link tables
+# and the attribute table, which has no *_ids table,
+# and the xref table
+delta_specs = {
+	'compound': (
+		'modelseed_compounds', 'cpd_id', register_compound_tables, add_compound_rows,
+		[
+			('metacyc_compound_aliases', 'id_compound', 'id_metacyc', 'metacyc_compound_ids'),
+			('kegg_compound_aliases', 'id_compound', 'id_kegg', 'kegg_compound_ids'),
+			('bigg_compound_aliases', 'id_compound', 'id_bigg', 'bigg_compound_ids'),
+			('modelseed_compound_attributes', 'id_compound', None, None)
+		],
+		'modelseed_compound_xrefs'
+	),
+	'reaction': (
+		'modelseed_reactions', 'rxn_id', register_reaction_tables, add_reaction_rows,
+		[
+			('metacyc_reaction_aliases', 'id_reaction', 'id_metacyc', 'metacyc_reaction_ids'),
+			('kegg_reaction_aliases', 'id_reaction', 'id_kegg', 'kegg_reaction_ids'),
+			('bigg_reaction_aliases', 'id_reaction', 'id_bigg', 'bigg_reaction_ids'),
+			('ec_numbers_linked_reactions', 'id_reaction', 'id_ecnumber', 'ec_numbers'),
+			('modelseed_reaction_attributes', 'id_reaction', None, None)
+		],
+		'modelseed_reaction_xrefs'
+	)
+}
+
+
+def compare_records(c, db_type, records):
+	"""compare the hash of every record with the hash stored at the last build
+	records of databases built without hashes count as changed
+	:return: the added and changed records, the primary keys of the stored records by ModelSEED ID,
+	the IDs of the removed records and the number of unchanged records
+	:rtype: tuple
+	"""
+	main_table, modelseed_column = delta_specs[db_type][:2]
+	c.execute(f"SELECT {modelseed_column}, id FROM {main_table}")
+	primary_keys = dict(c.fetchall())
+	c.execute("SELECT modelseed_id, record_hash FROM modelseed_record_hashes WHERE db_type = ?", (db_type,))
+	stored_hashes = dict(c.fetchall())
+
+	added_records = []
+	changed_records = []
+	seen_ids = set()
+	unchanged_count = 0
+	for record in records:
+		modelseed_id = record['id']
+		seen_ids.add(modelseed_id)
+		if modelseed_id not in primary_keys:
+			added_records.append(record)
+		elif stored_hashes.get(modelseed_id) != record_hash(record):
+			changed_records.append(record)
+		else:
+			unchanged_count += 1
+	removed_ids = [modelseed_id for modelseed_id in primary_keys if modelseed_id not in seen_ids]
+	return added_records, changed_records, primary_keys, removed_ids, unchanged_count
+
+
+def apply_delta(loader, db_type, records):
+	"""apply the added, changed and removed records of one flatfile to the database,
+	together with their alias and EC number links, attribute values and xrefs
+	changed records are written again under their old primary key
+	:return: number of added, changed, removed and unchanged records
+	:rtype: dict
+	"""
+	main_table, modelseed_column, register_tables, add_rows, link_tables, xref_table = delta_specs[db_type]
+	c = loader.c
+	added_records, changed_records, primary_keys, removed_ids, unchanged_count = compare_records(c, db_type, records)
+	rewritten_ids = [record['id'] for record in changed_records] + removed_ids
+	rewritten_keys = json.dumps([primary_keys[modelseed_id] for modelseed_id in rewritten_ids])
+
+	# remove the old rows of changed and removed records, links first because of the foreign keys
+	for links_table, main_key_column, ids_key_column, ids_table in link_tables:
+		c.execute(f"DELETE FROM {links_table} WHERE {main_key_column} IN (SELECT value FROM json_each(?))", (rewritten_keys,))
+	c.execute(f"DELETE FROM {main_table} WHERE id IN (SELECT value FROM json_each(?))", (rewritten_keys,))
+	c.execute("DELETE FROM modelseed_record_hashes WHERE db_type = ? AND modelseed_id IN (SELECT value FROM json_each(?))",
+			  (db_type, json.dumps(removed_ids)))
+	# the xrefs are written again together with the other rows of the records
+	affected_ids = json.dumps(rewritten_ids + [record['id'] for record in added_records])
+	c.execute(f"DELETE FROM {xref_table} WHERE {modelseed_column} IN (SELECT value FROM json_each(?))", (affected_ids,))
+
+	id_assigners = register_tables(loader)
+	for record in changed_records:
+		add_rows(loader, record, primary_keys[record['id']], id_assigners)
+	next_main_id = next_row_id(c, main_table)
+	for record in added_records:
+		add_rows(loader, record, next_main_id, id_assigners)
+		next_main_id += 1
+	loader.flush()
+
+	# aliases and EC numbers which are not linked anymore
+	for links_table, main_key_column, ids_key_column, ids_table in link_tables:
+		if ids_table is None:
+			continue
+		c.execute(f"DELETE FROM {ids_table} WHERE id NOT IN (SELECT {ids_key_column} FROM {links_table})")
+
+	return {
+		'added': len(added_records),
+		'changed': len(changed_records),
+		'removed': len(removed_ids),
+		'unchanged': unchanged_count
+	}
+
+
+def delta_update(conn, compounds_json, reactions_json):
+	"""update an existing database to a new ModelSEED release, each flatfile is applied in one transaction
+	:return: the change summary of compounds and reactions
+	:rtype: dict
+	"""
+	for stmt in [creation_stmt_record_hashes, creation_stmt_compound_xrefs, creation_stmt_reaction_xrefs,
+				 creation_stmt_compound_attributes, creation_stmt_reaction_attributes]:
+		conn.execute(stmt)
+	conn.commit()
+	loader = BulkLoader(conn)
+	change_summary = {}
+	with loader.stage("compound delta"):
+		change_summary['compound'] = apply_delta(loader, 'compound', iter_json_array(compounds_json))
+	with loader.stage("reaction delta"):
+		change_summary['reaction'] = apply_delta(loader, 'reaction', iter_json_array(reactions_json))
+	return change_summary
+
+
+def run_delta_update(conf):
+	"""apply the ModelSEED flatfiles of the config to a copy of its database and swap the copy in,
+	print a summary of the changes
+	"""
+	db_path = conf.get_database_path()
+	start_time = time.perf_counter()
+	# readers keep the old file open, like after a new build, and a failed update leaves it untouched
+	build_path = get_build_path(db_path)
+	conn = sqlite3.connect(build_path)
+	try:
+		live_conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+		try:
+			live_conn.backup(conn)
+		finally:
+			live_conn.close()
+		apply_build_pragmas(conn)
+		change_summary = delta_update(conn, conf.get_modelseed_compounds(), conf.get_modelseed_reactions())
+		finalize_database(conn)
+		conn.close()
+		swap_database(build_path, db_path)
+	except BaseException:
+		conn.close()
+		if os.path.exists(build_path):
+			os.remove(build_path)
+		raise
+	for db_type, changes in change_summary.items():
+		print(f"{db_type}s: {changes['added']} added, {changes['changed']} changed, {changes['removed']} removed, {changes['unchanged']} unchanged")
+	print(f"{db_path} replaced after {time.perf_counter() - start_time:.2f} s")
+	return change_summary
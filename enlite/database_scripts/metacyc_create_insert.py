@@ -1,69 +1,105 @@
-import traceback
+import io
+import os
 import re
 import sqlite3
+import argparse
+import functools
 
 from enlite.classes.DataHandlers import DBLConfigLoader
+from . build_utils import map_chunks_in_order, BulkLoader
 from . sqlite_statements import create_metacyccompounds, create_metacycreactions, metacyc_compounds_insert, metacyc_reactions_insert
 
 
-def meta_parser(filename):
-	"""	takes a filename as argument
-		return a list of lists, with each list containing one metacyc record
-		no fields are merged yet
+def read_metacyc_attributes(filename):
+	"""read the attribute names from the "# Attributes:" block in the header of a MetaCyc flatfile
+	:return: the attribute names in the order of the header, which is the column order of the table
+	:rtype: list
 	"""
-	# this stores each entry for one iteration of the inner parser loop
-	# because annotations to entries come after the entry
-	annotation_tmp = ""
-	
+	databasefields = []
 	with open(filename, mode='r', encoding='ISO-8859-1') as infile:
-		file_block_list = []
 		for line in infile:
-			record_list = []
-			
-			# check comment lines for db fields
-			if line.startswith("#"):
-				# parse databasefields:
-				if line.startswith("# Attributes:"):
-					databasefields = []
-					print("Database fields:")
-					for line in infile:
-						if line == "#\n":
-							break
-						db_field = line.lstrip("#")
-						db_field = db_field.strip()
-						print(db_field)
-						databasefields.append(db_field)
-				# when not dealing with the Attributes block,
-				# ignore the comment lines
-				continue
-				
-			if line.startswith("UNIQUE"):
-				line = line.strip()
-				record_list.append(line)
-				for k in infile:
-					if k.startswith("//"):
-						# reached end of record
-						annotation_tmp = ""
+			if not line.startswith("#"):
+				break
+			if line.startswith("# Attributes:"):
+				for field_line in infile:
+					if field_line == "#\n" or not field_line.startswith("#"):
 						break
-					elif k.startswith("/"):
-						# take care of entries which span
-						# more than one line
-						old_rec = record_list.pop()
-						new_rec = k.strip() + old_rec
-						record_list.append(new_rec)
-						annotation_tmp = new_rec
-						continue
-					elif k.startswith("^COEFFICIENT"):
-						# ignore coefficients
-						continue
-					k = k.strip()
-					record_list.append(k)
-					annotation_tmp = k
-				file_block_list.append(record_list)
-	
-	return databasefields, file_block_list
+					databasefields.append(field_line.lstrip("#").strip())
+				break
+	return databasefields
+
+
+def meta_parser(filename):
+	"""yield the records of a MetaCyc flatfile one at a time, reading every line once"""
+	with open(filename, mode='r', encoding='ISO-8859-1') as infile:
+		yield from parse_metacyc_lines(infile)
+
+
+def parse_metacyc_lines(lines):
+	"""yield the records of the lines of a MetaCyc flatfile
+	each record is a dictionary of attribute name -> list of values, in the order of the file
+	lines starting with / continue the value of the previous line,
+	annotation lines starting with ^ (e.g. ^COEFFICIENT) are skipped
+	"""
+	record = {}
+	last_values = None
+	for line in lines:
+		if line.startswith("//"):
+			# reached end of record
+			if record:
+				yield record
+			record = {}
+			last_values = None
+		elif line.startswith("#") or line.startswith("^"):
+			continue
+		elif line.startswith("/"):
+			# take care of entries which span more than one line
+			if last_values:
+				last_values[-1] = "\n".join((last_values[-1], line[1:].rstrip("\r\n")))
+		else:
+			attribute, separator, value = line.rstrip("\r\n").partition(" - ")
+			if not separator:
+				continue
+			last_values = record.setdefault(attribute, [])
+			last_values.append(value.strip())
+	if record:
+		yield record
+
+
+def find_record_boundaries(filename, chunk_size=4194304):
+	"""split a flatfile into byte ranges of about chunk_size bytes, each ending after a // line,
+	so every range holds whole records
+	:return: list of (start, end) offsets
+	:rtype: list
+	"""
+	file_size = os.path.getsize(filename)
+	byte_ranges = []
+	start = 0
+	with open(filename, mode='rb') as infile:
+		while start < file_size:
+			infile.seek(min(start + chunk_size, file_size))
+			# the rest of the line the seek landed in
+			infile.readline()
+			line = infile.readline()
+			while line and not line.startswith(b"//"):
+				line = infile.readline()
+			end = infile.tell()
+			byte_ranges.append((start, end))
+			start = end
+	return byte_ranges
+
+
+def parse_metacyc_ranges(filename, databasefields, byte_ranges):
+	"""parse the records in byte ranges of a flatfile into table rows, run in the worker processes of a parallel build"""
+	rows = []
+	with open(filename, mode='rb') as infile:
+		for start, end in byte_ranges:
+			infile.seek(start)
+			range_lines = io.TextIOWrapper(io.BytesIO(infile.read(end - start)), encoding='ISO-8859-1')
+			rows.extend(record_to_row(record, databasefields) for record in parse_metacyc_lines(range_lines))
+	return rows
+
 
-	
 def build_formula(form_parts):
 	"""creates a standard chemical formula
 	input from the parsing looks like e.g. (O 12), (C 6)
@@ -78,25 +114,6 @@ def build_formula(form_parts):
 	return formula_return
 
 
-def field_merger(record_list, mapping):
-	"""based on a list of database fields,
-	merge the entries of the input list, such that
-	all entries belonging to the same field are merged
-	"""
-	return_dict = {}
-	# cand is the database field as specified
-	# in the "Attributes" block of the input files
-	for cand in mapping:
-		tmp_list = []
-		for item in record_list:
-			if item.startswith(cand):
-				store = item.strip().split(" - ")[1]
-				tmp_list.append(store)
-		return_dict[cand] = tmp_list
-
-	return return_dict
-
-
 def dict_transform(d):
 	output_dict = {}
 	inner_dict = {}
@@ -116,21 +133,38 @@ def dict_transform(d):
 	return output_dict
 	
 
-def dict_list_transform(d):
-	output_list = []
+def record_to_row(record, databasefields):
+	"""turn one parsed record into the column values of its table, in the order of the attributes"""
 	inner_list = []
-	for k in d:
-		tmp_field = ""
-		if k == 'CHEMICAL-FORMULA' and len(d[k]) > 0:
-			tmp_field = build_formula(d[k])
-		elif len(d[k]) == 0:
+	for field in databasefields:
+		values = record.get(field)
+		if not values:
 			tmp_field = "null"
+		elif field == 'CHEMICAL-FORMULA':
+			tmp_field = build_formula(values)
 		else:
-			tmp_field = ' |##| '.join(d[k])
+			tmp_field = ' |##| '.join(values)
 		inner_list.append(tmp_field)
 	return inner_list
 
 
+def load_metacyc_records(loader, table_name, insert_stmt, filename, jobs=1):
+	"""stream the records of one flatfile into batched inserts
+	with more than one job, ranges of the file are parsed in worker processes and written in the order of the file
+	"""
+	databasefields = read_metacyc_attributes(filename)
+	print(f"{filename}: {len(databasefields)} database fields")
+	loader.add_table(table_name, insert_stmt)
+	if jobs == 1:
+		for record in meta_parser(filename):
+			loader.add_row(table_name, record_to_row(record, databasefields))
+		return
+	parse_ranges = functools.partial(parse_metacyc_ranges, filename, databasefields)
+	for rows in map_chunks_in_order(parse_ranges, find_record_boundaries(filename), jobs, chunk_size=1):
+		for row in rows:
+			loader.add_row(table_name, row)
+
+
 def change_identifiers(identifier, db_type):
 	if db_type == "compound":
 		prefix = "c_"
@@ -143,64 +177,27 @@ def change_identifiers(identifier, db_type):
 	return id_new
 
 
-
-dbl_config = DBLConfigLoader(config_root="../config", project_root="..")
-
-meta_compounds = dbl_config.get_metacyc_compounds()
-meta_reactions = dbl_config.get_metacyc_reactions()
-
-
-cpd_databasefields, compounds_as_list = meta_parser(meta_compounds)
-rxn_databasefields, reactions_as_list = meta_parser(meta_reactions)
+def build_metacyc_tables(conn, meta_compounds, meta_reactions, jobs=1):
+	"""create and fill the MetaCyc tables from the two MetaCyc flatfiles"""
+	loader = BulkLoader(conn)
+	with loader.stage("create metacyc tables"):
+		loader.c.execute(create_metacyccompounds)
+		loader.c.execute(create_metacycreactions)
+	with loader.stage("load metacyc compounds"):
+		load_metacyc_records(loader, 'metacyccompounds', metacyc_compounds_insert, meta_compounds, jobs)
+	with loader.stage("load metacyc reactions"):
+		load_metacyc_records(loader, 'metacycreactions', metacyc_reactions_insert, meta_reactions, jobs)
 
 
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description="create and fill the MetaCyc tables")
+	parser.add_argument('-j', '--jobs', help="number of worker processes parsing the flatfiles", type=int, default=1)
+	args = parser.parse_args()
 
-compounds_big_output = []
-for x in compounds_as_list:
-	# use the mapping list for compounds here
-	try:
-		tmp_dict = field_merger(x, cpd_databasefields)
-	except Exception:
-		print("an error occurred:")
-		traceback.print_exc()
-
-	tmp_list = dict_list_transform(tmp_dict)
-	compounds_big_output.append(tmp_list)
-	
-
-reactions_big_output = []
-for t in reactions_as_list:
-	# use the mapping list for reactions here
-	try:
-		tmp_dict = field_merger(t, rxn_databasefields)
-	except Exception:
-		print("an error occurred:")
-		traceback.print_exc()
-
-	tmp_list = dict_list_transform(tmp_dict)
-	reactions_big_output.append(tmp_list)
-
-
-
-db_path = dbl_config.get_database_path()
-conn = sqlite3.connect(db_path)
-c = conn.cursor()
-c.execute("PRAGMA foreign_keys = 1")
-
-
-try:
-	
-	c.execute(create_metacyccompounds)
-	c.execute(create_metacycreactions)
-	
-	c.executemany(metacyc_compounds_insert, compounds_big_output)
-	c.executemany(metacyc_reactions_insert, reactions_big_output)
-		
-except Exception:
-	print("an error occurred:")
-	traceback.print_exc()
-finally:
-	conn.commit()
-	
-conn.close()
+	dbl_config = DBLConfigLoader(config_root="../config", project_root="..")
 
+	db_path = dbl_config.get_database_path()
+	conn = sqlite3.connect(db_path)
+	conn.execute("PRAGMA foreign_keys = 1")
+	build_metacyc_tables(conn, dbl_config.get_metacyc_compounds(), dbl_config.get_metacyc_reactions(), args.jobs)
+	conn.close()
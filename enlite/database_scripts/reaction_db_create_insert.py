@@ -1,8 +1,8 @@
-import json
-
 import sqlite3
+import argparse
 
 from enlite.classes.DataHandlers import DBLConfigLoader
+from . build_utils import apply_build_pragmas, iter_json_array, parse_aliases, change_identifier, flatten_record, split_record_attributes, next_row_id, record_hash, map_chunks_in_order, RowIdAssigner, BulkLoader
 from . sqlite_statements import (
 reaction_db_creation,
 creation_stmt_metacyc_reaction_aliases,
@@ -13,64 +13,24 @@ creation_stmt_bigg_reaction_aliases,
 creation_stmt_bigg_reaction_links,
 creation_stmt_ec_aliases,
 creation_stmt_ecnumber_links,
-insert_stmt_reactions,
-insert_stmt_ec_aliases,
+bulk_insert_stmt_reactions,
+bulk_insert_stmt_ec_aliases,
 insert_stmt_ec_links,
-insert_stmt_metacyc_reaction_aliases,
+bulk_insert_stmt_metacyc_reaction_aliases,
 insert_stmt_metacyc_reaction_links,
-insert_stmt_kegg_reaction_aliases,
+bulk_insert_stmt_kegg_reaction_aliases,
 insert_stmt_kegg_reaction_links,
-insert_stmt_bigg_reaction_aliases,
-insert_stmt_bigg_reaction_links
+bulk_insert_stmt_bigg_reaction_aliases,
+insert_stmt_bigg_reaction_links,
+creation_stmt_record_hashes,
+insert_stmt_record_hashes,
+creation_stmt_reaction_attributes,
+insert_stmt_reaction_attributes,
+creation_stmt_reaction_xrefs,
+insert_stmt_reaction_xrefs
 )
 
 
-def parse_aliases(alias_list):
-	"""
-	example data:
-	"aliases": [
-            "AraCyc: CATAL-RXN",
-            "BiGG: CAT; CATp; CTA1; CTT1",
-            "BrachyCyc: CATAL-RXN",
-            "KEGG: R00009",
-            "MetaCyc: CATAL-RXN; RXN-12121",
-
-	"""
-	db_names = ['KEGG', 'BiGG', 'MetaCyc']
-	db_alias_dict = {}
-	for db in db_names:
-		tmp_list = []
-		for entry in alias_list:
-			if db in entry:
-				if ";" not in entry:
-					# we can assume that there is only
-					# one alias if no semicolon is present
-					db_record = entry.split(" ")[1].strip()
-					tmp_list.append(db_record)
-				else:
-					# remove the db name and colon from the string
-					entry = entry.replace(db, "").replace(":", "")
-					# split at the semicolon separator
-					db_record = entry.split(";")
-					# remove any leftover whitespace
-					# and build tmp_list
-					tmp_list = [alias.strip() for alias in db_record]
-		db_alias_dict[db] = tmp_list
-	return db_alias_dict
-
-
-def change_identifier(identifier, db_type):
-	if db_type == "compound":
-		prefix = "c_"
-	elif db_type == "reaction":
-		prefix = "v_"
-	id_new = identifier
-	if id_new[0].isdigit():
-		id_new = ''.join((prefix, id_new))
-	id_new = id_new.replace('.', '_').replace('-', '__').replace('+', '')
-	return id_new
-
-
 reaction_fields_list = [
 'id',
 'abbreviation',
@@ -97,14 +57,6 @@ reaction_fields_list = [
 'pathways'
 ]
 
-conf = DBLConfigLoader(config_root="../config", project_root="..")
-
-db_path = conf.get_database_path()
-print(db_path)
-conn = sqlite3.connect(db_path)
-c = conn.cursor()
-c.execute("PRAGMA foreign_keys = 1")
-
 # for the statements, see sqlite_statements.py
 reactions_creation_stmts = [
 	reaction_db_creation,
@@ -115,90 +67,143 @@ reactions_creation_stmts = [
 	creation_stmt_bigg_reaction_aliases,
 	creation_stmt_bigg_reaction_links,
 	creation_stmt_ec_aliases,
-	creation_stmt_ecnumber_links
+	creation_stmt_ecnumber_links,
+	creation_stmt_record_hashes,
+	creation_stmt_reaction_attributes,
+	creation_stmt_reaction_xrefs
 ]
 
-# create the main tables
-for stmt in reactions_creation_stmts:
-	c.execute(stmt)
-
-conn.commit()
+# fields stored one value per row in modelseed_reaction_attributes: separator of the values if the field is a string
+# aliases and EC numbers have their own link tables
+reaction_attribute_fields = {
+	'notes': None,
+	'ontology': None,
+	'pathways': None,
+	'compound_ids': ';',
+	'stoichiometry': ';'
+}
 
-alias_stmt_dict = {
-	'MetaCyc': [insert_stmt_metacyc_reaction_aliases, insert_stmt_metacyc_reaction_links],
-	'KEGG': [insert_stmt_kegg_reaction_aliases, insert_stmt_kegg_reaction_links],
-	'BiGG': [insert_stmt_bigg_reaction_aliases, insert_stmt_bigg_reaction_links]
+# db name in the aliases: (*_ids table, alias column, insert for the *_ids table, link table, insert for the link table)
+alias_tables_dict = {
+	'MetaCyc': ('metacyc_reaction_ids', 'linked_id_metacyc', bulk_insert_stmt_metacyc_reaction_aliases, 'metacyc_reaction_aliases', insert_stmt_metacyc_reaction_links),
+	'KEGG': ('kegg_reaction_ids', 'linked_id_kegg', bulk_insert_stmt_kegg_reaction_aliases, 'kegg_reaction_aliases', insert_stmt_kegg_reaction_links),
+	'BiGG': ('bigg_reaction_ids', 'linked_id_bigg', bulk_insert_stmt_bigg_reaction_aliases, 'bigg_reaction_aliases', insert_stmt_bigg_reaction_links)
 }
 
 
-reac_json = conf.get_modelseed_reactions()
-
-with open(reac_json, 'r') as rea_data:
-	reaction_list = json.load(rea_data)
-	
-	reaction_data_list = []
-	for record in reaction_list:
-		record_list = []
-		for field in reaction_fields_list:
-			if field in {'aliases', 'ec_numbers', 'notes', 'pathways'}:
-				if record[field] is None:
-					data = "null"
-				elif record[field] == []:
-					data = record[field][0]
-				elif len(record[field]) == 1:
-					data = record[field][0]
-				else:
-					data = "|#|".join(record[field])
-			else:
-				if record[field] is None:
-					data = "null"
-				else:
-					# some other fields could be lists or dictionaries
-					# such as "ontology"
-					if isinstance(record[field], list):
-						if len(record[field]) == 1:
-							data = record[field][0]
-						else:
-							data = "|#|".join(record[field])
-					elif isinstance(record[field], dict):
-						entry_dict = record[field]
-						# turn the dictionary into a list and join it
-						tmp = [str(key) + str(entry_dict[key]) for key in entry_dict]
-						data = "|#|".join(tmp)
-					else:
-						data = record[field]
-			record_list.append(data)
-		reaction_data_list.append(record_list)
-		
-		c.execute(insert_stmt_reactions, record_list)
-		
-		# get the rowid of the last insert in the main table
-		reaction_record_rowid = c.lastrowid
-		
-		# if there are aliases, fill the linking tables
-		if record['aliases'] is not None:
-			alias_dict = parse_aliases(record['aliases'])
-			for db in alias_dict:
-				for alias in alias_dict[db]:
-					if db == "MetaCyc":
+def register_reaction_tables(loader):
+	"""add the reaction tables to the loader, the *_ids tables before the tables linking to them
+	:return: a RowIdAssigner for each *_ids table and one for the EC numbers
+	:rtype: dict
+	"""
+	id_assigners = {}
+	for db, (ids_table, alias_column, ids_stmt, links_table, links_stmt) in alias_tables_dict.items():
+		loader.add_table(ids_table, ids_stmt)
+		id_assigners[db] = RowIdAssigner(loader.c, ids_table, alias_column)
+	loader.add_table('ec_numbers', bulk_insert_stmt_ec_aliases)
+	id_assigners['EC'] = RowIdAssigner(loader.c, 'ec_numbers', 'ec_number')
+	loader.add_table('modelseed_reactions', bulk_insert_stmt_reactions)
+	for db, (ids_table, alias_column, ids_stmt, links_table, links_stmt) in alias_tables_dict.items():
+		loader.add_table(links_table, links_stmt)
+	loader.add_table('ec_numbers_linked_reactions', insert_stmt_ec_links)
+	loader.add_table('modelseed_reaction_attributes', insert_stmt_reaction_attributes)
+	loader.add_table('modelseed_reaction_xrefs', insert_stmt_reaction_xrefs)
+	loader.add_table('modelseed_record_hashes', insert_stmt_record_hashes)
+	return id_assigners
+
+
+def prepare_reaction_record(record):
+	"""the parts of one reaction record which do not depend on the rows written before,
+	so they can be computed in the worker processes of a parallel build
+	:return: column values, aliases by database, EC numbers, values of the multi-value fields and hash of the record
+	:rtype: tuple
+	"""
+	record_list = flatten_record(record, reaction_fields_list, {'aliases', 'ec_numbers', 'notes', 'pathways'})
+	alias_dict = parse_aliases(record['aliases']) if record['aliases'] is not None else {}
+	ec_numbers = record['ec_numbers'] if record['ec_numbers'] is not None else []
+	attribute_values = split_record_attributes(record, reaction_attribute_fields)
+	return record_list, alias_dict, ec_numbers, attribute_values, record_hash(record)
+
+
+def prepare_reaction_records(records):
+	return [prepare_reaction_record(record) for record in records]
+
+
+def add_reaction_rows(loader, record, reaction_record_rowid, id_assigners):
+	"""queue the rows of one reaction record, its new aliases and EC numbers, the links to them, its xrefs, its attribute values and its hash"""
+	add_prepared_reaction_rows(loader, prepare_reaction_record(record), reaction_record_rowid, id_assigners)
+
+
+def add_prepared_reaction_rows(loader, prepared_record, reaction_record_rowid, id_assigners):
+	record_list, alias_dict, ec_numbers, attribute_values, reaction_hash = prepared_record
+	loader.add_row('modelseed_reactions', [reaction_record_rowid] + record_list)
+
+	# if there are aliases, fill the linking tables
+	for db, (ids_table, alias_column, ids_stmt, links_table, links_stmt) in alias_tables_dict.items():
+		for alias in alias_dict.get(db, []):
+			# every alias is stored once, later links reuse its primary key
+			alias_primary_key_rowid, is_new_alias = id_assigners[db].get_row_id(alias)
+			if is_new_alias:
+				if db == "MetaCyc":
 					# add the altered id
-						alias_list = [alias, change_identifier(alias, "reaction")]
-					else:
-						alias_list = [alias]
-					c.execute(alias_stmt_dict[db][0], alias_list)
-					# have to get the primary key from the last insert
-					# for usage in the many-to-many table
-					alias_primary_key_rowid = c.lastrowid
-					c.execute(alias_stmt_dict[db][1], [reaction_record_rowid, alias_primary_key_rowid, record_list[0], alias])
-		
-		# fill the linking table for ec numbers
-		if record['ec_numbers'] is not None:
-			ec_list = record['ec_numbers']
-			for ec_number in ec_list:
-				#print(ec_number)
-				c.execute(insert_stmt_ec_aliases, [ec_number])
-				ecnumber_rowid = c.lastrowid
-				c.execute(insert_stmt_ec_links, [reaction_record_rowid, ecnumber_rowid, record_list[0], ec_number])
-	
-	conn.commit()
+					loader.add_row(ids_table, [alias_primary_key_rowid, alias, change_identifier(alias, "reaction")])
+				else:
+					loader.add_row(ids_table, [alias_primary_key_rowid, alias])
+			loader.add_row(links_table, [reaction_record_rowid, alias_primary_key_rowid, record_list[0], alias])
+
+	# fill the linking table for ec numbers
+	for ec_number in ec_numbers:
+		ecnumber_rowid, is_new_ecnumber = id_assigners['EC'].get_row_id(ec_number)
+		if is_new_ecnumber:
+			loader.add_row('ec_numbers', [ecnumber_rowid, ec_number])
+		loader.add_row('ec_numbers_linked_reactions', [reaction_record_rowid, ecnumber_rowid, record_list[0], ec_number])
+
+	# the xrefs hold the aliases of every namespace
+	for namespace, aliases in alias_dict.items():
+		for alias in aliases:
+			loader.add_row('modelseed_reaction_xrefs', [record_list[0], namespace.lower(), alias])
+
+	for attribute, position, value in attribute_values:
+		loader.add_row('modelseed_reaction_attributes', [reaction_record_rowid, record_list[0], attribute, position, value])
 
+	loader.add_row('modelseed_record_hashes', ['reaction', record_list[0], reaction_hash])
+
+
+def load_reactions(loader, reaction_records, jobs=1):
+	"""write the reactions, their aliases and EC numbers, the links between them, the xrefs and the attribute values
+	the primary keys are assigned here instead of being read back after every insert,
+	so all rows can be written in batches
+	with more than one job the records are prepared in worker processes, the rows are still written in input order
+	"""
+	id_assigners = register_reaction_tables(loader)
+	next_reaction_id = next_row_id(loader.c, 'modelseed_reactions')
+	for prepared_records in map_chunks_in_order(prepare_reaction_records, reaction_records, jobs):
+		for prepared_record in prepared_records:
+			add_prepared_reaction_rows(loader, prepared_record, next_reaction_id, id_assigners)
+			next_reaction_id += 1
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description="create and fill the ModelSEED reaction tables")
+	parser.add_argument('-j', '--jobs', help="number of worker processes preparing the records", type=int, default=1)
+	args = parser.parse_args()
+
+	conf = DBLConfigLoader(config_root="../config", project_root="..")
+
+	db_path = conf.get_database_path()
+	print(db_path)
+	conn = sqlite3.connect(db_path)
+	apply_build_pragmas(conn)
+	loader = BulkLoader(conn)
+
+	# create the main tables
+	with loader.stage("create reaction tables"):
+		for stmt in reactions_creation_stmts:
+			loader.c.execute(stmt)
+
+	reac_json = conf.get_modelseed_reactions()
+	# the records are read one at a time and go straight into the batched inserts
+	with loader.stage("load reactions"):
+		load_reactions(loader, iter_json_array(reac_json), args.jobs)
+
+	conn.close()
@@ -154,11 +154,6 @@ VALUES (?, ?, ?, ?, ?, ?)"""
 
 
 
-insert_stmt_ec_aliases = """
-					INSERT INTO ec_numbers (
-					'ec_number')
-					VALUES (?)"""
-					
 insert_stmt_ec_links = """
 					INSERT INTO ec_numbers_linked_reactions (
 					'id_reaction',
@@ -167,10 +162,12 @@ insert_stmt_ec_links = """
 					'ec_number')
 					VALUES (?, ?, ?, ?)"""
 
+# every alias and EC number is stored once in its *_ids table, the build scripts assign the ids
+# and skip duplicates in Python, the UNIQUE constraints make sure none slips through
 creation_stmt_ec_aliases = """
 CREATE TABLE IF NOT EXISTS ec_numbers (
 id INTEGER PRIMARY KEY,
-ec_number TEXT
+ec_number TEXT UNIQUE
 );
 """
 
@@ -189,7 +186,7 @@ FOREIGN KEY(id_ecnumber) REFERENCES ec_numbers(id)
 creation_stmt_metacyc_reaction_aliases = """
 CREATE TABLE IF NOT EXISTS metacyc_reaction_ids (
 id INTEGER PRIMARY KEY,
-linked_id_metacyc TEXT,
+linked_id_metacyc TEXT UNIQUE,
 altered_id TEXT
 );
 """
@@ -208,7 +205,7 @@ FOREIGN KEY(id_metacyc) REFERENCES metacyc_reaction_ids(id)
 creation_stmt_kegg_reaction_aliases = """
 CREATE TABLE IF NOT EXISTS kegg_reaction_ids (
 id INTEGER PRIMARY KEY,
-linked_id_kegg TEXT
+linked_id_kegg TEXT UNIQUE
 );
 """
 
@@ -226,7 +223,7 @@ FOREIGN KEY(id_kegg) REFERENCES kegg_reaction_ids(id)
 creation_stmt_bigg_reaction_aliases = """
 CREATE TABLE IF NOT EXISTS bigg_reaction_ids (
 id INTEGER PRIMARY KEY,
-linked_id_bigg TEXT
+linked_id_bigg TEXT UNIQUE
 );
 """
 
@@ -248,12 +245,6 @@ insert_stmt_metacyc_reaction_links = """
 					'rxn_id',
 					'linked_id_metacyc')
 					VALUES (?, ?, ?, ?)"""
-insert_stmt_metacyc_reaction_aliases = """
-					INSERT INTO metacyc_reaction_ids (
-					'linked_id_metacyc',
-					'altered_id'
-					)
-					VALUES (?, ?)"""
 
 insert_stmt_kegg_reaction_links = """
 					INSERT INTO kegg_reaction_aliases (
@@ -263,12 +254,6 @@ insert_stmt_kegg_reaction_links = """
 					'linked_id_kegg')
 					VALUES (?, ?, ?, ?)"""
 					
-insert_stmt_kegg_reaction_aliases = """
-					INSERT INTO kegg_reaction_ids (
-					'linked_id_kegg'
-					)
-					VALUES (?)"""
-
 insert_stmt_bigg_reaction_links = """
 					INSERT INTO bigg_reaction_aliases (
 					'id_reaction',
@@ -277,17 +262,11 @@ insert_stmt_bigg_reaction_links = """
 					'linked_id_bigg')
 					VALUES (?, ?, ?, ?)"""
 					
-insert_stmt_bigg_reaction_aliases = """
-					INSERT INTO bigg_reaction_ids (
-					'linked_id_bigg'
-					)
-					VALUES (?)"""
-
 
 creation_stmt_metacyc_compound_aliases = """
 CREATE TABLE IF NOT EXISTS metacyc_compound_ids (
 id INTEGER PRIMARY KEY,
-linked_id_metacyc TEXT,
+linked_id_metacyc TEXT UNIQUE,
 altered_id TEXT
 );
 """
@@ -306,7 +285,7 @@ FOREIGN KEY(id_metacyc) REFERENCES metacyc_compound_ids(id)
 creation_stmt_kegg_compound_aliases = """
 CREATE TABLE IF NOT EXISTS kegg_compound_ids (
 id INTEGER PRIMARY KEY,
-linked_id_kegg TEXT
+linked_id_kegg TEXT UNIQUE
 );
 """
 
@@ -324,7 +303,7 @@ FOREIGN KEY(id_kegg) REFERENCES kegg_compound_ids(id)
 creation_stmt_bigg_compound_aliases = """
 CREATE TABLE IF NOT EXISTS bigg_compound_ids (
 id INTEGER PRIMARY KEY,
-linked_id_bigg TEXT
+linked_id_bigg TEXT UNIQUE
 );
 """
 
@@ -346,12 +325,6 @@ insert_stmt_metacyc_compound_links = """
 					'cpd_id',
 					'linked_id_metacyc')
 					VALUES (?, ?, ?, ?)"""
-insert_stmt_metacyc_compound_aliases = """
-					INSERT INTO metacyc_compound_ids (
-					'linked_id_metacyc',
-					'altered_id'
-					)
-					VALUES (?, ?)"""
 
 insert_stmt_kegg_compound_links = """
 					INSERT INTO kegg_compound_aliases (
@@ -361,11 +334,6 @@ insert_stmt_kegg_compound_links = """
 					'linked_id_kegg')
 					VALUES (?, ?, ?, ?)"""
 					
-insert_stmt_kegg_compound_aliases = """
-					INSERT INTO kegg_compound_ids (
-					'linked_id_kegg')
-					VALUES (?)"""
-
 insert_stmt_bigg_compound_links = """
 					INSERT INTO bigg_compound_aliases (
 					'id_compound',
@@ -374,13 +342,11 @@ insert_stmt_bigg_compound_links = """
 					'linked_id_bigg')
 					VALUES (?, ?, ?, ?)"""
 					
-insert_stmt_bigg_compound_aliases = """
-					INSERT INTO bigg_compound_ids (
-					'linked_id_bigg')
-					VALUES (?)"""
-					
-insert_stmt_compounds = """
+
+# statements for the bulk build, the primary keys are assigned by the build script
+bulk_insert_stmt_compounds = """
 INSERT INTO modelseed_compounds (
+'id',
 'cpd_id',
 'abbreviation',
 'name',
@@ -404,11 +370,12 @@ INSERT INTO modelseed_compounds (
 'notes',
 'ontology'
 )
-VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
 """
 
-insert_stmt_reactions = """
+bulk_insert_stmt_reactions = """
 INSERT INTO modelseed_reactions (
+'id',
 'rxn_id',
 'abbreviation',
 'name',
@@ -432,10 +399,54 @@ INSERT INTO modelseed_reactions (
 'ontology',
 'aliases',
 'pathways'
-) 
-VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
 """
 
+bulk_insert_stmt_metacyc_compound_aliases = """
+					INSERT INTO metacyc_compound_ids (
+					'id',
+					'linked_id_metacyc',
+					'altered_id')
+					VALUES (?, ?, ?)"""
+
+bulk_insert_stmt_kegg_compound_aliases = """
+					INSERT INTO kegg_compound_ids (
+					'id',
+					'linked_id_kegg')
+					VALUES (?, ?)"""
+
+bulk_insert_stmt_bigg_compound_aliases = """
+					INSERT INTO bigg_compound_ids (
+					'id',
+					'linked_id_bigg')
+					VALUES (?, ?)"""
+
+bulk_insert_stmt_metacyc_reaction_aliases = """
+					INSERT INTO metacyc_reaction_ids (
+					'id',
+					'linked_id_metacyc',
+					'altered_id')
+					VALUES (?, ?, ?)"""
+
+bulk_insert_stmt_kegg_reaction_aliases = """
+					INSERT INTO kegg_reaction_ids (
+					'id',
+					'linked_id_kegg')
+					VALUES (?, ?)"""
+
+bulk_insert_stmt_bigg_reaction_aliases = """
+					INSERT INTO bigg_reaction_ids (
+					'id',
+					'linked_id_bigg')
+					VALUES (?, ?)"""
+
+bulk_insert_stmt_ec_aliases = """
+					INSERT INTO ec_numbers (
+					'id',
+					'ec_number')
+					VALUES (?, ?)"""
+
 
 create_metacyccompounds = """
 CREATE TABLE IF NOT EXISTS metacyccompounds (
@@ -704,3 +715,153 @@ metacyc_compounds_insert = """
 	)
 	VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)
 """
+
+
+# one row per value of the multi-value fields of a record, e.g. every note, pathway or compound of a reaction,
+# the |#| joined columns of the main tables are kept as they are
+creation_stmt_compound_attributes = """
+CREATE TABLE IF NOT EXISTS modelseed_compound_attributes (
+id_compound INTEGER,
+cpd_id TEXT,
+attribute TEXT,
+position INTEGER,
+value TEXT,
+FOREIGN KEY(id_compound) REFERENCES modelseed_compounds(id)
+);
+"""
+
+creation_stmt_reaction_attributes = """
+CREATE TABLE IF NOT EXISTS modelseed_reaction_attributes (
+id_reaction INTEGER,
+rxn_id TEXT,
+attribute TEXT,
+position INTEGER,
+value TEXT,
+FOREIGN KEY(id_reaction) REFERENCES modelseed_reactions(id)
+);
+"""
+
+insert_stmt_compound_attributes = """
+					INSERT INTO modelseed_compound_attributes (
+					'id_compound',
+					'cpd_id',
+					'attribute',
+					'position',
+					'value')
+					VALUES (?, ?, ?, ?, ?)"""
+
+insert_stmt_reaction_attributes = """
+					INSERT INTO modelseed_reaction_attributes (
+					'id_reaction',
+					'rxn_id',
+					'attribute',
+					'position',
+					'value')
+					VALUES (?, ?, ?, ?, ?)"""
+
+
+# secondary indexes for the lookup columns used by DatabaseHandler
+# these are created after the ModelSEED tables have been filled
+index_creation_stmts = [
+	"CREATE INDEX IF NOT EXISTS idx_modelseed_compounds_cpd_id ON modelseed_compounds (cpd_id)",
+	"CREATE INDEX IF NOT EXISTS idx_modelseed_reactions_rxn_id ON modelseed_reactions (rxn_id)",
+	"CREATE INDEX IF NOT EXISTS idx_metacyc_compound_aliases_cpd_id ON metacyc_compound_aliases (cpd_id)",
+	"CREATE INDEX IF NOT EXISTS idx_metacyc_compound_aliases_linked_id ON metacyc_compound_aliases (linked_id_metacyc)",
+	"CREATE INDEX IF NOT EXISTS idx_kegg_compound_aliases_cpd_id ON kegg_compound_aliases (cpd_id)",
+	"CREATE INDEX IF NOT EXISTS idx_kegg_compound_aliases_linked_id ON kegg_compound_aliases (linked_id_kegg)",
+	"CREATE INDEX IF NOT EXISTS idx_bigg_compound_aliases_cpd_id ON bigg_compound_aliases (cpd_id)",
+	"CREATE INDEX IF NOT EXISTS idx_bigg_compound_aliases_linked_id ON bigg_compound_aliases (linked_id_bigg)",
+	"CREATE INDEX IF NOT EXISTS idx_metacyc_reaction_aliases_rxn_id ON metacyc_reaction_aliases (rxn_id)",
+	"CREATE INDEX IF NOT EXISTS idx_metacyc_reaction_aliases_linked_id ON metacyc_reaction_aliases (linked_id_metacyc)",
+	"CREATE INDEX IF NOT EXISTS idx_kegg_reaction_aliases_rxn_id ON kegg_reaction_aliases (rxn_id)",
+	"CREATE INDEX IF NOT EXISTS idx_kegg_reaction_aliases_linked_id ON kegg_reaction_aliases (linked_id_kegg)",
+	"CREATE INDEX IF NOT EXISTS idx_bigg_reaction_aliases_rxn_id ON bigg_reaction_aliases (rxn_id)",
+	"CREATE INDEX IF NOT EXISTS idx_bigg_reaction_aliases_linked_id ON bigg_reaction_aliases (linked_id_bigg)",
+	"CREATE INDEX IF NOT EXISTS idx_metacyc_compound_ids_altered_id ON metacyc_compound_ids (altered_id)",
+	"CREATE INDEX IF NOT EXISTS idx_metacyc_compound_ids_linked_id ON metacyc_compound_ids (linked_id_metacyc)",
+	"CREATE INDEX IF NOT EXISTS idx_metacyc_reaction_ids_altered_id ON metacyc_reaction_ids (altered_id)",
+	"CREATE INDEX IF NOT EXISTS idx_metacyc_reaction_ids_linked_id ON metacyc_reaction_ids (linked_id_metacyc)",
+	"CREATE INDEX IF NOT EXISTS idx_modelseed_compound_attributes_cpd_id ON modelseed_compound_attributes (cpd_id, attribute)",
+	"CREATE INDEX IF NOT EXISTS idx_modelseed_compound_attributes_value ON modelseed_compound_attributes (attribute, value, id_compound, cpd_id)",
+	"CREATE INDEX IF NOT EXISTS idx_modelseed_reaction_attributes_rxn_id ON modelseed_reaction_attributes (rxn_id, attribute)",
+	"CREATE INDEX IF NOT EXISTS idx_modelseed_reaction_attributes_value ON modelseed_reaction_attributes (attribute, value, id_reaction, rxn_id)"
+]
+
+
+# one row per (ModelSEED ID, namespace, alias) for every namespace of the ModelSEED aliases,
+# the namespaces are stored in lowercase, e.g. kegg, bigg, metacyc, aracyc, rhea
+creation_stmt_compound_xrefs = """
+CREATE TABLE IF NOT EXISTS modelseed_compound_xrefs (
+cpd_id TEXT,
+namespace TEXT,
+alias TEXT
+);
+"""
+
+creation_stmt_reaction_xrefs = """
+CREATE TABLE IF NOT EXISTS modelseed_reaction_xrefs (
+rxn_id TEXT,
+namespace TEXT,
+alias TEXT
+);
+"""
+
+insert_stmt_compound_xrefs = """
+					INSERT INTO modelseed_compound_xrefs (
+					'cpd_id',
+					'namespace',
+					'alias')
+					VALUES (?, ?, ?)"""
+
+insert_stmt_reaction_xrefs = """
+					INSERT INTO modelseed_reaction_xrefs (
+					'rxn_id',
+					'namespace',
+					'alias')
+					VALUES (?, ?, ?)"""
+
+xref_index_creation_stmts = [
+	"CREATE INDEX IF NOT EXISTS idx_modelseed_compound_xrefs_cpd_namespace ON modelseed_compound_xrefs (cpd_id, namespace)",
+	"CREATE INDEX IF NOT EXISTS idx_modelseed_compound_xrefs_namespace_alias ON modelseed_compound_xrefs (namespace, alias, cpd_id)",
+	"CREATE INDEX IF NOT EXISTS idx_modelseed_reaction_xrefs_rxn_namespace ON modelseed_reaction_xrefs (rxn_id, namespace)",
+	"CREATE INDEX IF NOT EXISTS idx_modelseed_reaction_xrefs_namespace_alias ON modelseed_reaction_xrefs (namespace, alias, rxn_id)"
+]
+
+
+# hash of every ModelSEED record at the last build, used by delta_update.py
+creation_stmt_record_hashes = """
+CREATE TABLE IF NOT EXISTS modelseed_record_hashes (
+db_type TEXT,
+modelseed_id TEXT,
+record_hash TEXT,
+PRIMARY KEY (db_type, modelseed_id)
+) WITHOUT ROWID;
+"""
+
+insert_stmt_record_hashes = """
+					INSERT OR REPLACE INTO modelseed_record_hashes (
+					'db_type',
+					'modelseed_id',
+					'record_hash')
+					VALUES (?, ?, ?)"""
+
+
+# checksums of the input files of every build stage, used by build_pipeline.py to skip unchanged stages
+creation_stmt_build_manifest = """
+CREATE TABLE IF NOT EXISTS build_manifest (
+stage TEXT PRIMARY KEY,
+input_checksums TEXT,
+row_count INTEGER,
+build_seconds REAL,
+built_at TEXT
+);
+"""
+
+insert_stmt_build_manifest = """
+					INSERT OR REPLACE INTO build_manifest (
+					'stage',
+					'input_checksums',
+					'row_count',
+					'build_seconds',
+					'built_at')
+					VALUES (?, ?, ?, ?, ?)"""
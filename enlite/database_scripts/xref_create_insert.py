@@ -0,0 +1,50 @@
+import sqlite3
+
+from . build_utils import parse_aliases, BulkLoader
+from . sqlite_statements import (
+creation_stmt_compound_xrefs,
+creation_stmt_reaction_xrefs,
+insert_stmt_compound_xrefs,
+insert_stmt_reaction_xrefs,
+xref_index_creation_stmts
+)
+
+
+# ModelSEED table, column of the ModelSEED ID, xref table and its insert for compounds and reactions
+xref_specs = [
+	('modelseed_compounds', 'cpd_id', 'modelseed_compound_xrefs', insert_stmt_compound_xrefs),
+	('modelseed_reactions', 'rxn_id', 'modelseed_reaction_xrefs', insert_stmt_reaction_xrefs)
+]
+
+
+def build_xref_tables(conn):
+	"""fill the xref tables with one row per (ModelSEED ID, namespace, alias) from the aliases column of the ModelSEED tables,
+	for databases built before the build wrote the xrefs of every namespace
+	the tables are emptied first, so this can be rerun on an existing database
+	"""
+	loader = BulkLoader(conn)
+	with loader.stage("create xref tables"):
+		loader.c.execute(creation_stmt_compound_xrefs)
+		loader.c.execute(creation_stmt_reaction_xrefs)
+		loader.c.execute("DELETE FROM modelseed_compound_xrefs")
+		loader.c.execute("DELETE FROM modelseed_reaction_xrefs")
+	for main_table, modelseed_column, xref_table, insert_stmt in xref_specs:
+		with loader.stage(f"fill {xref_table}"):
+			loader.add_table(xref_table, insert_stmt)
+			# a second cursor reads the records while the loader writes
+			for modelseed_id, aliases in conn.execute(f"SELECT {modelseed_column}, aliases FROM {main_table} ORDER BY id"):
+				if aliases is None or aliases == "null":
+					continue
+				for namespace, namespace_aliases in parse_aliases(aliases.split("|#|")).items():
+					for alias in namespace_aliases:
+						loader.add_row(xref_table, [modelseed_id, namespace.lower(), alias])
+	for stmt in xref_index_creation_stmts:
+		conn.execute(stmt)
+	conn.commit()
+
+
+def add_xref_tables(conf):
+	"""build the xref tables into the database of the config, e.g. one built with an older version"""
+	conn = sqlite3.connect(conf.get_database_path())
+	build_xref_tables(conn)
+	conn.close()
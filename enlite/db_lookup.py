@@ -1,70 +1,232 @@
+import os
+import sys
 import argparse
 from argparse import RawTextHelpFormatter
 
 from enlite.classes.DataHandlers import DBLConfigLoader, Filehandler, DatabaseHandler
-from enlite.classes.CustomExceptions import RecordNotFoundError
 from enlite.classes.Reporters import Enliter
+from enlite.classes.CustomExceptions import LookupServiceError
 
+# the bulk, streaming and server modes import their classes where they are used,
+# so --help and single lookups do not pay for multiprocessing, csv or the socket servers
+
+# subcommand: (help, db type, argument holding the input data, kind of lookup)
+lookup_commands = {
+    'cpd_info': ('find data on one or more compound IDs', 'compound', 'input_data', 'info'),
+    'rxn_info': ('find data on one or more reaction IDs', 'reaction', 'input_data', 'info'),
+    'cpd_single': ('find one aliases of one or more compound IDs', 'compound', 'cpd_data', 'single'),
+    'cpd_multi': ('find all aliases of one or more compound IDs', 'compound', 'cpd_data', 'multi'),
+    'rxn_single': ('find one aliases of one or more reaction IDs', 'reaction', 'rxn_data', 'single'),
+    'rxn_multi': ('find all aliases of one or more reaction IDs', 'reaction', 'rxn_data', 'multi')
+}
+
+database_letters_help = "\n\tm: ModelSEED\n\tc: MetaCyc\n\tk: KEGG\n\tb: BiGG"
+
+# the output formats and flush policies of the RecordWriter of the streaming mode
+output_formats = ('tsv', 'csv', 'jsonl')
+flush_policies = ('line', 'chunk', 'end')
+
+
+def add_stream_arguments(subcommand_parser):
+    subcommand_parser.add_argument('-s', '--stream', help="read the list in chunks and write the results of each chunk right away", dest='stream', action='store_true')
+    subcommand_parser.add_argument('-f', '--format', help="output format of the streaming mode\n\ttsv, csv or jsonl (default: tsv)", choices=output_formats, dest='output_format', default='tsv', metavar="")
+    subcommand_parser.add_argument('--output', help="file the streaming mode writes to (default: stdout)", dest='output_file', metavar="")
+    subcommand_parser.add_argument('--chunk-size', help="number of IDs resolved per query in the streaming mode (default: 5000)", dest='chunk_size', type=int, default=5000, metavar="")
+    subcommand_parser.add_argument('--flush', help="when the streaming mode flushes its output\n\tline: after every row\n\tchunk: after every chunk (default)\n\tend: at the end", choices=flush_policies, dest='flush_policy', default='chunk', metavar="")
+
+
+def add_server_argument(subcommand_parser):
+    subcommand_parser.add_argument('--server', help="send the lookup to the daemon started with 'serve',\noptionally with the path of its socket", dest='server', nargs='?', const="", metavar="")
+
+
+def add_lookup_arguments(subcommand_parser, command):
+    db_type, data_argument, lookup_kind = lookup_commands[command][1:]
+    usage_arguments = "input_data -i [-l] [-al]" if lookup_kind == 'info' else "input_data -i -o [-l] [-al]"
+    if lookup_kind == 'multi':
+        usage_arguments += " [-j]"
+    subcommand_parser.usage = f"python db_lookup.py {command} [-h] {usage_arguments} [-s [-f] [--output] [--chunk-size] [--flush]] [--server]"
+    subcommand_parser.add_argument(data_argument, help='one identifier or a path to a txt file containing one ID per line')
+    subcommand_parser.add_argument('-i', '--in', help="type of database ID for input" + database_letters_help, choices=['m','c','k','b'], dest='input_type', required=True, metavar="")
+    if lookup_kind != 'info':
+        subcommand_parser.add_argument('-o', '--out', help="type of database ID for output" + database_letters_help, choices=['m','c','k','b'], dest='output_type', required=True, metavar="")
+    subcommand_parser.add_argument('-l', '--list', help="if set, supply a list of IDs as txt file", dest='list_input', action='store_true')
+    subcommand_parser.add_argument('-al', '--altered', help="flag for altered metacyc ID", dest='is_altered_id', action='store_true')
+    add_stream_arguments(subcommand_parser)
+    add_server_argument(subcommand_parser)
+    if lookup_kind == 'multi':
+        subcommand_parser.add_argument('-j', '--jobs', help="translate the IDs with this many processes (bulk mode for very large lists)", dest='jobs', type=int, metavar="")
+
+
+def add_serve_arguments(serve_parser):
+    serve_parser.usage = "python db_lookup.py serve [-h] [--socket | --http] [--pool-size] [--cache-size]"
+    serve_parser.add_argument('--socket', help="path of the socket file (default: enlite.sock in the data directory)", dest='socket_path', metavar="")
+    serve_parser.add_argument('--http', help="answer lookups over HTTP instead, on [host:]port (default host: 127.0.0.1)", dest='http_address', metavar="")
+    serve_parser.add_argument('--pool-size', help="number of database connections and HTTP worker threads (default: 4)", dest='pool_size', type=int, default=4, metavar="")
+    serve_parser.add_argument('--cache-size', help="number of ID results kept in the cache (default: 100000)", dest='cache_size', type=int, default=100000, metavar="")
+
+
+def options(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    # only the subcommand that is run gets its arguments, the others just need their name and help
+    command_used = argv[0] if argv else None
 
-def options():
     main_parser = argparse.ArgumentParser(formatter_class=RawTextHelpFormatter)
     subcommands = main_parser.add_subparsers(title='subcommands', dest='command', description='valid subcommands:', help='\nuse "python db_lookup.py {subcommand} --help"\n\nfor details on the usage of the subcommands\n   ')
 
-    cpd_info_parser = subcommands.add_parser('cpd_info', help='find data on one or more compound IDs', formatter_class=RawTextHelpFormatter)
-    cpd_info_parser.usage = "python db_lookup.py cpd_info [-h] input_data -i [-l] [-al] "
-    cpd_info_parser.add_argument('input_data', help='one identifier or a path to a txt file containing one ID per line')
-    cpd_info_parser.add_argument('-i', '--in', help="type of database ID for input\n\tm: ModelSEED\n\tc: MetaCyc\n\tk: KEGG\n\tb: BiGG", choices=['m','c','k','b'], dest='input_type', required=True, metavar="")
-    cpd_info_parser.add_argument('-l', '--list', help="if set, supply a list of IDs as txt file", dest='list_input', action='store_true')
-    cpd_info_parser.add_argument('-al', '--altered', help="flag for altered metacyc ID", dest='is_altered_id', action='store_true')
-
-    rxn_info_parser = subcommands.add_parser('rxn_info', help='find data on one or more compound IDs', formatter_class=RawTextHelpFormatter)
-    rxn_info_parser.usage = "python db_lookup.py rxn_info [-h] input_data -i [-l] [-al]"
-    rxn_info_parser.add_argument('input_data', help='one identifier or a path to a txt file containing one ID per line')
-    rxn_info_parser.add_argument('-i', '--in', help="type of database ID for input\n\tm: ModelSEED\n\tc: MetaCyc\n\tk: KEGG\n\tb: BiGG", choices=['m','c','k','b'], dest='input_type', required=True, metavar="")
-    rxn_info_parser.add_argument('-l', '--list', help="if set, supply a list of IDs as txt file", dest='list_input', action='store_true')
-    rxn_info_parser.add_argument('-al', '--altered', help="flag for altered metacyc ID", dest='is_altered_id', action='store_true')
-
-    cpd_single_parser = subcommands.add_parser('cpd_single', help='find one aliases of one or more compound IDs', formatter_class=RawTextHelpFormatter)
-    cpd_single_parser.usage = "python db_lookup.py cpd_single [-h] input_data -i -o [-l] [-al]"
-    cpd_single_parser.add_argument('cpd_data', help='one identifier or a path to a txt file containing one ID per line')
-    cpd_single_parser.add_argument('-i', '--in', help="type of database ID for input\n\tm: ModelSEED\n\tc: MetaCyc\n\tk: KEGG\n\tb: BiGG", choices=['m','c','k','b'], dest='input_type', required=True, metavar="")
-    cpd_single_parser.add_argument('-o', '--out', help="type of database ID for output\n\tm: ModelSEED\n\tc: MetaCyc\n\tk: KEGG\n\tb: BiGG", choices=['m','c','k','b'], dest='output_type', required=True, metavar="")
-    cpd_single_parser.add_argument('-l', '--list', help="if set, supply a list of IDs as txt file", dest='list_input', action='store_true')
-    cpd_single_parser.add_argument('-al', '--altered', help="flag for altered metacyc ID", dest='is_altered_id', action='store_true')
-
-    cpd_multi_parser = subcommands.add_parser('cpd_multi', help='find all aliases of one or more compound IDs', formatter_class=RawTextHelpFormatter)
-    cpd_multi_parser.usage = "python db_lookup.py cpd_multi [-h] input_data -i -o [-l] [-al]"
-    cpd_multi_parser.add_argument('cpd_data', help='one identifier or a path to a txt file containing one ID per line')
-    cpd_multi_parser.add_argument('-i', '--in', help="type of database ID for input\n\tm: ModelSEED\n\tc: MetaCyc\n\tk: KEGG\n\tb: BiGG", choices=['m','c','k','b'], dest='input_type', required=True, metavar="")
-    cpd_multi_parser.add_argument('-o', '--out', help="type of database ID for output\n\tm: ModelSEED\n\tc: MetaCyc\n\tk: KEGG\n\tb: BiGG", choices=['m','c','k','b'], dest='output_type', required=True, metavar="")
-    cpd_multi_parser.add_argument('-l', '--list', help="if set, supply a list of IDs as txt file", dest='list_input', action='store_true')
-    cpd_multi_parser.add_argument('-al', '--altered', help="flag for altered metacyc ID", dest='is_altered_id', action='store_true')
-
-    rxn_single_parser = subcommands.add_parser('rxn_single', help='find one aliases of one or more reaction IDs', formatter_class=RawTextHelpFormatter)
-    rxn_single_parser.usage = "python db_lookup.py rxn_single [-h] input_data -i -o [-l] [-al]"
-    rxn_single_parser.add_argument('rxn_data', help='one identifier or a path to a txt file containing one ID per line')
-    rxn_single_parser.add_argument('-i', '--in', help="type of database ID for input\n\tm: ModelSEED\n\tc: MetaCyc\n\tk: KEGG\n\tb: BiGG", choices=['m','c','k','b'], dest='input_type', required=True, metavar="")
-    rxn_single_parser.add_argument('-o', '--out', help="type of database ID for output\n\tm: ModelSEED\n\tc: MetaCyc\n\tk: KEGG\n\tb: BiGG", choices=['m','c','k','b'], dest='output_type', required=True, metavar="")
-    rxn_single_parser.add_argument('-l', '--list', help="if set, supply a list of IDs as txt file", dest='list_input', action='store_true')
-    rxn_single_parser.add_argument('-al', '--altered', help="flag for altered metacyc ID", dest='is_altered_id', action='store_true')
-
-    rxn_multi_parser = subcommands.add_parser('rxn_multi', help='find all aliases of one or more reaction IDs', formatter_class=RawTextHelpFormatter)
-    rxn_multi_parser.usage = "python db_lookup.py rxn_multi [-h] input_data -i -o [-l] [-al]"
-    rxn_multi_parser.add_argument('rxn_data', help='one identifier or a path to a txt file containing one ID per line')
-    rxn_multi_parser.add_argument('-i', '--in', help="type of database ID for input\n\tm: ModelSEED\n\tc: MetaCyc\n\tk: KEGG\n\tb: BiGG", choices=['m','c','k','b'], dest='input_type', required=True, metavar="")
-    rxn_multi_parser.add_argument('-o', '--out', help="type of database ID for output\n\tm: ModelSEED\n\tc: MetaCyc\n\tk: KEGG\n\tb: BiGG", choices=['m','c','k','b'], dest='output_type', required=True, metavar="")
-    rxn_multi_parser.add_argument('-l', '--list', help="if set, supply a list of IDs as txt file", dest='list_input', action='store_true')
-    rxn_multi_parser.add_argument('-al', '--altered', help="flag for altered metacyc ID", dest='is_altered_id', action='store_true')
-
-    args = main_parser.parse_args()
+    for command, command_settings in lookup_commands.items():
+        subcommand_parser = subcommands.add_parser(command, help=command_settings[0], formatter_class=RawTextHelpFormatter)
+        if command == command_used:
+            add_lookup_arguments(subcommand_parser, command)
+
+    serve_parser = subcommands.add_parser('serve', help='keep the database open and answer lookups on a Unix socket or over HTTP', formatter_class=RawTextHelpFormatter)
+    if command_used == 'serve':
+        add_serve_arguments(serve_parser)
+
+    args = main_parser.parse_args(argv)
+    if args.command == 'serve' and args.socket_path and args.http_address:
+        main_parser.error("--socket and --http cannot be combined")
+    if getattr(args, 'server', None) is not None and (args.stream or getattr(args, 'jobs', None)):
+        main_parser.error("--server cannot be combined with --stream or --jobs")
+    if getattr(args, 'stream', False) and getattr(args, 'jobs', None):
+        main_parser.error("--stream and --jobs cannot be combined")
+    if getattr(args, 'chunk_size', 1) < 1:
+        main_parser.error("--chunk-size has to be at least 1")
     return args
 
 
+def translate_in_bulk(db_path, jobs, id_list, db_type, input_db_name, output_db_name, is_altered_id):
+    from enlite.classes.Translators import BulkTranslator
+    bulk_translator = BulkTranslator(db_path, jobs=jobs)
+    multiple_aliases, ids_not_found = bulk_translator.translate(id_list, db_type, input_db_name, output_db_name, metacyc_id_is_altered=is_altered_id)
+    for database_id in ids_not_found:
+        print(f"record for {database_id} not found")
+    print(f"translated {bulk_translator.ids_translated} IDs in {bulk_translator.elapsed_time:.2f} s "
+          f"({bulk_translator.throughput:.0f} IDs/s, {bulk_translator.jobs} processes)", file=sys.stderr)
+    return multiple_aliases
+
+
+def stream_lookup(args, db_handler, filehandler, db_names_dict):
+    """resolve the input IDs chunk by chunk and write the results of each chunk right away"""
+    from enlite.classes.Streams import RecordWriter, StreamingLookup
+    db_type, data_argument, lookup_kind = lookup_commands[args.command][1:]
+    input_data = getattr(args, data_argument)
+    if args.list_input:
+        id_chunks = filehandler.iter_chunks(input_data, args.chunk_size)
+    else:
+        id_chunks = [[input_data]]
+    out_file = open(args.output_file, 'w', newline='') if args.output_file else sys.stdout
+    writer = RecordWriter(out_file, args.output_format, args.flush_policy)
+    streaming_lookup = StreamingLookup(db_handler, writer)
+    input_db_name = db_names_dict[args.input_type]
+    try:
+        if lookup_kind == 'info':
+            streaming_lookup.stream_info(id_chunks, db_type, input_db_name, args.is_altered_id)
+        else:
+            streaming_lookup.stream_aliases(id_chunks, db_type, input_db_name, db_names_dict[args.output_type],
+                                            args.is_altered_id, first_only=lookup_kind == 'single')
+        writer.flush()
+    except BrokenPipeError:
+        # the next stage of the pipeline stopped reading, e.g. head
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        sys.exit(1)
+    finally:
+        if out_file is not sys.stdout:
+            out_file.close()
+    print(f"looked up {streaming_lookup.ids_read} IDs in {streaming_lookup.elapsed_time:.2f} s "
+          f"({streaming_lookup.throughput:.0f} IDs/s), {streaming_lookup.ids_not_found} not found, "
+          f"{writer.rows_written} rows written", file=sys.stderr)
+
+
+def get_default_socket_path(conf):
+    return os.path.join(conf.get_data_path(), "enlite.sock")
+
+
+def parse_http_address(http_address):
+    """
+    :param http_address: port or host:port
+    :type http_address: str
+    :return: host and port
+    :rtype: tuple
+    """
+    host, separator, port = http_address.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+def serve(args, conf):
+    """answer lookups on a Unix socket or over HTTP until the server is stopped with SIGTERM or Ctrl+C"""
+    import signal
+    from enlite.classes.Pools import PooledDatabaseHandler
+    from enlite.classes.Services import LookupService, LookupDaemon
+    from enlite.classes.HTTPServices import LookupHTTPServer
+    db_handler = PooledDatabaseHandler(conf.get_database_path(), pool_size=args.pool_size, read_only=True)
+    lookup_service = LookupService(db_handler, cache_size=args.cache_size)
+    if args.http_address:
+        server_address = parse_http_address(args.http_address)
+        lookup_daemon = LookupHTTPServer(server_address, lookup_service, workers=args.pool_size)
+        listening_on = "http://{}:{}".format(*server_address)
+    else:
+        listening_on = args.socket_path or get_default_socket_path(conf)
+        try:
+            lookup_daemon = LookupDaemon(listening_on, lookup_service)
+        except LookupServiceError as service_error:
+            sys.exit(service_error.message)
+    # SIGTERM ends serve_forever like Ctrl+C, so the socket file is removed
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    print(f"answering lookups on {listening_on}", file=sys.stderr)
+    try:
+        lookup_daemon.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        lookup_daemon.server_close()
+        db_handler.close_connection()
+
+
+def lookup_on_server(lookup_client, command, id_list, input_db_name, output_db_name=None, is_altered_id=False):
+    try:
+        return lookup_client.lookup(command, id_list, input_db_name, output_db_name, is_altered_id)
+    except LookupServiceError as service_error:
+        sys.exit(service_error.message)
+
+
+def collect_single_aliases(id_list, results):
+    """the output of the single subcommands from the results of the daemon"""
+    multiple_aliases = {}
+    for database_id in id_list:
+        alias_list = results[database_id]
+        if alias_list is None:
+            print(f"record for {database_id} not found")
+            alias_list = [None]
+        multiple_aliases[database_id] = alias_list
+    return multiple_aliases
+
+
+def collect_multi_aliases(id_list, results):
+    """the output of the multi subcommands from the results of the daemon"""
+    for database_id in id_list:
+        if results[database_id] is None:
+            print(f"record for {database_id} not found")
+    return {database_id: alias_list for database_id, alias_list in results.items() if alias_list is not None}
+
+
 def main():
+    args = options()
     conf = DBLConfigLoader(config_root="config", project_root=".")
-    db_handler = DatabaseHandler(conf.get_database_path())
+    if args.command == "serve":
+        serve(args, conf)
+        return
     filehandler = Filehandler()
-    enliter = Enliter(db_handler, filehandler)
+    lookup_client = None
+    if getattr(args, 'server', None) is not None:
+        # the daemon holds the database, this process only sends the lookup
+        from enlite.classes.Services import LookupClient
+        lookup_client = LookupClient(args.server or get_default_socket_path(conf))
+    else:
+        # lookups never write, so the database is opened read-only and memory-mapped
+        db_handler = DatabaseHandler(conf.get_database_path(), read_only=True)
+        enliter = Enliter(db_handler, filehandler)
 
     db_names_dict = {
                 'a': 'all',
@@ -74,10 +236,13 @@ def main():
                 'k': 'kegg'
             }
 
-    args = options()
     #print(vars(args))
     command_used = args.command
 
+    if getattr(args, 'stream', False):
+        stream_lookup(args, db_handler, filehandler, db_names_dict)
+        return
+
     if command_used == "cpd_info":
         input_db_name = args.input_type
         if args.list_input:
@@ -85,22 +250,20 @@ def main():
         else:
             cpd_list = [args.input_data]
         print(input_db_name)
+        if lookup_client is not None:
+            records_by_id = lookup_on_server(lookup_client, 'cpd_info', cpd_list, db_names_dict[input_db_name], is_altered_id=args.is_altered_id)
+        elif input_db_name == "m":
+            records_by_id = db_handler.fetch_modelseed_cpd_info_many(cpd_list)
+        elif input_db_name == "c":
+            records_by_id = db_handler.fetch_metacyc_cpd_info_many(cpd_list, metacyc_id_is_altered=args.is_altered_id)
+        elif input_db_name == "b":
+            records_by_id = db_handler.fetch_bigg_cpd_info_many(cpd_list)
+        elif input_db_name == "k":
+            records_by_id = db_handler.fetch_kegg_cpd_info_many(cpd_list)
         records_found = []
         for compound_id in cpd_list:
-            try:
-                if input_db_name == "m":
-                    cpd_record = db_handler.fetch_modelseed_cpd_info(compound_id)
-                elif input_db_name == "c":
-                    if args.is_altered_id:
-                        cpd_record = db_handler.fetch_metacyc_cpd_info(compound_id)
-                    else:
-                        altered_id = db_handler.get_altered_metacyc_cpd_id(compound_id)
-                        cpd_record = db_handler.fetch_metacyc_cpd_info(altered_id)
-                elif input_db_name == "b":
-                    cpd_record = db_handler.fetch_bigg_cpd_info(compound_id)
-                elif input_db_name == "k":
-                    cpd_record = db_handler.fetch_kegg_cpd_info(compound_id)
-            except RecordNotFoundError:
+            cpd_record = records_by_id[compound_id]
+            if cpd_record is None:
                 cpd_record = {'database_record': None}
             records_found.append(cpd_record)
         print("  ".join(cpd_record.keys()))
@@ -113,22 +276,20 @@ def main():
             rxn_list = filehandler.build_list(args.input_data)
         else:
             rxn_list = [args.input_data]
+        if lookup_client is not None:
+            records_by_id = lookup_on_server(lookup_client, 'rxn_info', rxn_list, db_names_dict[input_db_name], is_altered_id=args.is_altered_id)
+        elif input_db_name == "m":
+            records_by_id = db_handler.fetch_modelseed_rxn_info_many(rxn_list)
+        elif input_db_name == "c":
+            records_by_id = db_handler.fetch_metacyc_rxn_info_many(rxn_list, metacyc_id_is_altered=args.is_altered_id)
+        elif input_db_name == "b":
+            records_by_id = db_handler.fetch_bigg_rxn_info_many(rxn_list)
+        elif input_db_name == "k":
+            records_by_id = db_handler.fetch_kegg_rxn_info_many(rxn_list)
         records_found = []
         for reaction_id in rxn_list:
-            try:
-                if input_db_name == "m":
-                    rxn_record = db_handler.fetch_modelseed_rxn_info(reaction_id)
-                elif input_db_name == "c":
-                    if args.is_altered_id:
-                        rxn_record = db_handler.fetch_metacyc_rxn_info(reaction_id)
-                    else:
-                        altered_id = db_handler.get_altered_metacyc_rxn_id(reaction_id)
-                        rxn_record = db_handler.fetch_metacyc_rxn_info(altered_id)
-                elif input_db_name == "b":
-                    rxn_record = db_handler.fetch_bigg_rxn_info(reaction_id)
-                elif input_db_name == "k":
-                    rxn_record = db_handler.fetch_kegg_rxn_info(reaction_id)
-            except RecordNotFoundError:
+            rxn_record = records_by_id[reaction_id]
+            if rxn_record is None:
                 rxn_record = {'database_record': None}
             records_found.append(rxn_record)
         print("  ".join(rxn_record.keys()))
@@ -142,10 +303,14 @@ def main():
             cpd_list = filehandler.build_list(args.cpd_data)
         else:
             cpd_list = [args.cpd_data]
-        multiple_aliases = {}
-        for compound_id in cpd_list:
-            single_alias = enliter.find_compound_alias_single(compound_id, input_db_name, output_db_name, metacyc_id_is_altered=args.is_altered_id)
-            multiple_aliases[compound_id] = [single_alias]
+        if lookup_client is not None:
+            single_aliases = lookup_on_server(lookup_client, 'cpd_single', cpd_list, input_db_name, output_db_name, args.is_altered_id)
+            multiple_aliases = collect_single_aliases(cpd_list, single_aliases)
+        else:
+            multiple_aliases = {}
+            for compound_id in cpd_list:
+                single_alias = enliter.find_compound_alias_single(compound_id, input_db_name, output_db_name, metacyc_id_is_altered=args.is_altered_id)
+                multiple_aliases[compound_id] = [single_alias]
         print("Input database:", input_db_name)
         for item in multiple_aliases:
             print("\n", item)
@@ -159,7 +324,13 @@ def main():
             cpd_list = filehandler.build_list(args.cpd_data)
         else:
             cpd_list = [args.cpd_data]
-        multiple_aliases = enliter.find_compound_alias_multi(cpd_list, input_db_name, output_db_name, metacyc_id_is_altered=args.is_altered_id)
+        if lookup_client is not None:
+            multi_aliases = lookup_on_server(lookup_client, 'cpd_multi', cpd_list, input_db_name, output_db_name, args.is_altered_id)
+            multiple_aliases = collect_multi_aliases(cpd_list, multi_aliases)
+        elif args.jobs:
+            multiple_aliases = translate_in_bulk(conf.get_database_path(), args.jobs, cpd_list, 'compound', input_db_name, output_db_name, args.is_altered_id)
+        else:
+            multiple_aliases = enliter.find_compound_alias_multi(cpd_list, input_db_name, output_db_name, metacyc_id_is_altered=args.is_altered_id)
         print("Input database:", input_db_name)
         for item in multiple_aliases:
             print("\n", item)
@@ -173,10 +344,14 @@ def main():
             rxn_list = filehandler.build_list(args.rxn_data)
         else:
             rxn_list = [args.rxn_data]
-        multiple_aliases = {}
-        for reaction_id in rxn_list:
-            single_alias = enliter.find_reaction_alias_single(reaction_id, input_db_name, output_db_name, metacyc_id_is_altered=args.is_altered_id)
-            multiple_aliases[reaction_id] = [single_alias]
+        if lookup_client is not None:
+            single_aliases = lookup_on_server(lookup_client, 'rxn_single', rxn_list, input_db_name, output_db_name, args.is_altered_id)
+            multiple_aliases = collect_single_aliases(rxn_list, single_aliases)
+        else:
+            multiple_aliases = {}
+            for reaction_id in rxn_list:
+                single_alias = enliter.find_reaction_alias_single(reaction_id, input_db_name, output_db_name, metacyc_id_is_altered=args.is_altered_id)
+                multiple_aliases[reaction_id] = [single_alias]
         print("Input database:", input_db_name)
         for item in multiple_aliases:
             print("\n", item)
@@ -190,7 +365,13 @@ def main():
             rxn_list = filehandler.build_list(args.rxn_data)
         else:
             rxn_list = [args.rxn_data]
-        multiple_aliases = enliter.find_reaction_alias_multi(rxn_list, input_db_name, output_db_name, metacyc_id_is_altered=args.is_altered_id)
+        if lookup_client is not None:
+            multi_aliases = lookup_on_server(lookup_client, 'rxn_multi', rxn_list, input_db_name, output_db_name, args.is_altered_id)
+            multiple_aliases = collect_multi_aliases(rxn_list, multi_aliases)
+        elif args.jobs:
+            multiple_aliases = translate_in_bulk(conf.get_database_path(), args.jobs, rxn_list, 'reaction', input_db_name, output_db_name, args.is_altered_id)
+        else:
+            multiple_aliases = enliter.find_reaction_alias_multi(rxn_list, input_db_name, output_db_name, metacyc_id_is_altered=args.is_altered_id)
         print("Input database:", input_db_name)
         for item in multiple_aliases:
             print("\n", item)
@@ -6,6 +6,9 @@ setup(name='enlite',
       author='Moritz Stüve',
       author_email='mostueve@gmail.com',
       url='https://gitlab.com/mostueve/enlite',
-      packages=['enlite', 'enlite.classes'],
-      install_requires=['PyYAML']
+      packages=['enlite', 'enlite.classes', 'enlite.database_scripts'],
+      install_requires=['PyYAML'],
+      entry_points={
+          'console_scripts': ['enlite=enlite.cli:main']
+      }
       )
@@ -0,0 +1,104 @@
+import os
+import sys
+import time
+import compileall
+import subprocess
+
+import pytest
+
+# milliseconds all imports of db_lookup.py --help may take, and the time it may add to a bare interpreter
+IMPORT_BUDGET_MS = 40
+OVERHEAD_BUDGET_MS = 60
+
+# modules db_lookup.py must not import before it knows it needs them
+DEFERRED_MODULES = ('yaml', 'pickle', 'pathlib', 'asyncio', 'multiprocessing', 'concurrent.futures',
+                    'csv', 'socketserver', 'http.server', 'enlite.classes.AsyncReporters',
+                    'enlite.classes.Translators', 'enlite.classes.Streams', 'enlite.classes.Services',
+                    'enlite.classes.HTTPServices')
+
+repository_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+db_lookup_path = os.path.join(repository_root, "enlite", "db_lookup.py")
+
+
+def parse_import_times(importtime_output, startup_modules=()):
+    """
+    :param importtime_output: stderr of python -X importtime
+    :type importtime_output: str
+    :param startup_modules: modules every interpreter imports, left out of the total
+    :type startup_modules: set of str
+    :return: cumulative import time in microseconds of each module, and of all other top level imports together
+    :rtype: tuple
+    """
+    import_times = {}
+    total_time = 0
+    for line in importtime_output.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_time, cumulative_time, module_name = line[len("import time:"):].split("|")
+        import_times[module_name.strip()] = int(cumulative_time)
+        # nested imports are indented below the module importing them
+        if not module_name[1:].startswith(" ") and module_name.strip() not in startup_modules:
+            total_time += int(cumulative_time)
+    return import_times, total_time
+
+
+def run_python(python_args, importtime=False):
+    """run a new interpreter which can import enlite without installing it"""
+    interpreter_args = [sys.executable, "-X", "importtime"] if importtime else [sys.executable]
+    environment = dict(os.environ, PYTHONPATH=repository_root)
+    return subprocess.run(interpreter_args + python_args, capture_output=True, text=True, env=environment)
+
+
+def run_db_lookup(lookup_args, importtime=False):
+    return run_python([db_lookup_path] + lookup_args, importtime)
+
+
+def best_wall_time(python_args, repeats=5):
+    """the fastest of several runs, the others only measure noise"""
+    wall_times = []
+    for repeat in range(repeats):
+        start_time = time.perf_counter()
+        run_python(python_args)
+        wall_times.append(time.perf_counter() - start_time)
+    return min(wall_times)
+
+
+@pytest.fixture(scope='module')
+def help_import_times():
+    # measure a warm start, without compiling the modules on the way
+    compileall.compile_dir(os.path.join(repository_root, "enlite"), quiet=1)
+    startup_modules = set(parse_import_times(run_python(["-c", "pass"], importtime=True).stderr)[0])
+    finished_process = run_db_lookup(["--help"], importtime=True)
+    assert finished_process.returncode == 0, finished_process.stderr
+    return parse_import_times(finished_process.stderr, startup_modules)
+
+
+def test_parse_import_times():
+    importtime_output = "\n".join([
+        "import time: self [us] | cumulative | imported package",
+        "import time:       100 |        100 | site",
+        "import time:        20 |         20 |   re._parser",
+        "import time:        30 |         50 | re",
+        "import time:        40 |         90 | argparse",
+    ])
+    import_times, total_time = parse_import_times(importtime_output, startup_modules={'site'})
+    assert import_times == {'site': 100, 're._parser': 20, 're': 50, 'argparse': 90}
+    assert total_time == 140
+
+
+def test_deferred_modules_are_not_imported(help_import_times):
+    import_times, total_time = help_import_times
+    imported_modules = [module_name for module_name in DEFERRED_MODULES if module_name in import_times]
+    assert not imported_modules, f"imported at startup: {', '.join(imported_modules)}"
+
+
+def test_import_budget(help_import_times):
+    import_times, total_time = help_import_times
+    assert total_time / 1000 <= IMPORT_BUDGET_MS, \
+        f"the imports of db_lookup.py --help take {total_time / 1000:.2f} ms, the budget is {IMPORT_BUDGET_MS} ms"
+
+
+def test_startup_overhead(help_import_times):
+    overhead_ms = (best_wall_time([db_lookup_path, "--help"]) - best_wall_time(["-c", "pass"])) * 1000
+    assert overhead_ms <= OVERHEAD_BUDGET_MS, \
+        f"db_lookup.py adds {overhead_ms:.2f} ms to the interpreter startup, the budget is {OVERHEAD_BUDGET_MS} ms"